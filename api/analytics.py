@@ -0,0 +1,318 @@
+import argparse
+import os
+import pathlib
+import time
+
+import numpy as np
+import pandas as pd
+from metrics import log
+
+# The hard-coded genre lists of sql/analysis.
+ROCK_GENRES = ("album rock", "rock", "classic rock", "hard rock", "rock-and-roll")
+POP_GENRES = ("hip hop", "pop", "rap", "r&b")
+# key: sql/analysis report, value: (kind, genres)
+REPORTS = {
+    "albums_best_rock": ("albums", ROCK_GENRES),
+    "albums_best_pop": ("albums", POP_GENRES),
+    "tracks_best_rock": ("tracks", ROCK_GENRES),
+    "tracks_best_pop": ("tracks", POP_GENRES),
+}
+
+
+def csr(lists, positions) -> tuple:
+    """
+    (indptr, indices) of the row positions the values of every list map to. Unknown values
+    are dropped, repeated ones kept once.
+    """
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    indices = list()
+    for i, values in enumerate(lists):
+        indices.extend(
+            dict.fromkeys(positions[value] for value in values if value in positions)
+        )
+        indptr[i + 1] = len(indices)
+    return (indptr, np.array(indices, dtype=np.int32))
+
+
+def invert(indptr, indices, size) -> tuple:
+    """
+    The transposed CSR relation, e.g. genre -> artists from artist -> genres. A stable sort
+    keeps every posting list sorted.
+    """
+    owners = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    inverted_indptr = np.zeros(size + 1, dtype=np.int64)
+    inverted_indptr[1:] = np.cumsum(np.bincount(indices, minlength=size))
+    return (inverted_indptr, owners[np.argsort(indices, kind="stable")])
+
+
+def expand(indptr, indices, rows) -> tuple:
+    """
+    Vectorized UNNEST: (owner row, value) for every value of the given rows.
+    """
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return (np.repeat(rows, counts), indices[np.repeat(starts, counts) + offsets])
+
+
+def missing(value) -> bool:
+    # NULLs of the exported tables come back as pd.NA.
+    return value is None or value is pd.NA
+
+
+def listed(value) -> list:
+    return [] if missing(value) else value
+
+
+def column(rows, name, dtype=object) -> np.ndarray:
+    values = [getattr(row, name) for row in rows]
+    if dtype is object:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return np.array([0 if missing(value) else value for value in values], dtype=dtype)
+
+
+class GenreIndex:
+    """
+    The sql/analysis reports without Postgres. Every table is a dict of NumPy columns, every
+    array column a CSR relation (indptr, indices) of row positions: genre -> artists (the
+    inverted index, sorted postings), artist -> genres, artist -> albums and artist -> tracks.
+    A report unions the postings of its genres and follows the relations with vectorized
+    gathers, so its cost depends on the matching artists, not on the size of the tables.
+    """
+
+    def __init__(self, vocabulary, tables, relations):
+        self.vocabulary = vocabulary
+        self.tables = tables
+        self.relations = relations
+        self.genre_positions = {genre: i for i, genre in enumerate(vocabulary)}
+
+    @classmethod
+    def build(cls, artists, albums, tracks, rs_items):
+        """
+        Any iterables of rows with the attributes of Artists, Albums, Tracks and
+        RollingStonesItem: the dataclasses or DataFrame.itertuples() of the exported tables.
+        """
+        artists, albums, tracks = list(artists), list(albums), list(tracks)
+        # Only tracks of the Rolling Stones list, the INNER JOIN rs_master_data of the SQL.
+        descriptions = {
+            rs_item.track_id: rs_item.description
+            for rs_item in rs_items
+            if not missing(rs_item.track_id) and rs_item.track_id
+        }
+
+        vocabulary = sorted({genre for artist in artists for genre in listed(artist.genres)})
+        genre_positions = {genre: i for i, genre in enumerate(vocabulary)}
+        artist_positions = {artist.artist_id: i for i, artist in enumerate(artists)}
+        album_positions = {album.album_id: i for i, album in enumerate(albums)}
+
+        artist_names = column(artists, "artist_name")
+        tables = {
+            "artists": {
+                "artist_name": artist_names,
+                # ORDER BY artist_name: equal names get the same rank.
+                "name_order": np.unique(artist_names.astype(str), return_inverse=True)[1],
+                "number_of_albums": np.array(
+                    [len(listed(artist.albums)) for artist in artists], dtype=np.int64
+                ),
+                "total_followers": column(artists, "total_followers", np.int64),
+                "popularity": column(artists, "popularity", np.int64),
+            },
+            "albums": {
+                "album_name": column(albums, "album_name"),
+                "rs_rank": column(albums, "rs_rank", np.int64),
+                "released_year": column(albums, "released_year", np.int64),
+                "label": column(albums, "label"),
+                "uri": column(albums, "uri"),
+            },
+            "tracks": {
+                "track_name": column(tracks, "track_name"),
+                "rs_rank": column(tracks, "rs_rank", np.int64),
+                "album": np.array(
+                    [album_positions.get(track.album_id, -1) for track in tracks],
+                    dtype=np.int64,
+                ),
+                "released_year": column(tracks, "released_year", np.int64),
+                "uri": column(tracks, "uri"),
+                "in_rs_master_data": np.array(
+                    [track.track_id in descriptions for track in tracks], dtype=bool
+                ),
+                "description": np.array(
+                    [descriptions.get(track.track_id) for track in tracks], dtype=object
+                ),
+            },
+        }
+
+        artist_genres = csr([listed(artist.genres) for artist in artists], genre_positions)
+        track_artists = csr([listed(track.artist_ids) for track in tracks], artist_positions)
+        relations = {
+            "artist_genres": artist_genres,
+            "genre_artists": invert(*artist_genres, len(vocabulary)),
+            "artist_albums": csr(
+                [listed(artist.albums) for artist in artists], album_positions
+            ),
+            "artist_tracks": invert(*track_artists, len(artists)),
+        }
+        return cls(vocabulary, tables, relations)
+
+    @classmethod
+    def from_master_data(cls, master_data):
+        return cls.build(
+            master_data.artists, master_data.albums, master_data.tracks, master_data.rs_master_data
+        )
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        From the frames of columnar.load_master_frames.
+        """
+        return cls.build(
+            *(
+                frames[name].itertuples(index=False) if name in frames else ()
+                for name in ("artists", "albums", "tracks", "rs_master_data")
+            )
+        )
+
+    def genre_rows(self, genres) -> np.ndarray:
+        return np.array(
+            [self.genre_positions[genre] for genre in genres if genre in self.genre_positions],
+            dtype=np.int64,
+        )
+
+    def artists_for(self, genres) -> np.ndarray:
+        """
+        Sorted positions of the artists with any of the genres, the union of their postings.
+        """
+        _, artist_rows = expand(*self.relations["genre_artists"], self.genre_rows(genres))
+        return np.unique(artist_rows)
+
+    def filter_genres(self, artist_rows, genres) -> np.ndarray:
+        """
+        Per artist the genres it matched on (ARRAY_AGG of the SQL), in the artist's order.
+        """
+        vocabulary = np.array(self.vocabulary, dtype=object)
+        owners, genre_rows = expand(*self.relations["artist_genres"], artist_rows)
+        matched = np.isin(genre_rows, self.genre_rows(genres))
+        counts = np.bincount(
+            np.searchsorted(artist_rows, owners[matched]), minlength=len(artist_rows)
+        )
+        filter_genres = np.empty(len(artist_rows), dtype=object)
+        if len(artist_rows):
+            filter_genres[:] = [
+                matched_genres.tolist()
+                for matched_genres in np.split(
+                    vocabulary[genre_rows[matched]], np.cumsum(counts)[:-1]
+                )
+            ]
+        return filter_genres
+
+    def best_albums(self, genres) -> pd.DataFrame:
+        """
+        albums_best_rock/pop.sql for any genre set: the ranked albums of every matching
+        artist, worst rank first. The SQL pairs the UNNESTed genres and albums position by
+        position, so it misses albums listed after the last genre; these are all included.
+        """
+        artists, albums = self.tables["artists"], self.tables["albums"]
+        artist_rows = self.artists_for(genres)
+        owners, album_rows = expand(*self.relations["artist_albums"], artist_rows)
+
+        ranked = albums["rs_rank"][album_rows] > 0
+        owners, album_rows = owners[ranked], album_rows[ranked]
+        order = np.argsort(-albums["rs_rank"][album_rows], kind="stable")
+        owners, album_rows = owners[order], album_rows[order]
+        # Only the artists in the result need their genre lists.
+        result_artists = np.unique(owners)
+        filter_genres = self.filter_genres(result_artists, genres)
+
+        return pd.DataFrame(
+            {
+                "artist_name": artists["artist_name"][owners],
+                "album_name": albums["album_name"][album_rows],
+                "album_ranking": albums["rs_rank"][album_rows],
+                "total_followers": artists["total_followers"][owners],
+                "popularity": artists["popularity"][owners],
+                "released_year": albums["released_year"][album_rows],
+                "label": albums["label"][album_rows],
+                "filter_genres": filter_genres[np.searchsorted(result_artists, owners)],
+                "uri": albums["uri"][album_rows],
+            }
+        )
+
+    def best_tracks(self, genres) -> pd.DataFrame:
+        """
+        tracks_best_rock/pop.sql for any genre set: the Rolling Stones tracks of every
+        matching artist, by artist name, worst rank first.
+        """
+        artists, albums, tracks = (
+            self.tables["artists"],
+            self.tables["albums"],
+            self.tables["tracks"],
+        )
+        artist_rows = self.artists_for(genres)
+        owners, track_rows = expand(*self.relations["artist_tracks"], artist_rows)
+
+        album_rows = tracks["album"][track_rows]
+        joined = tracks["in_rs_master_data"][track_rows] & (album_rows >= 0)
+        owners, track_rows, album_rows = owners[joined], track_rows[joined], album_rows[joined]
+        order = np.lexsort((-tracks["rs_rank"][track_rows], artists["name_order"][owners]))
+        owners, track_rows, album_rows = owners[order], track_rows[order], album_rows[order]
+        # Only the artists in the result need their genre lists.
+        result_artists = np.unique(owners)
+        filter_genres = self.filter_genres(result_artists, genres)
+
+        return pd.DataFrame(
+            {
+                "artist_name": artists["artist_name"][owners],
+                "number_of_albums": artists["number_of_albums"][owners],
+                "total_followers": artists["total_followers"][owners],
+                "popularity": artists["popularity"][owners],
+                "track_name": tracks["track_name"][track_rows],
+                "track_ranking": tracks["rs_rank"][track_rows],
+                "album_name": albums["album_name"][album_rows],
+                "album_ranking": albums["rs_rank"][album_rows],
+                "released_year": tracks["released_year"][track_rows],
+                "uri": tracks["uri"][track_rows],
+                "filter_genres": filter_genres[np.searchsorted(result_artists, owners)],
+                "description": tracks["description"][track_rows],
+            }
+        )
+
+    def report(self, name) -> pd.DataFrame:
+        kind, genres = REPORTS[name]
+        return self.best_albums(genres) if kind == "albums" else self.best_tracks(genres)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="The sql/analysis reports from the fetch_data.py --columnar arrow export."
+    )
+    parser.add_argument("report", nargs="?", choices=list(REPORTS), default="albums_best_rock")
+    parser.add_argument("--genres", nargs="+", help="Any genre set instead of the report's.")
+    parser.add_argument("--kind", choices=["albums", "tracks"], help="With --genres.")
+    parser.add_argument("--columnar", choices=["arrow", "parquet"], default="arrow")
+    args = parser.parse_args()
+
+    # Only needed for the command line, pyarrow is not imported otherwise.
+    from columnar import load_master_frames
+
+    root_dir_path = pathlib.Path(__file__).parent.parent.resolve()
+    frames = load_master_frames(
+        os.path.join(root_dir_path, "data"), file_format=args.columnar, memory_map=True
+    )
+    start = time.perf_counter()
+    index = GenreIndex.from_frames(frames)
+    elapsed = time.perf_counter() - start
+    log(f"Genre index of {len(index.vocabulary)} genres built in {elapsed:.2f}s")
+
+    start = time.perf_counter()
+    if args.genres:
+        kind = args.kind or REPORTS[args.report][0]
+        best = index.best_albums if kind == "albums" else index.best_tracks
+        result = best(args.genres)
+    else:
+        result = index.report(args.report)
+    elapsed = time.perf_counter() - start
+    with pd.option_context("display.max_rows", None, "display.width", None):
+        print(result)
+    log(f"{len(result)} rows in {elapsed * 1000:.2f}ms")
@@ -0,0 +1,173 @@
+import asyncio
+import random
+import time
+
+import aiohttp
+from client import DEFAULT_HEADERS, SPOTIFY_API_URL
+from metrics import METRICS, endpoint_for, log
+
+# Status codes worth retrying: rate limited or a transient server side error.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def retry_delay(attempt: int, retry_after=None, base: float = 0.5, cap: float = 30.0):
+    """
+    Seconds to wait before the next attempt. Honours the "Retry-After" header when Spotify sends one,
+    otherwise exponential backoff with full jitter.
+    """
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter. Allows bursts up to "capacity" requests and refills at "rate" requests per second.
+    A 429 pauses the whole bucket, so every worker backs off together instead of hammering the API.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncSpotifyClient:
+    """
+    aiohttp based client with bounded concurrency, a shared token bucket and retries on 429/5xx.
+    Use it as an async context manager so the connection pool is closed at the end of the run.
+    With a TokenManager a 401 is retried once with a refreshed token.
+    """
+
+    def __init__(
+        self,
+        headers: dict = None,
+        base_url: str = SPOTIFY_API_URL,
+        concurrency: int = 8,
+        rate_limit: float = 10.0,
+        max_retries: int = 5,
+        timeout: int = 30,
+        cache=None,
+        tokens=None,
+    ):
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.tokens = tokens
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.rate_limiter = TokenBucket(rate=rate_limit, capacity=concurrency)
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    @classmethod
+    def from_client(cls, client, **kwargs):
+        """
+        Async counterpart of a SpotifyClient, sharing its headers, tokens, base URL and
+        response cache.
+        """
+        return cls(
+            headers=client.headers,
+            base_url=client.base_url,
+            cache=client.cache,
+            tokens=client.tokens,
+            **kwargs,
+        )
+
+    def url(self, path: str) -> str:
+        if path.startswith("http"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    async def get_json(self, path: str, params: dict = None) -> dict | None:
+        url = self.url(path)
+        if self.cache:
+            cached_response = self.cache.get(url=url, params=params)
+            if cached_response is not None:
+                return cached_response
+
+        response = await self.request_json(url=url, params=params)
+        if response is not None and self.cache:
+            self.cache.set(url=url, body=response, params=params)
+        return response
+
+    async def request_json(self, url: str, params: dict = None) -> dict | None:
+        endpoint = endpoint_for(url)
+        reauthenticated = False
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                METRICS.record_retry(endpoint)
+            retry_after = None
+            token = await self.tokens.token_async() if self.tokens else None
+            headers = {"Authorization": f"Bearer {token}"} if token else None
+            async with self.semaphore:
+                await self.rate_limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    async with self.session.get(url, params=params, headers=headers) as r:
+                        status = r.status
+                        if r.status == 200:
+                            response = await r.json()
+                            METRICS.record_request(endpoint, status, time.perf_counter() - start)
+                            return response
+                        retry_after = r.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    log(f"Request error: {e!r} for {url}")
+                    status = None
+                METRICS.record_request(endpoint, status, time.perf_counter() - start)
+
+            # Expired or revoked token: the first task refreshes it, the others wait for it.
+            if status == 401 and self.tokens and not reauthenticated:
+                reauthenticated = True
+                await self.tokens.refresh_async(stale_token=token)
+                continue
+
+            if status is not None and status not in RETRY_STATUSES:
+                log(f"Request failed with status {status} for {url}")
+                return None
+
+            delay = retry_delay(attempt=attempt, retry_after=retry_after)
+            if status == 429:
+                self.rate_limiter.pause(delay)
+            await asyncio.sleep(delay)
+
+        log(f"Giving up after {self.max_retries} retries: {url}")
+        return None
@@ -0,0 +1,136 @@
+import json
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from metrics import METRICS, endpoint_for
+
+DAY = 24 * 60 * 60
+
+# Search results and track/album metadata barely change, popularity and followers do.
+DEFAULT_TTLS = {
+    "search": 30 * DAY,
+    "tracks": 7 * DAY,
+    "albums": 7 * DAY,
+    "artists": 1 * DAY,
+}
+
+# use:           serve every cached response regardless of its age.
+# refresh-stale: serve fresh responses, re-fetch the ones older than the endpoint TTL.
+# refresh:       re-fetch everything, but still store the new responses.
+# off:           no reads, no writes.
+CACHE_MODES = ("use", "refresh-stale", "refresh", "off")
+
+
+class ResponseCache:
+    """
+    SQLite backed cache for Spotify API responses, keyed by the normalized URL and params.
+    Least recently used entries are evicted once the cache grows over "max_entries".
+    """
+
+    def __init__(
+        self, db_path, ttls: dict = None, max_entries=50000, mode="refresh-stale"
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Use one of {CACHE_MODES}")
+
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                endpoint TEXT,
+                body TEXT,
+                fetched_at REAL,
+                last_access REAL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self.connection.commit()
+
+    @staticmethod
+    def make_key(url: str, params: dict = None) -> str:
+        """
+        Lower cases scheme and host, merges the query string with "params", sorts the params
+        and collapses whitespace so the same request always maps to the same key.
+        """
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        query.extend((params or {}).items())
+        normalized = sorted((k, " ".join(str(v).split())) for k, v in query)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}?{urlencode(normalized)}"
+
+    @staticmethod
+    def endpoint_for(url: str) -> str:
+        return endpoint_for(url)
+
+    def is_stale(self, endpoint, fetched_at) -> bool:
+        ttl = self.ttls.get(endpoint, DAY)
+        return time.time() - fetched_at > ttl
+
+    def get(self, url: str, params: dict = None) -> dict | None:
+        if self.mode in ("refresh", "off"):
+            return None
+
+        cache_key = self.make_key(url=url, params=params)
+        row = self.connection.execute(
+            "SELECT endpoint, body, fetched_at FROM responses WHERE cache_key = ?",
+            (cache_key,),
+        ).fetchone()
+
+        if row is None or (
+            self.mode == "refresh-stale" and self.is_stale(row[0], row[2])
+        ):
+            self.misses += 1
+            METRICS.record_cache(endpoint=endpoint_for(url), hit=False)
+            return None
+
+        self.hits += 1
+        METRICS.record_cache(endpoint=row[0], hit=True)
+        self.connection.execute(
+            "UPDATE responses SET last_access = ? WHERE cache_key = ?",
+            (time.time(), cache_key),
+        )
+        self.connection.commit()
+        return json.loads(row[1])
+
+    def set(self, url: str, body: dict, params: dict = None):
+        if self.mode == "off":
+            return
+
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (
+                self.make_key(url=url, params=params),
+                self.endpoint_for(url),
+                json.dumps(body),
+                now,
+                now,
+            ),
+        )
+        self.evict()
+        self.connection.commit()
+
+    def evict(self):
+        (total,) = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if total > self.max_entries:
+            self.connection.execute(
+                """
+                DELETE FROM responses WHERE cache_key IN (
+                    SELECT cache_key FROM responses ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (total - self.max_entries,),
+            )
+
+    def close(self):
+        self.connection.close()
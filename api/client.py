@@ -0,0 +1,144 @@
+import time
+
+import requests
+from metrics import METRICS, endpoint_for, log
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SPOTIFY_API_URL = "https://api.spotify.com/v1"
+DEFAULT_HEADERS = {"Accept": "application/json"}
+# Retried after a timeout or a 5xx; a write may already be applied by then.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+
+class SpotifyClient:
+    """
+    Shared HTTP client for every Spotify API call. Owns one keep-alive connection pool,
+    the default and auth headers, timeouts, the retry policy and the optional response cache.
+    With a TokenManager every request carries its current token and a 401 is retried once
+    with a refreshed one; "auth_headers" are fixed headers for the mock server and tests.
+    """
+
+    def __init__(
+        self,
+        auth_headers: dict = None,
+        base_url=SPOTIFY_API_URL,
+        timeout=(5, 30),
+        max_retries=5,
+        pool_size=10,
+        cache=None,
+        tokens=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cache = cache
+        self.tokens = tokens
+        self.session = requests.Session()
+        # Writes get their own session: a reorder PUT that timed out may have been applied,
+        # sent twice it moves the tracks twice.
+        self.write_session = requests.Session()
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # Only what never reached Spotify is sent again: failed connects and 429s.
+        write_retry = Retry(
+            total=max_retries,
+            read=0,
+            other=0,
+            backoff_factor=0.5,
+            status_forcelist=(429,),
+            allowed_methods=frozenset({"POST", "PUT", "DELETE"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        for session, session_retry in ((self.session, retry), (self.write_session, write_retry)):
+            session.headers.update(DEFAULT_HEADERS)
+            adapter = HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size, max_retries=session_retry
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.set_auth_headers(auth_headers or {})
+
+    @property
+    def headers(self) -> dict:
+        return {**DEFAULT_HEADERS, **self.auth_headers}
+
+    def set_auth_headers(self, auth_headers: dict):
+        self.auth_headers = auth_headers
+        self.session.headers.update(auth_headers)
+        self.write_session.headers.update(auth_headers)
+
+    def url(self, path: str) -> str:
+        if path.startswith("http"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get_json(self, path: str, params: dict = None) -> dict | None:
+        """
+        GET request returning the parsed JSON body, served from the response cache when possible.
+        """
+        url = self.url(path)
+        if self.cache:
+            cached_response = self.cache.get(url=url, params=params)
+            if cached_response is not None:
+                return cached_response
+
+        r = self.request("GET", url=url, params=params)
+        if r.status_code != 200:
+            log(f"Request failed with status {r.status_code} for {url}")
+            return None
+
+        response = r.json()
+        if self.cache:
+            self.cache.set(url=url, body=response, params=params)
+        return response
+
+    def send_json(self, method: str, path: str, body: dict, params: dict = None) -> dict | None:
+        """
+        POST, PUT or DELETE with a JSON body, returning the parsed response. Never cached.
+        Sent through the write session: retried after a 429 or a failed connect only, a
+        timeout or 5xx returns None and the caller reads the state again.
+        """
+        url = self.url(path)
+        try:
+            r = self.request(method, url=url, params=params, json=body)
+        except requests.RequestException as e:
+            log(f"{method} failed for {url}: {e}")
+            return None
+        if r.status_code not in (200, 201):
+            log(f"{method} failed with status {r.status_code} for {url}: {r.text}")
+            return None
+        return r.json() if r.content else {}
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        endpoint = endpoint_for(url)
+        for attempt in range(2):
+            token = self.tokens.token() if self.tokens else None
+            headers = {"Authorization": f"Bearer {token}"} if token else None
+            start = time.perf_counter()
+            session = self.session if method in IDEMPOTENT_METHODS else self.write_session
+            r = session.request(method, url=url, timeout=self.timeout, headers=headers, **kwargs)
+            METRICS.record_request(endpoint, r.status_code, time.perf_counter() - start)
+            # urllib3 retries inside the adapter, the retry history is all that is left of them.
+            if r.raw.retries:
+                METRICS.record_retry(endpoint, len(r.raw.retries.history))
+                for retry in r.raw.retries.history:
+                    METRICS.record_status(endpoint, retry.status)
+
+            # Expired or revoked token: one refresh for all callers, then send it again.
+            if r.status_code != 401 or not self.tokens or attempt:
+                return r
+            METRICS.record_retry(endpoint)
+            self.tokens.refresh(stale_token=token)
+        return r
+
+    def close(self):
+        self.session.close()
+        self.write_session.close()
@@ -0,0 +1,127 @@
+import itertools
+import os
+from dataclasses import fields
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Field annotations of the dataclasses -> Arrow types.
+ARROW_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    list: pa.list_(pa.string()),
+}
+# String columns (and string lists) with fewer distinct values than this share of their
+# values are dictionary encoded: labels, years' worth of genres, repeated artist IDs.
+DICTIONARY_RATIO = 0.5
+BATCH_ROWS = 65536
+EXTENSIONS = {"arrow": "arrow", "parquet": "parquet"}
+
+
+def arrow_schema(row) -> pa.Schema:
+    return pa.schema([(field.name, ARROW_TYPES[field.type]) for field in fields(row)])
+
+
+def record_batches(rows, schema):
+    """
+    Converts the rows BATCH_ROWS at a time, so at most one batch of them is held as a Python
+    list on top of the Arrow data. The table itself is still built in full (rows_to_table),
+    the dictionaries are chosen per column over all rows.
+    """
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH_ROWS)):
+        yield pa.RecordBatch.from_pydict(
+            {name: [getattr(row, name) for row in batch] for name in schema.names},
+            schema=schema,
+        )
+
+
+def dictionary_encode(column: pa.Array) -> pa.Array:
+    if pa.types.is_string(column.type):
+        values = column
+    elif pa.types.is_list(column.type) and pa.types.is_string(column.type.value_type):
+        values = column.values
+    else:
+        return column
+    if not len(values) or len(values.unique()) / len(values) >= DICTIONARY_RATIO:
+        return column
+
+    if pa.types.is_string(column.type):
+        return column.dictionary_encode()
+    return pa.ListArray.from_arrays(
+        column.offsets, values.dictionary_encode(), mask=column.is_null()
+    )
+
+
+def rows_to_table(rows) -> pa.Table | None:
+    """
+    The whole table in memory, combined into one chunk per column for dictionary_encode.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return None
+
+    schema = arrow_schema(first)
+    table = pa.Table.from_batches(
+        record_batches(itertools.chain([first], rows), schema), schema=schema
+    ).combine_chunks()
+    # One chunk per column, so every column gets exactly one dictionary.
+    columns = [dictionary_encode(column.chunk(0)) for column in table.columns]
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def write_arrow(rows, file_name) -> int:
+    """
+    Arrow IPC file, uncompressed so read_table can memory map it without copying.
+    """
+    table = rows_to_table(rows)
+    if table is None:
+        return 0
+    with pa.OSFile(file_name, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return table.num_rows
+
+
+def write_parquet(rows, file_name) -> int:
+    """
+    zstd compressed Parquet, the smaller file for sharing; dictionary columns stay
+    dictionary encoded in the file and are restored as such.
+    """
+    table = rows_to_table(rows)
+    if table is None:
+        return 0
+    pq.write_table(table, file_name, compression="zstd")
+    return table.num_rows
+
+
+def read_table(file_name, memory_map=True) -> pa.Table:
+    if file_name.endswith(".parquet"):
+        return pq.read_table(file_name, memory_map=memory_map)
+    source = pa.memory_map(file_name) if memory_map else pa.OSFile(file_name)
+    return pa.ipc.open_file(source).read_all()
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    """
+    Arrow backed columns: the frame keeps pointing into the (mapped) Arrow buffers instead of
+    turning every string and list into a Python object.
+    """
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def load_master_frames(folder_path, file_format="arrow", memory_map=True) -> dict:
+    """
+    key: table name (rs_master_data, tracks, albums, artists), value: DataFrame.
+    Tables without a file (nothing was exported) are left out.
+    """
+    frames = dict()
+    for name in ("rs_master_data", "tracks", "albums", "artists"):
+        file_name = os.path.join(folder_path, f"{name}.{EXTENSIONS[file_format]}")
+        if os.path.exists(file_name):
+            frames[name] = to_pandas(read_table(file_name, memory_map=memory_map))
+    return frames
@@ -0,0 +1,85 @@
+import csv
+import gzip
+import itertools
+
+import orjson
+
+JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS
+
+
+def peek(rows):
+    """
+    Returns (first row, iterator over every row) so generators can be inspected without being consumed.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return (None, iter(()))
+    return (first, itertools.chain([first], rows))
+
+
+def open_output(file_name, mode="w"):
+    if file_name.endswith(".gz"):
+        return gzip.open(file_name, f"{mode}t", encoding="utf-8", newline="")
+    return open(file_name, mode, encoding="utf-8", newline="")
+
+
+def stream_csv(rows, file_name) -> int:
+    first, rows = peek(rows)
+    if first is None:
+        return 0
+
+    count = 0
+    with open_output(file_name) as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=first.get_field_names())
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row.write_to_csv())
+            count += 1
+    return count
+
+
+def stream_sql(rows, file_name, table) -> int:
+    first, rows = peek(rows)
+    if first is None:
+        return 0
+
+    count = 0
+    with open_output(file_name) as sqlFile:
+        sqlFile.write(f"INSERT INTO {table} ({', '.join(first.get_field_names())}) VALUES")
+        for row in rows:
+            # The separator goes in front of each row, so the total count is never needed.
+            sqlFile.write("\n" if count == 0 else ",\n")
+            sqlFile.write(row.write_as_sql())
+            count += 1
+        sqlFile.write(";")
+    return count
+
+
+def stream_json(rows, file_name) -> int:
+    """
+    JSON array written one row at a time. orjson serializes the dataclasses natively,
+    no intermediate dicts are built.
+    """
+    count = 0
+    with open(file_name, "wb") as jsonFile:
+        jsonFile.write(b"[")
+        for row in rows:
+            jsonFile.write(b"\n" if count == 0 else b",\n")
+            jsonFile.write(orjson.dumps(row, option=JSON_OPTIONS))
+            count += 1
+        jsonFile.write(b"\n]" if count else b"]")
+    return count
+
+
+def stream_jsonl(rows, file_name) -> int:
+    """
+    JSON Lines, gzip compressed when the file name ends with ".gz".
+    """
+    opener = gzip.open if file_name.endswith(".gz") else open
+    count = 0
+    with opener(file_name, "wb") as jsonlFile:
+        for row in rows:
+            jsonlFile.write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
+            count += 1
+    return count
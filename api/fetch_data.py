@@ -1,68 +1,235 @@
+import argparse
+import asyncio
 import json
 import os
 import pathlib
+from collections import Counter
 from datetime import datetime
 
-from authenticator import Authenticator
+from async_client import AsyncSpotifyClient
+from cache import CACHE_MODES, ResponseCache
+from client import SpotifyClient
+from incremental import IncrementalJournal
+from journal import EnrichmentJournal
+from metrics import METRICS, log
+from pipeline import BatchPipeline
 from processors import RollingStonesItem, RollingStonesMasterData, SearchResults
+from recommender import Recommender
+from related_artists import RelatedArtistsCrawler, save_related_artists
+from token_manager import TokenManager
+from validation import MatchValidator
 
 
-def spotfiy_search_results(rolling_stones_scraped_data):
-    # Authenticate
-    authenticator = Authenticator("SPOTIFY")
-    if authenticator.isTokenExpired():
-        authenticator.refreshToken()
+def create_rs_item(record) -> RollingStonesItem:
+    return RollingStonesItem(
+        raw_artist=record["artist"],
+        description=record["description"],
+        rs_rank=record["rank"],
+        released_year=record["released_year"],
+        raw_title=record["title"],
+        data_type=record["type"],
+        writers=record["writers"],
+    )
+
+
+def add_to_search_results(search_results, rs_item):
+    track_id, album_id, artists = rs_item.track_id, rs_item.album_id, rs_item.artist_ids
+
+    # Adding Track ID
+    if track_id:
+        search_results.tracks[track_id] = rs_item.rs_rank
+
+    # Nothing found for this item, nothing to store.
+    if not album_id:
+        log(f"No match stored for #{rs_item.rs_rank} - {rs_item.raw_title}")
+        return
+
+    # Adding Album ID and storing Rank if applicable.
+    if album_id not in search_results.albums.keys():
+        search_results.albums[album_id] = 0
+        # search_results.albums[album_id] = ""
+    else:
+        search_results.albums[album_id] = rs_item.rs_rank
+        log(f"{album_id} updated with: {rs_item.rs_rank} Rolling Stones rank.")
+
+    # Storing Artist ID and capturing respective Album IDs.
+    for artist in artists:
+        if artist not in search_results.artists.keys():
+            search_results.artists[artist] = [album_id]
+        else:
+            search_results.artists[artist].append(album_id)
+            log(f"New album {album_id} added for artist: {artist}")
+
 
+def spotfiy_search_results(rolling_stones_scraped_data, client, journal=None):
     # Main Variables
-    headers = authenticator.getHeaders()
     rolling_stones_data = RollingStonesMasterData()
-    search_results = SearchResults(headers=headers)
+    search_results = SearchResults(client=client, journal=journal)
     counter = 0
 
     # Looping trough the Rolling Stones dataset...
     while counter < len(rolling_stones_scraped_data):
-        rs_item = RollingStonesItem(
-            raw_artist=rolling_stones_scraped_data[counter]["artist"],
-            description=rolling_stones_scraped_data[counter]["description"],
-            rs_rank=rolling_stones_scraped_data[counter]["rank"],
-            released_year=rolling_stones_scraped_data[counter]["released_year"],
-            raw_title=rolling_stones_scraped_data[counter]["title"],
-            data_type=rolling_stones_scraped_data[counter]["type"],
-            writers=rolling_stones_scraped_data[counter]["writers"],
-        )
-
-        track_id, album_id, artists = rs_item.get_search_results(headers=headers)
+        rs_item = create_rs_item(rolling_stones_scraped_data[counter])
+        # Skip the search when a previous run already journaled it.
+        if not (journal and journal.restore_item(rs_item)):
+            rs_item.get_search_results(client=client)
+            if journal:
+                journal.record_item(rs_item)
 
         rolling_stones_data.rs_master_data.append(rs_item)
+        add_to_search_results(search_results=search_results, rs_item=rs_item)
 
-        # Adding Track ID
-        if track_id:
-            search_results.tracks[track_id] = rs_item.rs_rank
+        counter += 1
 
-        # Adding Album ID and storing Rank if applicable.
-        if album_id not in search_results.albums.keys():
-            search_results.albums[album_id] = 0
-            # search_results.albums[album_id] = ""
-        else:
-            search_results.albums[album_id] = rs_item.rs_rank
-            print(f"{album_id} updated with: {rs_item.rs_rank} Rolling Stones rank.")
+    return (rolling_stones_data, search_results)
 
-        # Storing Artist ID and capturing respective Album IDs.
-        for artist in artists:
-            if artist not in search_results.artists.keys():
-                search_results.artists[artist] = [album_id]
-            else:
-                search_results.artists[artist].append(album_id)
-                print(f"New album {album_id} added for artist: {artist}")
 
-        counter += 1
+async def spotfiy_search_results_async(
+    rolling_stones_scraped_data, client, concurrency=8, rate_limit=10.0, journal=None
+):
+    """
+    Same output as spotfiy_search_results, but the searches run concurrently.
+    Results are stored in the original order once every search finished, so album ranks stay deterministic.
+    """
+    # Main Variables
+    rolling_stones_data = RollingStonesMasterData()
+    search_results = SearchResults(client=client, journal=journal)
+    rs_items = [create_rs_item(record) for record in rolling_stones_scraped_data]
+
+    async def search(rs_item, async_client):
+        if not (journal and journal.restore_item(rs_item)):
+            await rs_item.get_search_results_async(client=async_client)
+            if journal:
+                journal.record_item(rs_item)
+
+    async with AsyncSpotifyClient.from_client(
+        client, concurrency=concurrency, rate_limit=rate_limit
+    ) as async_client:
+        await asyncio.gather(*(search(rs_item, async_client) for rs_item in rs_items))
+
+    for rs_item in rs_items:
+        rolling_stones_data.rs_master_data.append(rs_item)
+        add_to_search_results(search_results=search_results, rs_item=rs_item)
 
     return (rolling_stones_data, search_results)
 
 
-def main(root_dir_path):
+async def spotfiy_pipeline_results(
+    rolling_stones_scraped_data, client, concurrency=8, rate_limit=10.0, journal=None
+):
+    """
+    Search and batch stages as one streaming pipeline, returns the fully enriched master data.
+    Ranks and artist albums are only known once every search finished, so the batch
+    responses are parsed at the end.
+    """
+    rolling_stones_data = RollingStonesMasterData()
+    search_results = SearchResults(client=client)
+    rs_items = [create_rs_item(record) for record in rolling_stones_scraped_data]
+
+    async with AsyncSpotifyClient.from_client(
+        client, concurrency=concurrency, rate_limit=rate_limit
+    ) as async_client:
+        responses = await BatchPipeline(client=async_client, journal=journal).run(
+            rs_items=rs_items
+        )
+
+    for rs_item in rs_items:
+        rolling_stones_data.rs_master_data.append(rs_item)
+        add_to_search_results(search_results=search_results, rs_item=rs_item)
+
+    rolling_stones_data.tracks = search_results.parse_batch_items(
+        "tracks", responses["tracks"]
+    )
+    rolling_stones_data.albums = search_results.parse_batch_items(
+        "albums", responses["albums"]
+    )
+    rolling_stones_data.artists = search_results.parse_batch_items(
+        "artists", responses["artists"]
+    )
+
+    return rolling_stones_data
+
+
+async def crawl_related_artists(
+    rolling_stones_master, client, max_depth, max_artists=None, concurrency=8, rate_limit=10.0
+):
+    """
+    BFS over the related artists of every matched artist, returns (graph, Artists rows).
+    """
+    async with AsyncSpotifyClient.from_client(
+        client, concurrency=concurrency, rate_limit=rate_limit
+    ) as async_client:
+        crawler = RelatedArtistsCrawler(
+            client=async_client, max_depth=max_depth, max_artists=max_artists
+        )
+        graph = await crawler.crawl(
+            seed_ids=[artist.artist_id for artist in rolling_stones_master.artists]
+        )
+
+    albums_by_artist = {
+        artist.artist_id: artist.albums for artist in rolling_stones_master.artists
+    }
+    return (graph, crawler.artists(albums_by_artist))
+
+
+async def validate_matches(
+    rolling_stones_master, client, concurrency=8, rate_limit=10.0, journal=None, requery=True
+) -> list:
+    """
+    Flags doubtful matches and searches only those again, returns the items that changed.
+    """
+    validator = MatchValidator()
+    rs_items = list(rolling_stones_master.rs_master_data)
+    flagged = validator.validate(rs_items)
+    # Items re-queried by an earlier run keep their flags but are not searched again.
+    if not (validator.pending(flagged, journal) and requery):
+        return []
+
+    async with AsyncSpotifyClient.from_client(
+        client, concurrency=concurrency, rate_limit=rate_limit
+    ) as async_client:
+        return await validator.requery(rs_items, flagged, async_client, journal=journal)
+
+
+def main(
+    root_dir_path,
+    mode="sync",
+    concurrency=8,
+    rate_limit=10.0,
+    cache_mode="refresh-stale",
+    resume=False,
+    incremental=False,
+    max_age_days=7,
+    dsn=None,
+    load_mode="upsert",
+    quiet=False,
+    recommender=False,
+    related_depth=0,
+    max_related_artists=None,
+    requery=True,
+    columnar=None,
+):
+    METRICS.quiet = quiet
     # Admin
     data_folder_path = os.path.join(root_dir_path, "data")
+    cache = ResponseCache(
+        db_path=os.path.join(data_folder_path, "spotify_cache.sqlite"), mode=cache_mode
+    )
+    # The cached token is reused while it is valid, refreshed ahead of expiry and after a 401.
+    tokens = TokenManager.from_env(
+        cache_path=os.path.join(data_folder_path, "spotify_token.json")
+    )
+    client = SpotifyClient(tokens=tokens, cache=cache)
+    journal_path = os.path.join(data_folder_path, "enrichment_journal.jsonl")
+    if incremental:
+        journal = IncrementalJournal(
+            path=journal_path,
+            state_path=os.path.join(data_folder_path, "enrichment_state.json"),
+            max_age_days=max_age_days,
+            resume=resume,
+        )
+    else:
+        journal = EnrichmentJournal(path=journal_path, resume=resume)
     sql_folder_path = os.path.join(root_dir_path, "sql")
     rolling_stones_scraped_data_path = os.path.join(
         data_folder_path, "rolling_stones_master_data.json"
@@ -70,24 +237,212 @@ def main(root_dir_path):
     rolling_stones_scraped_data = json.load(
         open(rolling_stones_scraped_data_path, encoding="utf-8")
     )
+    if incremental:
+        journal.delta([create_rs_item(record) for record in rolling_stones_scraped_data])
+
+    if mode == "pipeline":
+        # Search and batch stages overlap, they are timed as one.
+        with METRICS.stage("search_and_batch_fetch"):
+            rolling_stones_master = asyncio.run(
+                spotfiy_pipeline_results(
+                    rolling_stones_scraped_data=rolling_stones_scraped_data,
+                    client=client,
+                    concurrency=concurrency,
+                    rate_limit=rate_limit,
+                    journal=journal,
+                )
+            )
+    elif mode == "async":
+        with METRICS.stage("search"):
+            rolling_stones_master, search_results = asyncio.run(
+                spotfiy_search_results_async(
+                    rolling_stones_scraped_data=rolling_stones_scraped_data,
+                    client=client,
+                    concurrency=concurrency,
+                    rate_limit=rate_limit,
+                    journal=journal,
+                )
+            )
+    else:
+        with METRICS.stage("search"):
+            rolling_stones_master, search_results = spotfiy_search_results(
+                rolling_stones_scraped_data=rolling_stones_scraped_data,
+                client=client,
+                journal=journal,
+            )
 
-    rolling_stones_master, search_results = spotfiy_search_results(
-        rolling_stones_scraped_data=rolling_stones_scraped_data
+    tiers = Counter(
+        rs_item.search_tier or "unmatched" for rs_item in rolling_stones_master.rs_master_data
     )
+    log(f"Searches resolved per query tier: {dict(tiers)}")
+
+    with METRICS.stage("validate"):
+        changed = asyncio.run(
+            validate_matches(
+                rolling_stones_master=rolling_stones_master,
+                client=client,
+                concurrency=concurrency,
+                rate_limit=rate_limit,
+                journal=journal,
+                requery=requery,
+            )
+        )
+    if changed:
+        # The batch stage has to see the corrected IDs. In pipeline mode the journal holds
+        # the batch items fetched so far, only the new IDs are requested.
+        search_results = SearchResults(client=client, journal=journal)
+        for rs_item in rolling_stones_master.rs_master_data:
+            add_to_search_results(search_results=search_results, rs_item=rs_item)
+
+    if mode != "pipeline" or changed:
+        with METRICS.stage("batch_fetch"):
+            rolling_stones_master.tracks = search_results.fetch_batch_tracks()
+            rolling_stones_master.albums = search_results.fetch_batch_albums()
+            rolling_stones_master.artists = search_results.fetch_batch_artists()
+
+    with METRICS.stage("export"):
+        rolling_stones_master.save_data_to_csv(csv_folder_path=data_folder_path)
+        rolling_stones_master.save_data_to_sql(sql_folder_path=sql_folder_path)
+        if columnar:
+            rolling_stones_master.save_data_to_columnar(
+                folder_path=data_folder_path, file_format=columnar
+            )
+
+    if dsn:
+        # Only needed for loading, psycopg is not imported otherwise.
+        from loader import load_master_data
+
+        with METRICS.stage("load"):
+            load_master_data(master_data=rolling_stones_master, dsn=dsn, mode=load_mode)
 
-    rolling_stones_master.tracks = search_results.fetch_batch_tracks()
-    rolling_stones_master.albums = search_results.fetch_batch_albums()
-    rolling_stones_master.artists = search_results.fetch_batch_artists()
+    if recommender:
+        with METRICS.stage("recommender"):
+            Recommender.build(rolling_stones_master).save(
+                os.path.join(data_folder_path, "recommender")
+            )
 
-    rolling_stones_master.save_data_to_csv(csv_folder_path=data_folder_path)
-    rolling_stones_master.save_data_to_sql(sql_folder_path=sql_folder_path)
+    if related_depth:
+        with METRICS.stage("related_artists"):
+            graph, related_artists = asyncio.run(
+                crawl_related_artists(
+                    rolling_stones_master=rolling_stones_master,
+                    client=client,
+                    max_depth=related_depth,
+                    max_artists=max_related_artists,
+                    concurrency=concurrency,
+                    rate_limit=rate_limit,
+                )
+            )
+            save_related_artists(
+                graph=graph,
+                artists=related_artists,
+                folder_path=os.path.join(data_folder_path, "related_artists"),
+            )
+        log(f"Related artists graph: {len(graph)} artists, {graph.number_of_edges} edges.")
+
+    log(f"Response cache hits: {cache.hits}, misses: {cache.misses}")
+    if incremental:
+        journal.save_state()
+    journal.close()
+    client.close()
+    cache.close()
+    METRICS.write(folder_path=os.path.join(data_folder_path, "metrics"), name="enrichment")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Enrich the Rolling Stones Top 500 data via the Spotify API."
+    )
+    parser.add_argument("--mode", choices=["sync", "async", "pipeline"], default="sync")
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Max parallel requests."
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=10.0, help="Max requests per second."
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        default="refresh-stale",
+        help="How the on-disk response cache is used.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Replay the journal of an interrupted run and only send the outstanding requests.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only search new or changed records and refresh stale batch items.",
+    )
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=7,
+        help="Age after which popularity and metadata are fetched again in incremental mode.",
+    )
+    parser.add_argument(
+        "--dsn",
+        help="Postgres connection string, loads the tables via the staging schema when given.",
+    )
+    parser.add_argument("--load-mode", choices=["upsert", "replace"], default="upsert")
+    parser.add_argument(
+        "--columnar",
+        choices=["arrow", "parquet"],
+        help="Also export the tables as Arrow IPC (memory mapped loading) or Parquet files.",
+    )
+    parser.add_argument(
+        "--recommender",
+        action="store_true",
+        help="Build the artist/track similarity index in data/recommender.",
+    )
+    parser.add_argument(
+        "--no-requery",
+        dest="requery",
+        action="store_false",
+        help="Only flag doubtful matches (match_confidence, match_flags), don't search them again.",
+    )
+    parser.add_argument(
+        "--related-depth",
+        type=int,
+        default=0,
+        help="Crawl the related artists graph this many hops from the matched artists "
+        "into data/related_artists.",
+    )
+    parser.add_argument(
+        "--max-related-artists",
+        type=int,
+        help="Stop adding artists to the related artists graph after this many.",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="No per item output, the run report in data/metrics still has every count.",
+    )
+    args = parser.parse_args()
+
     start = datetime.now()
     root_dir_path = pathlib.Path(__file__).parent.parent.resolve()
 
-    main(root_dir_path=root_dir_path)
+    main(
+        root_dir_path=root_dir_path,
+        mode=args.mode,
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        cache_mode=args.cache_mode,
+        resume=args.resume,
+        incremental=args.incremental,
+        max_age_days=args.max_age_days,
+        dsn=args.dsn,
+        load_mode=args.load_mode,
+        quiet=args.quiet,
+        recommender=args.recommender,
+        related_depth=args.related_depth,
+        max_related_artists=args.max_related_artists,
+        requery=args.requery,
+        columnar=args.columnar,
+    )
 
     finished = datetime.now()
-    print(f"Script finished in: {finished - start}")
+    log(f"Script finished in: {finished - start}")
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import time
+
+from journal import EnrichmentJournal
+from metrics import log
+
+DAY = 24 * 60 * 60
+
+
+def record_hash(rs_item) -> str:
+    """
+    Content hash of the scraped fields a search depends on.
+    """
+    content = json.dumps(
+        [rs_item.raw_artist, rs_item.raw_title, rs_item.data_type, rs_item.released_year]
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class IncrementalJournal(EnrichmentJournal):
+    """
+    Journal that also remembers previous runs. Search results are stored per record content hash,
+    batch items with the time they were fetched. Unchanged records skip the search and only
+    entities older than "max_age_days" are fetched again.
+    """
+
+    def __init__(self, path, state_path, max_age_days=7, resume=False):
+        super().__init__(path=path, resume=resume)
+        self.state_path = state_path
+        self.max_age = max_age_days * DAY
+        self.seen_hashes = set()
+        self.reused_searches = 0
+        self.reused_entities = 0
+
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as state_file:
+                self.state = json.load(state_file)
+        else:
+            self.state = {"records": dict(), "ranks": dict(), "entities": dict()}
+        # Content hashes of the records the validator already searched again. A changed
+        # record gets a new hash, so only the delta is re-queried on the next run.
+        self.requeried_hashes = set(self.state.get("requeried", []))
+
+    def delta(self, rs_items) -> dict:
+        """
+        Compares the current records against the previous run, keyed by type and rank.
+        """
+        current = {f"{i.data_type}:{i.rs_rank}": record_hash(i) for i in rs_items}
+        previous = self.state["ranks"]
+        delta = {
+            "new": [key for key in current if key not in previous],
+            "changed": [
+                key for key in current if key in previous and previous[key] != current[key]
+            ],
+            "removed": [key for key in previous if key not in current],
+        }
+        delta["unchanged"] = len(current) - len(delta["new"]) - len(delta["changed"])
+        self.state["ranks"] = current
+        log(
+            f"Records: {delta['unchanged']} unchanged, {len(delta['new'])} new, "
+            f"{len(delta['changed'])} changed, {len(delta['removed'])} removed."
+        )
+        return delta
+
+    def restore_item(self, rs_item) -> bool:
+        item_hash = record_hash(rs_item)
+        self.seen_hashes.add(item_hash)
+        if super().restore_item(rs_item):
+            self.record_state(rs_item)
+            return True
+
+        resolved = self.state["records"].get(item_hash)
+        if resolved is None:
+            return False
+
+        rs_item.set_search_results(
+            resolved["track_id"],
+            resolved["album_id"],
+            resolved["artist_ids"],
+            resolved.get("search_tier", ""),
+            resolved.get("match_score", 0.0),
+            resolved.get("spotify_year", 0),
+        )
+        self.reused_searches += 1
+        return True
+
+    def record_item(self, rs_item):
+        super().record_item(rs_item)
+        self.record_state(rs_item)
+
+    def record_state(self, rs_item):
+        if rs_item.album_id:
+            self.state["records"][record_hash(rs_item)] = {
+                "track_id": rs_item.track_id,
+                "album_id": rs_item.album_id,
+                "artist_ids": rs_item.artist_ids,
+                "search_tier": rs_item.search_tier,
+                "match_score": rs_item.match_score,
+                "spotify_year": rs_item.spotify_year,
+            }
+
+    def was_requeried(self, rs_item) -> bool:
+        return super().was_requeried(rs_item) or record_hash(rs_item) in self.requeried_hashes
+
+    def record_requery(self, rs_item):
+        super().record_requery(rs_item)
+        self.requeried_hashes.add(record_hash(rs_item))
+
+    def fetched_item(self, endpoint, spotify_id) -> dict | None:
+        item = super().fetched_item(endpoint, spotify_id)
+        if item:
+            return item
+
+        entity = self.state["entities"].get(endpoint, dict()).get(spotify_id)
+        if entity and time.time() - entity["fetched_at"] <= self.max_age:
+            self.reused_entities += 1
+            return entity["item"]
+        return None
+
+    def record_batch(self, endpoint, items):
+        super().record_batch(endpoint, items)
+        now = time.time()
+        entities = self.state["entities"].setdefault(endpoint, dict())
+        for item in items:
+            if item:
+                entities[item["id"]] = {"fetched_at": now, "item": item}
+
+    def save_state(self):
+        # Forget search results of records that are no longer in the scraped data.
+        self.state["records"] = {
+            item_hash: resolved
+            for item_hash, resolved in self.state["records"].items()
+            if item_hash in self.seen_hashes
+        }
+        self.state["requeried"] = sorted(self.requeried_hashes & self.seen_hashes)
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as state_file:
+            json.dump(self.state, state_file)
+        os.replace(temp_path, self.state_path)
+        log(
+            f"Reused {self.reused_searches} searches and {self.reused_entities} batch items from previous runs."
+        )
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+
+class IndexedTable(list):
+    """
+    List of entity records that keeps its indexes in sync as rows are added or removed.
+    "key" names the attribute of the unique ID index, "groups" maps an index name to a
+    function returning the keys a row is grouped under (e.g. every artist of an album).
+    """
+
+    def __init__(self, rows=(), key=None, groups=None):
+        super().__init__()
+        self.key = key
+        self.group_keys = groups or dict()
+        self.by_key = dict()
+        self.groups = {name: defaultdict(list) for name in self.group_keys}
+        self.extend(rows)
+
+    def index_row(self, row):
+        if self.key:
+            self.by_key[getattr(row, self.key)] = row
+        for name, group_keys in self.group_keys.items():
+            for group_key in group_keys(row):
+                self.groups[name][group_key].append(row)
+
+    def unindex_row(self, row):
+        if self.key and self.by_key.get(getattr(row, self.key)) is row:
+            del self.by_key[getattr(row, self.key)]
+        for name, group_keys in self.group_keys.items():
+            for group_key in group_keys(row):
+                group = self.groups[name].get(group_key, [])
+                for i, grouped_row in enumerate(group):
+                    if grouped_row is row:
+                        del group[i]
+                        break
+                if not group:
+                    self.groups[name].pop(group_key, None)
+
+    def get(self, key, default=None):
+        return self.by_key.get(key, default)
+
+    def group(self, name, group_key) -> list:
+        return self.groups[name].get(group_key, [])
+
+    def __contains__(self, item):
+        if self.key and isinstance(item, str):
+            return item in self.by_key
+        return super().__contains__(item)
+
+    # Every list method that adds or removes rows goes through the indexes.
+    def append(self, row):
+        super().append(row)
+        self.index_row(row)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __iadd__(self, rows):
+        self.extend(rows)
+        return self
+
+    def insert(self, i, row):
+        super().insert(i, row)
+        self.index_row(row)
+
+    def pop(self, i=-1):
+        row = super().pop(i)
+        self.unindex_row(row)
+        return row
+
+    def remove(self, row):
+        # "row" may also be an ID string, pop unindexes the stored row.
+        self.pop(self.index(row))
+
+    def clear(self):
+        super().clear()
+        self.by_key.clear()
+        for group in self.groups.values():
+            group.clear()
+
+    def __setitem__(self, i, value):
+        if isinstance(i, slice):
+            removed, value = self[i], list(value)
+            added = value
+        else:
+            removed, added = [self[i]], [value]
+        for row in removed:
+            self.unindex_row(row)
+        super().__setitem__(i, value)
+        for row in added:
+            self.index_row(row)
+
+    def __delitem__(self, i):
+        removed = self[i] if isinstance(i, slice) else [self[i]]
+        super().__delitem__(i)
+        for row in removed:
+            self.unindex_row(row)
@@ -0,0 +1,116 @@
+import json
+import os
+
+from metrics import log
+
+
+class EnrichmentJournal:
+    """
+    Append-only JSONL journal of the enrichment run. Every resolved search and every completed
+    batch response is written (and fsynced) as soon as it finishes, so a resumed run only
+    sends the requests that were still outstanding when the previous one died.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.items = dict()  # key: (data_type, rs_rank), value: journal record
+        self.batches = dict()  # key: endpoint, value: dict(id: raw api item)
+        self.requeried = set()  # (data_type, rs_rank) of flagged items already searched again
+
+        if resume and os.path.exists(path):
+            self.replay()
+            log(
+                f"Resuming from {path}: {len(self.items)} searches, "
+                f"{sum(len(items) for items in self.batches.values())} batch items done."
+            )
+            self.file = open(path, "a", encoding="utf-8")
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def replay(self):
+        complete_bytes = 0
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise json.JSONDecodeError("Torn line", line.decode(), 0)
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # The last line is cut short when the previous run died mid-write.
+                    break
+                complete_bytes += len(line)
+
+                if record["kind"] == "item":
+                    self.items[(record["type"], record["rank"])] = record
+                elif record["kind"] == "requery":
+                    self.requeried.add((record["type"], record["rank"]))
+                elif record["kind"] == "batch":
+                    endpoint_items = self.batches.setdefault(record["endpoint"], dict())
+                    for item in record["items"]:
+                        endpoint_items[item["id"]] = item
+
+        # Drop the torn line, new records must not be appended onto it.
+        os.truncate(self.path, complete_bytes)
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def restore_item(self, rs_item) -> bool:
+        """
+        Copies the journaled search result onto the item, False if it still has to be searched.
+        """
+        record = self.items.get((rs_item.data_type, rs_item.rs_rank))
+        if record is None:
+            return False
+
+        rs_item.set_search_results(
+            record["track_id"],
+            record["album_id"],
+            record["artist_ids"],
+            record.get("search_tier", ""),
+            record.get("match_score", 0.0),
+            record.get("spotify_year", 0),
+        )
+        return True
+
+    def record_item(self, rs_item):
+        # Failed searches are not journaled, they are retried on resume.
+        if not rs_item.album_id:
+            return
+
+        record = {
+            "kind": "item",
+            "rank": rs_item.rs_rank,
+            "type": rs_item.data_type,
+            "track_id": rs_item.track_id,
+            "album_id": rs_item.album_id,
+            "artist_ids": rs_item.artist_ids,
+            "search_tier": rs_item.search_tier,
+            "match_score": rs_item.match_score,
+            "spotify_year": rs_item.spotify_year,
+        }
+        self.items[(rs_item.data_type, rs_item.rs_rank)] = record
+        self.write(record)
+
+    def was_requeried(self, rs_item) -> bool:
+        return (rs_item.data_type, rs_item.rs_rank) in self.requeried
+
+    def record_requery(self, rs_item):
+        # Written whether the match changed or not, the same search would give the same answer.
+        self.requeried.add((rs_item.data_type, rs_item.rs_rank))
+        self.write({"kind": "requery", "rank": rs_item.rs_rank, "type": rs_item.data_type})
+
+    def record_batch(self, endpoint, items):
+        items = [item for item in items if item]
+        endpoint_items = self.batches.setdefault(endpoint, dict())
+        for item in items:
+            endpoint_items[item["id"]] = item
+        self.write({"kind": "batch", "endpoint": endpoint, "items": items})
+
+    def fetched_item(self, endpoint, spotify_id) -> dict | None:
+        return self.batches.get(endpoint, dict()).get(spotify_id)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,113 @@
+import itertools
+from dataclasses import fields
+
+import psycopg
+from metrics import log
+from psycopg import sql
+
+# Primary keys of the rstop500 tables, rs_master_data has none and is always replaced.
+PRIMARY_KEYS = {
+    "albums": "album_id",
+    "tracks": "track_id",
+    "artists": "artist_id",
+    "rs_master_data": None,
+}
+# tracks.album_id references albums, so albums are loaded first and deleted last.
+LOAD_ORDER = ("albums", "tracks", "artists", "rs_master_data")
+
+
+def copy_to_staging(cursor, table, rows, staging_schema):
+    """
+    Streams the dataclass rows into the staging table with COPY ... FROM STDIN.
+    psycopg does the text and array escaping, so apostrophes and commas in names survive.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return (0, [])
+
+    columns = first.get_field_names()
+    copy_statement = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(staging_schema, table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+    )
+    count = 0
+    with cursor.copy(copy_statement) as copy:
+        for row in itertools.chain([first], rows):
+            copy.write_row(tuple(getattr(row, column) for column in columns))
+            count += 1
+    return (count, columns)
+
+
+def merge_from_staging(cursor, table, columns, staging_schema, target_schema):
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    insert = sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+        sql.Identifier(target_schema, table),
+        column_list,
+        column_list,
+        sql.Identifier(staging_schema, table),
+    )
+
+    primary_key = PRIMARY_KEYS[table]
+    if primary_key is None:
+        cursor.execute(insert)
+        return
+
+    updates = sql.SQL(", ").join(
+        sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(c), sql.Identifier(c))
+        for c in columns
+        if c != primary_key
+    )
+    cursor.execute(
+        sql.SQL("{} ON CONFLICT ({}) DO UPDATE SET {}").format(
+            insert, sql.Identifier(primary_key), updates
+        )
+    )
+
+
+def load_master_data(
+    master_data, dsn, mode="upsert", staging_schema="stageing", target_schema="rstop500"
+):
+    """
+    Loads every RollingStonesMasterData table into the staging schema with COPY, then
+    upserts (or replaces, mode="replace") the target tables. All of it runs in one transaction,
+    readers of the target schema never see a half loaded state.
+    """
+    tables = {field.name: getattr(master_data, field.name) for field in fields(master_data)}
+
+    with psycopg.connect(dsn) as connection:
+        with connection.transaction(), connection.cursor() as cursor:
+            cursor.execute(
+                sql.SQL("TRUNCATE {}").format(
+                    sql.SQL(", ").join(
+                        sql.Identifier(staging_schema, table) for table in LOAD_ORDER
+                    )
+                )
+            )
+
+            columns = dict()
+            for table in LOAD_ORDER:
+                count, table_columns = copy_to_staging(
+                    cursor, table, tables[table], staging_schema
+                )
+                if count:
+                    columns[table] = table_columns
+                log(f"Copied {count} rows into {staging_schema}.{table}")
+
+            # Delete in reverse order, tracks reference albums.
+            for table in reversed(LOAD_ORDER):
+                if table in columns and (
+                    mode == "replace" or PRIMARY_KEYS[table] is None
+                ):
+                    cursor.execute(
+                        sql.SQL("DELETE FROM {}").format(
+                            sql.Identifier(target_schema, table)
+                        )
+                    )
+
+            for table in LOAD_ORDER:
+                if table in columns:
+                    merge_from_staging(
+                        cursor, table, columns[table], staging_schema, target_schema
+                    )
+                    log(f"Loaded {target_schema}.{table}")
@@ -0,0 +1,171 @@
+import difflib
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+# Trailing "(Remastered 2011)", "[Deluxe Edition]", " - 2009 Remaster" style decorations.
+SUFFIX_KEYWORDS = r"remaster(?:ed)?|deluxe|expanded|anniversary|edition|mono|stereo|version|bonus"
+SUFFIX_PATTERN = re.compile(
+    rf"\s*(?:[\(\[][^\(\)\[\]]*\b(?:{SUFFIX_KEYWORDS})\b[^\(\)\[\]]*[\)\]]|[-–]\s[^-–]*\b(?:{SUFFIX_KEYWORDS})\b.*)$",
+    re.IGNORECASE,
+)
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]+")
+
+
+@lru_cache(maxsize=65536)
+def normalize(text: str) -> str:
+    """
+    Casefolds, strips accents, punctuation and "Remastered"/"Deluxe" style suffixes.
+    Memoized, the same names come back in many search responses.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    while True:
+        stripped = SUFFIX_PATTERN.sub("", text)
+        if stripped == text:
+            break
+        text = stripped
+    text = PUNCTUATION_PATTERN.sub(" ", text.replace("’", "").replace("'", ""))
+    return " ".join(text.casefold().split())
+
+
+def levenshtein_distance(a: str, b: str) -> int:
+    """
+    Bit-parallel edit distance (Myers/Hyyrö). Python ints are used as bit vectors,
+    so there is no limit on the string length.
+    """
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+
+    peq = dict()
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def levenshtein_ratio(a: str, b: str) -> float:
+    if not a and not b:
+        return 1.0
+    return 1 - levenshtein_distance(a, b) / max(len(a), len(b))
+
+
+def levenshtein_scorer(query: str, candidates: list) -> list:
+    query = normalize(query)
+    return [levenshtein_ratio(query, normalize(candidate)) for candidate in candidates]
+
+
+def token_set_ratio(a: str, b: str) -> float:
+    """
+    Compares the shared tokens against each side's leftovers, word order and extra words don't hurt.
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    shared = " ".join(sorted(tokens_a & tokens_b))
+    only_a = " ".join(sorted(tokens_a - tokens_b))
+    only_b = " ".join(sorted(tokens_b - tokens_a))
+    combined_a = f"{shared} {only_a}".strip()
+    combined_b = f"{shared} {only_b}".strip()
+
+    if shared and (not only_a or not only_b):
+        return 1.0
+    return max(
+        levenshtein_ratio(shared, combined_a) if shared else 0.0,
+        levenshtein_ratio(shared, combined_b) if shared else 0.0,
+        levenshtein_ratio(combined_a, combined_b),
+    )
+
+
+def token_set_scorer(query: str, candidates: list) -> list:
+    query = normalize(query)
+    return [token_set_ratio(query, normalize(candidate)) for candidate in candidates]
+
+
+class NgramCosineScorer:
+    """
+    Character n-grams hashed into a fixed number of buckets, every candidate is scored
+    against the query with one NumPy matrix-vector product.
+    """
+
+    def __init__(self, n=3, dimensions=4096):
+        self.n = n
+        self.dimensions = dimensions
+
+    @lru_cache(maxsize=65536)
+    def ngram_buckets(self, text: str) -> tuple:
+        padded = f" {normalize(text)} "
+        grams = (padded[i : i + self.n] for i in range(max(len(padded) - self.n + 1, 1)))
+        return tuple(zlib.crc32(gram.encode()) % self.dimensions for gram in grams)
+
+    def vectorize(self, texts: list) -> np.ndarray:
+        buckets = [self.ngram_buckets(text) for text in texts]
+        rows = np.repeat(np.arange(len(texts)), [len(b) for b in buckets])
+        columns = np.fromiter((c for b in buckets for c in b), dtype=np.int64)
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(matrix, (rows, columns), 1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def __call__(self, query: str, candidates: list) -> list:
+        if not candidates:
+            return []
+        vectors = self.vectorize([query, *candidates])
+        return (vectors[1:] @ vectors[0]).tolist()
+
+
+def ndiff_scorer(query: str, candidates: list) -> list:
+    """
+    The original difflib.ndiff based similarity, kept as the baseline for the benchmark.
+    """
+
+    def compute_similarity(input_string, reference_string):
+        if not input_string:
+            return 0.0
+        diff = difflib.ndiff(input_string, reference_string)
+        diff_count = sum(1 for line in diff if line.startswith("-"))
+        return 1 - (diff_count / len(input_string))
+
+    return [
+        compute_similarity(candidate.lower(), query.lower()) for candidate in candidates
+    ]
+
+
+SCORERS = {
+    "levenshtein": levenshtein_scorer,
+    "token_set": token_set_scorer,
+    "ngram_cosine": NgramCosineScorer(),
+    "ndiff": ndiff_scorer,
+}
+DEFAULT_SCORER = "levenshtein"
+
+
+def best_match(query: str, candidates: list, scorer=DEFAULT_SCORER) -> tuple:
+    """
+    Returns (index, score) of the best scoring candidate, (None, 0.0) for an empty list.
+    """
+    if not candidates:
+        return (None, 0.0)
+    scores = SCORERS[scorer](query, candidates)
+    best_idx = max(range(len(scores)), key=scores.__getitem__)
+    return (best_idx, scores[best_idx])
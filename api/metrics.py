@@ -0,0 +1,220 @@
+import bisect
+import contextlib
+import datetime
+import json
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+PREFIX = "rolling_stones"
+# Upper bounds in seconds, Spotify answers in 50-300ms, retries and timeouts take seconds.
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def endpoint_for(url: str) -> str:
+    """
+    "tracks" for /v1/tracks, "playlists_tracks" for /v1/playlists/{id}/tracks: the IDs in
+    nested paths are dropped, so every playlist or artist shares one endpoint name.
+    """
+    segments = [
+        segment
+        for segment in urlsplit(url).path.strip("/").split("/")
+        if segment and not re.fullmatch(r"v\d+", segment)
+    ]
+    if len(segments) > 2:
+        return f"{segments[0]}_{segments[-1]}"
+    return segments[0] if segments else ""
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        """
+        (upper bound, observations <= bound) pairs, the Prometheus bucket layout.
+        """
+        pairs, running = list(), 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+
+class Metrics:
+    """
+    Run metrics: wall time per stage, requests per endpoint and status with their latency,
+    retries and response cache hits. Written at the end of a run as a JSON report and as a
+    Prometheus textfile (for the node_exporter textfile collector).
+    """
+
+    def __init__(self):
+        self.quiet = False
+        self.started_at = time.time()
+        self.stages = dict()
+        self.requests = Counter()  # key: (endpoint, status)
+        self.latency = defaultdict(Histogram)
+        self.retries = Counter()
+        self.cache = defaultdict(Counter)  # key: endpoint, value: Counter(hit=, miss=)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def record_status(self, endpoint, status):
+        # status None: the request never got a response (connection error, timeout).
+        self.requests[(endpoint, str(status) if status else "error")] += 1
+
+    def record_request(self, endpoint, status, seconds):
+        self.record_status(endpoint, status)
+        self.latency[endpoint].observe(seconds)
+
+    def record_retry(self, endpoint, retries=1):
+        if retries:
+            self.retries[endpoint] += retries
+
+    def record_cache(self, endpoint, hit: bool):
+        self.cache[endpoint]["hit" if hit else "miss"] += 1
+
+    def report(self) -> dict:
+        endpoints = sorted(
+            {endpoint for endpoint, _ in self.requests} | set(self.retries) | set(self.cache)
+        )
+        report = {
+            "started_at": datetime.datetime.fromtimestamp(
+                self.started_at, datetime.timezone.utc
+            ).isoformat(),
+            "duration_seconds": round(time.time() - self.started_at, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "endpoints": dict(),
+        }
+        for endpoint in endpoints:
+            histogram = self.latency.get(endpoint) or Histogram()
+            cache = self.cache.get(endpoint, Counter())
+            lookups = cache["hit"] + cache["miss"]
+            report["endpoints"][endpoint] = {
+                "requests": sum(
+                    count for (name, _), count in self.requests.items() if name == endpoint
+                ),
+                "statuses": {
+                    status: count
+                    for (name, status), count in sorted(self.requests.items())
+                    if name == endpoint
+                },
+                "latency_seconds": {
+                    "sum": round(histogram.total, 3),
+                    "count": histogram.count,
+                    "mean": round(histogram.total / histogram.count, 4) if histogram.count else None,
+                    "buckets": {
+                        "+Inf" if bound == float("inf") else str(bound): count
+                        for bound, count in histogram.cumulative()
+                    },
+                },
+                "retries": self.retries[endpoint],
+                "cache_hits": cache["hit"],
+                "cache_misses": cache["miss"],
+                "cache_hit_rate": round(cache["hit"] / lookups, 4) if lookups else None,
+            }
+        return report
+
+    def prometheus(self) -> str:
+        lines = [
+            f"# HELP {PREFIX}_stage_seconds Wall time per stage of the last run.",
+            f"# TYPE {PREFIX}_stage_seconds gauge",
+        ]
+        lines += [
+            f'{PREFIX}_stage_seconds{{stage="{name}"}} {seconds:.6f}'
+            for name, seconds in self.stages.items()
+        ]
+
+        lines += [
+            f"# HELP {PREFIX}_requests_total Spotify API responses per endpoint and status.",
+            f"# TYPE {PREFIX}_requests_total counter",
+        ]
+        lines += [
+            f'{PREFIX}_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+            for (endpoint, status), count in sorted(self.requests.items())
+        ]
+
+        lines += [
+            f"# HELP {PREFIX}_request_latency_seconds Spotify API request latency.",
+            f"# TYPE {PREFIX}_request_latency_seconds histogram",
+        ]
+        for endpoint, histogram in sorted(self.latency.items()):
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(
+                    f'{PREFIX}_request_latency_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {count}'
+                )
+            lines.append(
+                f'{PREFIX}_request_latency_seconds_sum{{endpoint="{endpoint}"}} {histogram.total:.6f}'
+            )
+            lines.append(
+                f'{PREFIX}_request_latency_seconds_count{{endpoint="{endpoint}"}} {histogram.count}'
+            )
+
+        lines += [
+            f"# HELP {PREFIX}_retries_total Retried Spotify API requests per endpoint.",
+            f"# TYPE {PREFIX}_retries_total counter",
+        ]
+        lines += [
+            f'{PREFIX}_retries_total{{endpoint="{endpoint}"}} {count}'
+            for endpoint, count in sorted(self.retries.items())
+        ]
+
+        lines += [
+            f"# HELP {PREFIX}_cache_lookups_total Response cache lookups per endpoint and result.",
+            f"# TYPE {PREFIX}_cache_lookups_total counter",
+        ]
+        lines += [
+            f'{PREFIX}_cache_lookups_total{{endpoint="{endpoint}",result="{result}"}} {count}'
+            for endpoint, results in sorted(self.cache.items())
+            for result, count in sorted(results.items())
+        ]
+
+        lines += [
+            f"# HELP {PREFIX}_last_run_timestamp_seconds Start of the last run.",
+            f"# TYPE {PREFIX}_last_run_timestamp_seconds gauge",
+            f"{PREFIX}_last_run_timestamp_seconds {self.started_at:.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, folder_path, name):
+        """
+        Writes <name>_report.json and <name>.prom. The textfile is renamed into place,
+        the collector must never read a half written file.
+        """
+        os.makedirs(folder_path, exist_ok=True)
+        with open(os.path.join(folder_path, f"{name}_report.json"), "w") as report_file:
+            json.dump(self.report(), report_file, indent=4, sort_keys=True)
+
+        prom_path = os.path.join(folder_path, f"{name}.prom")
+        with open(f"{prom_path}.tmp", "w") as prom_file:
+            prom_file.write(self.prometheus())
+        os.replace(f"{prom_path}.tmp", prom_path)
+
+
+# One registry per process, every module records into it.
+METRICS = Metrics()
+
+
+def log(message):
+    """
+    print unless the run is quiet, the per item lines cost console I/O on every item.
+    """
+    if not METRICS.quiet:
+        print(message)
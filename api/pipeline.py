@@ -0,0 +1,84 @@
+import asyncio
+
+from metrics import log
+from processors import SearchResults
+
+
+class BatchPipeline:
+    """
+    Streams the IDs found by the search stage straight into per endpoint queues.
+    A batch request goes out as soon as a queue collects a full batch, so the tracks,
+    albums and artists lookups overlap with the remaining searches and with each other.
+    """
+
+    def __init__(self, client, journal=None):
+        self.client = client
+        self.journal = journal
+        self.queues = {endpoint: asyncio.Queue() for endpoint in SearchResults.batch_endpoints}
+        self.queued_ids = {endpoint: set() for endpoint in SearchResults.batch_endpoints}
+        self.responses = {endpoint: list() for endpoint in SearchResults.batch_endpoints}
+
+    def submit(self, endpoint, spotify_id):
+        if not spotify_id or spotify_id in self.queued_ids[endpoint]:
+            return
+        self.queued_ids[endpoint].add(spotify_id)
+
+        journaled_item = self.journal and self.journal.fetched_item(endpoint, spotify_id)
+        if journaled_item:
+            self.responses[endpoint].append(journaled_item)
+        else:
+            self.queues[endpoint].put_nowait(spotify_id)
+
+    def submit_item(self, rs_item):
+        self.submit("tracks", rs_item.track_id)
+        self.submit("albums", rs_item.album_id)
+        for artist_id in rs_item.artist_ids:
+            self.submit("artists", artist_id)
+
+    async def fetch_batch(self, endpoint, batch):
+        url_template, _ = SearchResults.batch_endpoints[endpoint]
+        log(f"Fetching {len(batch)} number of {endpoint.title()}...")
+        response = await self.client.get_json(url_template.format(",".join(batch)))
+        if response:
+            if self.journal:
+                self.journal.record_batch(endpoint, response[endpoint])
+            self.responses[endpoint].extend(response[endpoint])
+
+    async def batch_worker(self, endpoint):
+        _, max_length = SearchResults.batch_endpoints[endpoint]
+        queue = self.queues[endpoint]
+        requests = list()
+        batch = list()
+
+        while True:
+            spotify_id = await queue.get()
+            # None marks the end of the search stage: flush the partial batch.
+            if spotify_id is None:
+                break
+            batch.append(spotify_id)
+            if len(batch) == max_length:
+                requests.append(asyncio.create_task(self.fetch_batch(endpoint, batch)))
+                batch = list()
+
+        if batch:
+            requests.append(asyncio.create_task(self.fetch_batch(endpoint, batch)))
+        await asyncio.gather(*requests)
+
+    async def search(self, rs_item):
+        if not (self.journal and self.journal.restore_item(rs_item)):
+            await rs_item.get_search_results_async(client=self.client)
+            if self.journal:
+                self.journal.record_item(rs_item)
+        self.submit_item(rs_item)
+
+    async def run(self, rs_items):
+        workers = [
+            asyncio.create_task(self.batch_worker(endpoint)) for endpoint in self.queues
+        ]
+        await asyncio.gather(*(self.search(rs_item) for rs_item in rs_items))
+
+        for queue in self.queues.values():
+            queue.put_nowait(None)
+        await asyncio.gather(*workers)
+
+        return self.responses
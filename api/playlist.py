@@ -1,47 +1,337 @@
-# Step 1:
-# Create Playlist
+# Syncs the "Greatest Songs of All Time" playlist with the Rolling Stones ranking.
 # https://developer.spotify.com/documentation/web-api/reference/create-playlist
-# {
-#     "name": "New Playlist",
-#     "description": "New playlist description",
-#     "public": False
-# }
-
-# Step 2:
-# Add Items to the Playlist
+# https://developer.spotify.com/documentation/web-api/reference/get-playlists-tracks
 # https://developer.spotify.com/documentation/web-api/reference/add-tracks-to-playlist
-# For example, to insert the items in the first position: position=0; to insert the items in the third position: position=2.
-# A maximum of 100 items can be added in one request.
+# https://developer.spotify.com/documentation/web-api/reference/remove-tracks-playlist
+# https://developer.spotify.com/documentation/web-api/reference/reorder-or-replace-playlists-tracks
+# A maximum of 100 items can be added, removed or replaced in one request.
 
-import difflib
+import argparse
+import asyncio
+import bisect
+import csv
+import os
+import pathlib
+from collections import Counter
+from dataclasses import dataclass
 
-from authenticator import Authenticator
-from processors import RollingStonesItem
+from async_client import AsyncSpotifyClient
+from client import SpotifyClient
+from metrics import METRICS, log
+from token_manager import TokenManager
 
-auth = Authenticator("SPOTIFY")
-auth.refreshToken()
-headers = auth.getHeaders()
+PLAYLIST_NAME = "Greatest Songs of All Time"
+PLAYLIST_DESCRIPTION = "The Rolling Stone 500 Greatest Songs of All Time, in rank order."
+MAX_ITEMS = 100
+# A failed write is followed by a fresh read and diff, this many times in total.
+SYNC_ATTEMPTS = 3
 
 
-def compute_similarity(input_string, reference_string):
-    diff = difflib.ndiff(input_string, reference_string)
-    diff_count = 0
-    for line in diff:
-        if line.startswith("-"):
-            diff_count += 1
-    return 1 - (diff_count / len(input_string))
+@dataclass(slots=True)
+class PlaylistEdit:
+    """
+    One write request. "remove": uris; "move": range_start, range_length, insert_before;
+    "add": uris at position; "replace": uris (the whole playlist becomes these uris).
+    """
 
+    kind: str
+    uris: list = None
+    position: int = None
+    range_start: int = None
+    range_length: int = None
+    insert_before: int = None
 
-test = RollingStonesItem(
-    raw_artist="Beyonce",
-    description="",
-    rs_rank=12,
-    released_year=11,
-    raw_title="Renaissance",
-    data_type="album",
-    writers="",
-)
 
-track_id, album_id, artists = test.get_search_results(headers=headers)
+def target_uris(ranked_uris) -> list:
+    """
+    Track URIs by Rolling Stones rank from (rs_rank, uri) pairs. Tracks without a rank (0)
+    are not on the list.
+    """
+    ranked = sorted((int(rank), uri) for rank, uri in ranked_uris if int(rank) and uri)
+    return list(dict.fromkeys(uri for _, uri in ranked))
 
-print(artists)
+
+def load_ranked_uris(csv_path) -> list:
+    with open(csv_path, encoding="utf-8", newline="") as csv_file:
+        return [(row["rs_rank"], row["uri"]) for row in csv.DictReader(csv_file)]
+
+
+def chunks(items, size=MAX_ITEMS):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def longest_increasing_subsequence(values) -> set:
+    """
+    Indexes of one longest strictly increasing subsequence, O(n log n) patience sorting.
+    """
+    tails, tail_indexes, previous = list(), list(), [-1] * len(values)
+    for i, value in enumerate(values):
+        position = bisect.bisect_left(tails, value)
+        if position == len(tails):
+            tails.append(value)
+            tail_indexes.append(i)
+        else:
+            tails[position] = value
+            tail_indexes[position] = i
+        previous[i] = tail_indexes[position - 1] if position else -1
+
+    indexes, i = set(), tail_indexes[-1] if tail_indexes else -1
+    while i != -1:
+        indexes.add(i)
+        i = previous[i]
+    return indexes
+
+
+def move(state, range_start, range_length, insert_before):
+    # Same semantics as the reorder endpoint: insert_before points into the list before the move.
+    block = state[range_start : range_start + range_length]
+    del state[range_start : range_start + range_length]
+    if insert_before > range_start:
+        insert_before -= range_length
+    state[insert_before:insert_before] = block
+
+
+def plan_delta(current, target) -> list:
+    """
+    Edits that turn the "current" playlist into "target": remove what is not on the list
+    (and duplicates, which are removed and added once again), keep the longest run of
+    tracks that is already in rank order, move the rest in as few ranges as possible
+    and add the missing tracks in runs of consecutive ranks.
+    """
+    ranks = {uri: rank for rank, uri in enumerate(target)}
+    counts = dict()
+    for uri in current:
+        counts[uri] = counts.get(uri, 0) + 1
+    removed = [uri for uri in counts if uri not in ranks or counts[uri] > 1]
+    edits = [PlaylistEdit("remove", uris=batch) for batch in chunks(removed)]
+
+    removed = set(removed)
+    state = [uri for uri in current if uri not in removed]
+    kept = longest_increasing_subsequence([ranks[uri] for uri in state])
+    placed = {state[i] for i in kept}
+    in_order = sorted(state, key=ranks.get)
+    following = dict(zip(in_order, in_order[1:]))
+
+    to_move = [uri for uri in in_order if uri not in placed]
+    i = 0
+    while i < len(to_move):
+        # Tracks that are next to each other and next in rank order move as one range.
+        range_start = state.index(to_move[i])
+        range_length = 1
+        while (
+            i + range_length < len(to_move)
+            and range_start + range_length < len(state)
+            and state[range_start + range_length] == to_move[i + range_length]
+            and following.get(to_move[i + range_length - 1]) == to_move[i + range_length]
+        ):
+            range_length += 1
+
+        rank = ranks[to_move[i]]
+        insert_before = next(
+            (j for j, uri in enumerate(state) if uri in placed and ranks[uri] > rank),
+            len(state),
+        )
+        if insert_before not in (range_start, range_start + range_length):
+            edits.append(
+                PlaylistEdit(
+                    "move",
+                    range_start=range_start,
+                    range_length=range_length,
+                    insert_before=insert_before,
+                )
+            )
+            move(state, range_start, range_length, insert_before)
+        placed.update(to_move[i : i + range_length])
+        i += range_length
+
+    present = set(state)
+    position = 0
+    while position < len(target):
+        if target[position] in present:
+            position += 1
+            continue
+        run_end = position
+        while run_end < len(target) and target[run_end] not in present:
+            run_end += 1
+        for offset, batch in enumerate(chunks(target[position:run_end])):
+            edits.append(
+                PlaylistEdit("add", uris=batch, position=position + offset * MAX_ITEMS)
+            )
+        position = run_end
+    return edits
+
+
+def plan_rebuild(target) -> list:
+    batches = chunks(target) or [[]]
+    return [PlaylistEdit("replace", uris=batches[0])] + [
+        PlaylistEdit("add", uris=batch, position=i * MAX_ITEMS)
+        for i, batch in enumerate(batches[1:], start=1)
+    ]
+
+
+def plan_sync(current, target) -> list:
+    """
+    The delta edits, unless replacing the whole playlist takes fewer requests.
+    """
+    delta = plan_delta(current, target)
+    rebuild = plan_rebuild(target)
+    return delta if len(delta) <= len(rebuild) else rebuild
+
+
+async def fetch_playlist(client, playlist_id) -> tuple:
+    """
+    (snapshot_id, track URIs). The first response has the total, the other pages are
+    fetched concurrently.
+    """
+    first = await client.get_json(
+        f"playlists/{playlist_id}",
+        params={"fields": "snapshot_id,tracks(total,items(track(uri)))"},
+    )
+    if first is None:
+        raise RuntimeError(f"Could not read playlist {playlist_id}")
+    tracks = first["tracks"]
+    pages = await asyncio.gather(
+        *(
+            client.get_json(
+                f"playlists/{playlist_id}/tracks",
+                params={"fields": "items(track(uri))", "offset": offset, "limit": MAX_ITEMS},
+            )
+            for offset in range(len(tracks["items"]), tracks["total"], MAX_ITEMS)
+        )
+    )
+    if any(page is None for page in pages):
+        raise RuntimeError(f"Could not read every page of playlist {playlist_id}")
+
+    items = tracks["items"] + [item for page in pages for item in page["items"]]
+    # Unavailable tracks come back as null, they can't be removed by URI either.
+    uris = [item["track"]["uri"] for item in items if item.get("track")]
+    return (first["snapshot_id"], uris)
+
+
+def find_or_create_playlist(client, name, description=PLAYLIST_DESCRIPTION, public=False):
+    """
+    ID of the user's playlist called "name", created when there is none yet.
+    """
+    url = "me/playlists?limit=50"
+    while url:
+        page = client.get_json(url)
+        if page is None:
+            break
+        for playlist in page["items"]:
+            if playlist and playlist["name"] == name:
+                return playlist["id"]
+        url = page.get("next")
+
+    user = client.get_json("me")
+    playlist = client.send_json(
+        "POST",
+        f"users/{user['id']}/playlists",
+        body={"name": name, "description": description, "public": public},
+    )
+    log(f"Created playlist {name}: {playlist['id']}")
+    return playlist["id"]
+
+
+def apply_edits(client, playlist_id, snapshot_id, edits) -> str:
+    path = f"playlists/{playlist_id}/tracks"
+    for edit in edits:
+        if edit.kind == "remove":
+            response = client.send_json(
+                "DELETE",
+                path,
+                body={"tracks": [{"uri": uri} for uri in edit.uris], "snapshot_id": snapshot_id},
+            )
+        elif edit.kind == "move":
+            response = client.send_json(
+                "PUT",
+                path,
+                body={
+                    "range_start": edit.range_start,
+                    "range_length": edit.range_length,
+                    "insert_before": edit.insert_before,
+                    "snapshot_id": snapshot_id,
+                },
+            )
+        elif edit.kind == "add":
+            response = client.send_json(
+                "POST", path, body={"uris": edit.uris, "position": edit.position}
+            )
+        else:
+            response = client.send_json("PUT", path, body={"uris": edit.uris})
+
+        if response is None:
+            raise RuntimeError(f"Playlist {edit.kind} failed, sync again to finish it.")
+        snapshot_id = response.get("snapshot_id", snapshot_id)
+    return snapshot_id
+
+
+def sync_playlist(
+    client, playlist_id, target, concurrency=8, dry_run=False, attempts=SYNC_ATTEMPTS
+) -> list:
+    """
+    Makes the playlist equal to "target" and returns the edits it took. Running it again
+    without ranking changes reads the playlist and sends nothing. A failed write starts
+    over from a fresh read, up to "attempts" times.
+    """
+
+    async def read():
+        # No response cache: the playlist must be read as it is now.
+        async with AsyncSpotifyClient(
+            headers=client.headers,
+            base_url=client.base_url,
+            concurrency=concurrency,
+            tokens=client.tokens,
+        ) as async_client:
+            return await fetch_playlist(async_client, playlist_id)
+
+    applied = list()
+    for attempt in range(1, attempts + 1):
+        snapshot_id, current = asyncio.run(read())
+        edits = plan_sync(current, target)
+        kinds = Counter(edit.kind for edit in edits)
+        log(
+            f"{len(current)} tracks in the playlist, {len(target)} ranked: "
+            + (", ".join(f"{count} {kind}" for kind, count in kinds.items()) or "in sync")
+        )
+        if dry_run:
+            return edits
+        try:
+            apply_edits(client, playlist_id, snapshot_id, edits)
+            return applied + edits
+        except RuntimeError as e:
+            # Writes are not retried blindly, the failed one may or may not have been
+            # applied: the playlist is read and diffed again instead.
+            if attempt == attempts:
+                raise
+            log(f"{e} Reading the playlist again ({attempt}/{attempts}).")
+            applied.extend(edits)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create or update the Spotify playlist of the ranked songs in data/tracks.csv."
+    )
+    parser.add_argument("--playlist-id", help="Playlist to sync, found or created by name otherwise.")
+    parser.add_argument("--name", default=PLAYLIST_NAME)
+    parser.add_argument("--public", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the edits.")
+    args = parser.parse_args()
+
+    root_dir_path = pathlib.Path(__file__).parent.parent.resolve()
+    data_folder_path = os.path.join(root_dir_path, "data")
+    target = target_uris(load_ranked_uris(os.path.join(data_folder_path, "tracks.csv")))
+
+    tokens = TokenManager.from_env(
+        cache_path=os.path.join(data_folder_path, "spotify_token.json")
+    )
+    if tokens.grant_type != "refresh_token":
+        parser.error("Editing playlists needs a user token, set SPOTIFY_REFRESH_TOKEN.")
+    client = SpotifyClient(tokens=tokens)
+
+    with METRICS.stage("playlist_sync"):
+        playlist_id = args.playlist_id or find_or_create_playlist(
+            client, name=args.name, public=args.public
+        )
+        sync_playlist(client, playlist_id, target, dry_run=args.dry_run)
+    client.close()
+    METRICS.write(folder_path=os.path.join(data_folder_path, "metrics"), name="playlist")
@@ -1,90 +1,134 @@
-import csv
-import difflib
-import json
 import os
 from dataclasses import asdict, dataclass, field, fields
 
-import requests
+from exporters import stream_csv, stream_json, stream_jsonl, stream_sql
+from indexes import IndexedTable
+from matcher import DEFAULT_SCORER, best_match
+from metrics import log
+
+
+# Query tiers, tried in order until the best match scores MATCH_THRESHOLD: a fielded
+# query whose top results are nearly always the item, then free text over more results.
+SEARCH_TIERS = (("fielded", 3), ("free_text", 10))
+MATCH_THRESHOLD = 0.85
+# Layout of a search result, the RollingStonesItem fields set_search_results sets.
+MATCH_FIELDS = ("track_id", "album_id", "artist_ids", "search_tier", "match_score", "spotify_year")
+NO_MATCH = (None, None, [], "", 0.0, 0)
 
 
 class ApiSearchProcessor:
+    __slots__ = ()
+    scorer = DEFAULT_SCORER
+    search_tiers = SEARCH_TIERS
+    match_threshold = MATCH_THRESHOLD
+
     def find_best_match(self, api_response: dict, search_term: str) -> tuple:
         """
         Finds best returned match for the "Search Term" within the "Names" in the returned list.
+        Returns (track_id, album_id, artist_ids, score, release year).
         """
-
-        # Source for compute_similarity: https://www.geeksforgeeks.org/python-similarity-metrics-of-strings/
-        def compute_similarity(input_string, reference_string):
-            diff = difflib.ndiff(input_string, reference_string)
-            diff_count = 0
-            for line in diff:
-                if line.startswith("-"):
-                    diff_count += 1
-            return 1 - (diff_count / len(input_string))
+        # Spotify occasionally returns null entries, drop them so the indexes stay aligned.
+        items = [item for item in api_response[f"{self.data_type}s"]["items"] if item]
+        if not items:
+            return (None, None, [], 0.0, 0)
+
+        # Score "<artist> <name>" so the candidates look like the search term itself.
+        returned_names = [
+            f"{item['artists'][0]['name'] if item['artists'] else ''} {item['name']}"
+            for item in items
+        ]
+        best_match_idx, score = best_match(
+            query=search_term, candidates=returned_names, scorer=self.scorer
+        )
+        best_item = items[best_match_idx]
 
         if self.data_type == "track":
-            returned_names = [
-                item["name"].lower() for item in api_response["tracks"]["items"] if item
-            ]
-            similarity = [
-                compute_similarity(name, search_term.lower()) for name in returned_names
-            ]
-            best_match_idx = similarity.index(max(similarity))
-            track_id = api_response["tracks"]["items"][best_match_idx]["id"]
-            album_id = api_response["tracks"]["items"][best_match_idx]["album"]["id"]
-            artists = [
-                artist["id"]
-                for artist in api_response["tracks"]["items"][best_match_idx]["artists"]
-            ]
+            track_id = best_item["id"]
+            album_id = best_item["album"]["id"]
+            release_date = best_item["album"].get("release_date")
         # Search Term = "album"
         else:
-            if len(api_response["albums"]["items"]) > 1:
-                returned_names = [
-                    # item["name"] for item in api_response["albums"]["items"] if item
-                    item["name"].lower()
-                    for item in api_response["albums"]["items"]
-                    if item
-                ]
-                # print(returned_names)
-                similarity = [
-                    # compute_similarity(name, search_term) if name else None
-                    compute_similarity(name, search_term.lower()) if name else None
-                    for name in returned_names
-                ]
-                # print(similarity)
-                best_match_idx = similarity.index(max(similarity))
-                # print(best_match_idx)
-            else:
-                best_match_idx = 0
             track_id = None
-            album_id = api_response["albums"]["items"][best_match_idx]["id"]
-            artists = [
-                artist["id"]
-                for artist in api_response["albums"]["items"][best_match_idx]["artists"]
-            ]
+            album_id = best_item["id"]
+            release_date = best_item.get("release_date")
+        artists = [artist["id"] for artist in best_item["artists"]]
+        spotify_year = int(release_date[:4]) if release_date else 0
 
-        return (track_id, album_id, artists)
+        return (track_id, album_id, artists, score, spotify_year)
 
-    def fetch_search_api(self, search_term, search_type, headers: dict) -> tuple:
-        limit = 3
-        url = f"https://api.spotify.com/v1/search?q={search_term}&type={search_type}&market=GB&limit={limit}"
-        r = requests.get(url=url, headers=headers)
-        if r.status_code == 200:
-            return self.find_best_match(api_response=r.json(), search_term=search_term)
+    def search_params(self, tier, limit, search_term, search_type) -> dict:
+        """
+        Query string parameters of one tier; the client URL-encodes them.
+        """
+        artist = self.raw_artist.replace("’", "")
+        title = self.raw_title.replace("’", "")
+        if tier == "fielded_year" and self.released_year:
+            year = int(self.released_year)
+            query = f"artist:{artist} {search_type}:{title} year:{year - 1}-{year + 1}"
+        elif tier in ("fielded", "fielded_year"):
+            query = f"artist:{artist} {search_type}:{title}"
+        elif tier == "title":
+            query = f"{search_type}:{title}"
+        else:
+            query = search_term
+        return {"q": query, "type": search_type, "market": "GB", "limit": limit}
 
+    def pick_match(self, best, tier, api_response, search_term) -> tuple:
+        """
+        The better of the best match so far and this tier's one.
+        """
+        if not api_response:
+            return best
+        track_id, album_id, artists, score, spotify_year = self.find_best_match(
+            api_response=api_response, search_term=search_term
+        )
+        if album_id and (not best[1] or score > best[4]):
+            return (track_id, album_id, artists, tier, round(score, 4), spotify_year)
+        return best
 
-@dataclass
+    def fetch_search_api(self, search_term, search_type, client, tiers=None) -> tuple:
+        """
+        (track_id, album_id, artist_ids, search_tier, match_score, spotify_year), widening
+        the query only while the best match stays below the threshold.
+        """
+        best = NO_MATCH
+        for tier, limit in tiers or self.search_tiers:
+            params = self.search_params(tier, limit, search_term, search_type)
+            api_response = client.get_json("search", params=params)
+            best = self.pick_match(best, tier, api_response, search_term)
+            if best[4] >= self.match_threshold:
+                break
+
+        if not best[1]:
+            log(f"Search failed for: {search_term}")
+        return best
+
+    async def fetch_search_api_async(self, search_term, search_type, client, tiers=None) -> tuple:
+        best = NO_MATCH
+        for tier, limit in tiers or self.search_tiers:
+            params = self.search_params(tier, limit, search_term, search_type)
+            api_response = await client.get_json("search", params=params)
+            best = self.pick_match(best, tier, api_response, search_term)
+            if best[4] >= self.match_threshold:
+                break
+
+        return best
+
+
+@dataclass(slots=True)
 class DataProcessor:
     def write_as_sql(self) -> str:
         clean_list = []
         for field in fields(self):
             if field.type is list:
-                clean_list.append(f"ARRAY{getattr(self, field.name)}")
+                values = getattr(self, field.name)
+                # ARRAY[] has no type Postgres could infer, '{}' is the empty array literal.
+                clean_list.append(f"ARRAY{values}" if values else "'{}'")
             elif field.type is str:
                 try:
                     clean_list.append(getattr(self, field.name).replace("'", ""))
                 except AttributeError as e:
-                    print(e)
+                    log(e)
             else:
                 clean_list.append(getattr(self, field.name))
 
@@ -99,7 +143,7 @@ class DataProcessor:
         keys = (field.name for field in fields(self))
         values = (
             (
-                set(getattr(self, field.name))
+                (set(getattr(self, field.name)) or "{}")
                 if field.type is list
                 else getattr(self, field.name)
             )
@@ -112,7 +156,7 @@ class DataProcessor:
         return [field.name for field in fields(self)]
 
 
-@dataclass
+@dataclass(slots=True)
 class RollingStonesItem(ApiSearchProcessor, DataProcessor):
     raw_artist: str
     description: str
@@ -124,24 +168,57 @@ class RollingStonesItem(ApiSearchProcessor, DataProcessor):
     track_id: str = field(default_factory=str)
     album_id: str = field(default_factory=str)
     artist_ids: list = field(default_factory=list)
+    search_tier: str = field(default_factory=str)
+    match_score: float = 0.0
+    spotify_year: int = 0
+    # Set by validation.MatchValidator: match_score less the penalties of match_flags.
+    match_confidence: float = 0.0
+    match_flags: list = field(default_factory=list)
+
+    # One Rolling Stones entry per list and rank.
+    def __eq__(self, other):
+        if isinstance(other, RollingStonesItem):
+            return (other.data_type, other.rs_rank) == (self.data_type, self.rs_rank)
+        return False
+
+    def __hash__(self):
+        return hash((self.data_type, self.rs_rank))
+
+    @property
+    def search_term(self) -> str:
+        return f"{self.raw_artist} {self.raw_title}".replace("’", "")
+
+    def get_search_results(self, client) -> tuple:
+        log(f"#{self.rs_rank} - {self.raw_title} by {self.raw_artist}")
+        result = self.fetch_search_api(
+            search_term=self.search_term, search_type=self.data_type, client=client
+        )
+        return self.set_search_results(*result)
 
-    def get_search_results(self, headers) -> tuple:
-        print(f"#{self.rs_rank} - {self.raw_title} by {self.raw_artist}")
-        search_term = f"{self.raw_artist} {self.raw_title}".replace("’", "")
-        track_id, album_id, artist_ids = self.fetch_search_api(
-            search_term=search_term, search_type=self.data_type, headers=headers
+    async def get_search_results_async(self, client) -> tuple:
+        result = await self.fetch_search_api_async(
+            search_term=self.search_term, search_type=self.data_type, client=client
         )
+        log(f"#{self.rs_rank} - {self.raw_title} by {self.raw_artist}")
+        return self.set_search_results(*result)
 
+    def set_search_results(
+        self, track_id, album_id, artist_ids, search_tier="", match_score=0.0, spotify_year=0
+    ) -> tuple:
         if track_id:
             self.track_id = track_id
 
-        self.album_id = album_id
+        if album_id:
+            self.album_id = album_id
         self.artist_ids = artist_ids
+        self.search_tier = search_tier
+        self.match_score = match_score
+        self.spotify_year = spotify_year
 
         return (self.track_id, self.album_id, self.artist_ids)
 
 
-@dataclass
+@dataclass(slots=True)
 class Tracks(DataProcessor):
     track_id: str
     track_name: str
@@ -174,8 +251,12 @@ class Tracks(DataProcessor):
         else:
             return False
 
+    # Matches __eq__: equal to its ID string, so it can be looked up by ID in sets and dicts.
+    def __hash__(self):
+        return hash(self.track_id)
 
-@dataclass
+
+@dataclass(slots=True)
 class Artists(DataProcessor):
     artist_id: str
     artist_name: str
@@ -204,8 +285,12 @@ class Artists(DataProcessor):
         else:
             return False
 
+    # Matches __eq__: equal to its ID string, so it can be looked up by ID in sets and dicts.
+    def __hash__(self):
+        return hash(self.artist_id)
 
-@dataclass
+
+@dataclass(slots=True)
 class Albums(DataProcessor):
     album_id: str
     album_name: str
@@ -238,16 +323,28 @@ class Albums(DataProcessor):
         else:
             return False
 
+    # Matches __eq__: equal to its ID string, so it can be looked up by ID in sets and dicts.
+    def __hash__(self):
+        return hash(self.album_id)
+
 
 class SearchResults:
-    def __init__(self, headers):
+    # endpoint: (url template, max number of IDs per request)
+    batch_endpoints = {
+        "tracks": ("tracks?market=GB&ids={}", 50),
+        "albums": ("albums?ids={}&market=GB", 20),
+        "artists": ("artists?ids={}", 50),
+    }
+
+    def __init__(self, client, journal=None):
         self.tracks = dict()  #  key: track_id, value: int(rank)
         self.albums = dict()  #  key: album_id, value: int(rank)
         self.artists = dict()  # key: artist_id, value: list(albums)
-        self.headers = headers
+        self.client = client
+        self.journal = journal
 
-    def split_data_for_batch_processing(self, field_name, max_length):
-        data = list(getattr(self, field_name).keys())
+    def split_data_for_batch_processing(self, field_name, max_length, skip_ids=()):
+        data = [key for key in getattr(self, field_name).keys() if key not in skip_ids]
         for_batch_processing = list()
         counter = 0
         while counter < len(data):
@@ -257,186 +354,192 @@ class SearchResults:
 
         return for_batch_processing
 
-    def fetch_batch_tracks(self):
-        tracks_data = list()
+    def parse_batch_items(self, endpoint, items) -> list:
+        """
+        Turns the raw items of a batch response into Tracks, Albums or Artists.
+        Unknown IDs come back as null items and are skipped.
+        """
+        parser = {
+            "tracks": self.parse_track,
+            "albums": self.parse_album,
+            "artists": self.parse_artist,
+        }[endpoint]
+        return [parser(item) for item in items if item]
+
+    def fetch_batch(self, endpoint) -> list:
+        data = list()
+        # IDs already fetched by a previous run are not requested again.
+        journaled_items = dict()
+        if self.journal:
+            for spotify_id in getattr(self, endpoint):
+                item = self.journal.fetched_item(endpoint, spotify_id)
+                if item:
+                    journaled_items[spotify_id] = item
+            data.extend(self.parse_batch_items(endpoint, journaled_items.values()))
+
+        url_template, max_length = self.batch_endpoints[endpoint]
         batched_data = SearchResults.split_data_for_batch_processing(
-            self=self, field_name="tracks", max_length=50
+            self=self, field_name=endpoint, max_length=max_length, skip_ids=journaled_items
         )
 
         for batch in batched_data:
-            print(f"Fetching {len(batch)} number of Tracks...")
-            search_str = ",".join(batch)
-            url = f"https://api.spotify.com/v1/tracks?market=GB&ids={search_str}"
-            r = requests.get(url=url, headers=self.headers)
-
-            if r.status_code == 200:
-                response = r.json()
-
-                for item in response["tracks"]:
-                    name = item["name"]
-                    track_id = item["id"]
-                    rs_rank = self.tracks[track_id]
-                    duration_ms = int(item["duration_ms"])
-                    explicit = item["explicit"]
-                    popularity = int(item["popularity"])
-                    track_number = int(item["track_number"])
-                    external_urls = item["external_urls"]["spotify"]
-                    released_year = int(item["album"]["release_date"][:4])
-                    album_id = item["album"]["id"]
-                    artists = [artist["id"] for artist in item["artists"]]
-                    uri = item["uri"]
-
-                    track = Tracks(
-                        track_name=name,
-                        rs_rank=rs_rank,
-                        track_id=track_id,
-                        artist_ids=artists,
-                        album_id=album_id,
-                        duration_ms=duration_ms,
-                        is_explicit=explicit,
-                        popularity=popularity,
-                        track_number_on_album=track_number,
-                        external_url=external_urls,
-                        uri=uri,
-                        released_year=released_year,
-                    )
-
-                    tracks_data.append(track)
-                print(f"Number of Tracks downloaded: {len(tracks_data)}")
-        return tracks_data
+            log(f"Fetching {len(batch)} number of {endpoint.title()}...")
+            url = url_template.format(",".join(batch))
+            response = self.client.get_json(url)
 
-    def fetch_batch_artists(self):
-        artists_data = list()
-        batched_data = SearchResults.split_data_for_batch_processing(
-            self=self, field_name="artists", max_length=50
-        )
+            if response:
+                if self.journal:
+                    self.journal.record_batch(endpoint, response[endpoint])
+                data.extend(self.parse_batch_items(endpoint, response[endpoint]))
+                log(f"Number of {endpoint.title()} downloaded: {len(data)}")
+        return data
 
-        for batch in batched_data:
-            print(f"Fetching {len(batch)} number of Artists...")
-            search_str = ",".join(batch)
-            url = f"https://api.spotify.com/v1/artists?ids={search_str}"
-            r = requests.get(url=url, headers=self.headers)
-
-            if r.status_code == 200:
-                response = r.json()
-
-                for item in response["artists"]:
-                    artist_id = item["id"]
-                    artist_name = item["name"]
-                    genres = item["genres"]
-                    total_followers = item["followers"]["total"]
-                    popularity = item["popularity"]
-                    external_url = item["external_urls"]["spotify"]
-                    uri = item["uri"]
-                    albums = self.artists[artist_id]
-
-                    if len(genres) > 1:
-                        cleaned_genres = [genre.replace("'", "") for genre in genres]
-                    else:
-                        cleaned_genres = ["NONE"]
-
-                    artist = Artists(
-                        artist_id=artist_id,
-                        artist_name=artist_name,
-                        albums=albums,
-                        genres=cleaned_genres,
-                        total_followers=total_followers,
-                        popularity=popularity,
-                        external_url=external_url,
-                        uri=uri,
-                    )
-
-                    artists_data.append(artist)
-                print(f"Number of Artists downloaded: {len(artists_data)}")
-        return artists_data
+    def fetch_batch_tracks(self):
+        return self.fetch_batch("tracks")
+
+    def fetch_batch_artists(self):
+        return self.fetch_batch("artists")
 
     def fetch_batch_albums(self):
-        albums_data = list()
-        batched_data = SearchResults.split_data_for_batch_processing(
-            self=self, field_name="albums", max_length=20
+        return self.fetch_batch("albums")
+
+    def parse_track(self, item) -> Tracks:
+        name = item["name"]
+        track_id = item["id"]
+        rs_rank = self.tracks[track_id]
+        duration_ms = int(item["duration_ms"])
+        explicit = item["explicit"]
+        popularity = int(item["popularity"])
+        track_number = int(item["track_number"])
+        external_urls = item["external_urls"]["spotify"]
+        released_year = int(item["album"]["release_date"][:4])
+        album_id = item["album"]["id"]
+        artists = [artist["id"] for artist in item["artists"]]
+        uri = item["uri"]
+
+        return Tracks(
+            track_name=name,
+            rs_rank=rs_rank,
+            track_id=track_id,
+            artist_ids=artists,
+            album_id=album_id,
+            duration_ms=duration_ms,
+            is_explicit=explicit,
+            popularity=popularity,
+            track_number_on_album=track_number,
+            external_url=external_urls,
+            uri=uri,
+            released_year=released_year,
         )
 
-        for batch in batched_data:
-            print(f"Fetching {len(batch)} number of Albums...")
-            search_str = ",".join(batch)
-            url = f"https://api.spotify.com/v1/albums?ids={search_str}&market=GB"
-            r = requests.get(url=url, headers=self.headers)
-
-            if r.status_code == 200:
-                response = r.json()
-
-                for item in response["albums"]:
-                    album_name = item["name"].replace(";", "")
-                    album_id = item["id"]
-                    rs_rank = self.albums[album_id]
-                    popularity = item["popularity"]
-                    total_tracks = item["total_tracks"]
-                    label = item["label"]
-                    external_url = item["external_urls"]["spotify"]
-                    uri = item["uri"]
-                    released_year = int(item["release_date"][:4])
-                    album_image = item["images"][0]["url"]
-                    artist_ids = [artist["id"] for artist in item["artists"]]
-
-                    album = Albums(
-                        album_id=album_id,
-                        album_name=album_name,
-                        rs_rank=rs_rank,
-                        popularity=popularity,
-                        total_tracks=total_tracks,
-                        label=label,
-                        external_url=external_url,
-                        uri=uri,
-                        released_year=released_year,
-                        album_image=album_image,
-                        artist_ids=artist_ids,
-                    )
-
-                    albums_data.append(album)
-                print(f"Number of Albums downloaded: {len(albums_data)}")
-        return albums_data
+    def parse_artist(self, item) -> Artists:
+        artist_id = item["id"]
+        artist_name = item["name"]
+        genres = item["genres"]
+        total_followers = item["followers"]["total"]
+        popularity = item["popularity"]
+        external_url = item["external_urls"]["spotify"]
+        uri = item["uri"]
+        albums = self.artists[artist_id]
+
+        if len(genres) > 1:
+            cleaned_genres = [genre.replace("'", "") for genre in genres]
+        else:
+            cleaned_genres = ["NONE"]
+
+        return Artists(
+            artist_id=artist_id,
+            artist_name=artist_name,
+            albums=albums,
+            genres=cleaned_genres,
+            total_followers=total_followers,
+            popularity=popularity,
+            external_url=external_url,
+            uri=uri,
+        )
+
+    def parse_album(self, item) -> Albums:
+        album_name = item["name"].replace(";", "")
+        album_id = item["id"]
+        rs_rank = self.albums[album_id]
+        popularity = item["popularity"]
+        total_tracks = item["total_tracks"]
+        label = item["label"]
+        external_url = item["external_urls"]["spotify"]
+        uri = item["uri"]
+        released_year = int(item["release_date"][:4])
+        album_image = item["images"][0]["url"]
+        artist_ids = [artist["id"] for artist in item["artists"]]
+
+        return Albums(
+            album_id=album_id,
+            album_name=album_name,
+            rs_rank=rs_rank,
+            popularity=popularity,
+            total_tracks=total_tracks,
+            label=label,
+            external_url=external_url,
+            uri=uri,
+            released_year=released_year,
+            album_image=album_image,
+            artist_ids=artist_ids,
+        )
 
 
 # Data Processor to save Master Data files.
+# Every writer streams the rows, so the tables can also be generators instead of lists.
 class MainDataProcessor:
-    def save_data_to_csv(self, csv_folder_path):
+    def save_data_to_csv(self, csv_folder_path, compress=False):
+        extension = "csv.gz" if compress else "csv"
         for field in fields(self):
-            file_name = os.path.join(csv_folder_path, f"{field.name}.csv")
-            csv_headers = [
-                key for key in getattr(self, field.name)[0].get_field_names()
-            ]
-            csv_data = [item.write_to_csv() for item in getattr(self, field.name)]
-
-            with open(file_name, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=csv_headers)
-                writer.writeheader()
-                writer.writerows(csv_data)
+            file_name = os.path.join(csv_folder_path, f"{field.name}.{extension}")
+            stream_csv(rows=getattr(self, field.name), file_name=file_name)
 
     def save_data_to_sql(self, sql_folder_path):
         schema = "rstop500"
         for field in fields(self):
             file_name = os.path.join(sql_folder_path, f"{field.name}.sql")
-            baseSql = f"INSERT INTO {schema}.{field.name} {str(tuple(key for key in getattr(self, field.name)[0].get_field_names())).replace("'", "")} VALUES"
-            sql_data = [item.write_as_sql() for item in getattr(self, field.name)]
-
-            with open(file_name, "w", newline="", encoding="utf-8") as sqlFile:
-                sqlFile.seek(0)
-                sqlFile.write("{}\n".format(baseSql))
-                for i, row in enumerate(sql_data, start=1):
-                    if i != len(sql_data):
-                        sqlFile.write("{},\n".format(row))
-                    else:
-                        sqlFile.write("{};".format(row))
+            stream_sql(
+                rows=getattr(self, field.name),
+                file_name=file_name,
+                table=f"{schema}.{field.name}",
+            )
 
     def save_data_to_json(self, json_folder_path):
         for field in fields(self):
             file_name = os.path.join(json_folder_path, f"{field.name}.json")
-            json_data = [item.write_as_dict() for item in getattr(self, field.name)]
+            stream_json(rows=getattr(self, field.name), file_name=file_name)
 
-            with open(file_name, "w", encoding="utf-8") as jsonFile:
-                jsonFile.seek(0)
-                json.dump(json_data, jsonFile, indent=4, sort_keys=True)
-                jsonFile.truncate()
+    def save_data_to_jsonl(self, jsonl_folder_path, compress=False):
+        extension = "jsonl.gz" if compress else "jsonl"
+        for field in fields(self):
+            file_name = os.path.join(jsonl_folder_path, f"{field.name}.{extension}")
+            stream_jsonl(rows=getattr(self, field.name), file_name=file_name)
+
+    def save_data_to_columnar(self, folder_path, file_format="arrow"):
+        """
+        Arrow IPC (memory mapped by columnar.load_master_frames) or Parquet files with list
+        typed array columns and dictionary encoded strings.
+        """
+        # Only needed for the columnar export, pyarrow is not imported otherwise.
+        from columnar import EXTENSIONS, write_arrow, write_parquet
+
+        writer = write_arrow if file_format == "arrow" else write_parquet
+        for field in fields(self):
+            file_name = os.path.join(folder_path, f"{field.name}.{EXTENSIONS[file_format]}")
+            writer(rows=getattr(self, field.name), file_name=file_name)
+
+
+# Indexes kept for each Master Data table: unique ID attribute and grouped lookups.
+TABLE_INDEXES = {
+    "rs_master_data": dict(key=None, groups={"rank": lambda item: [item.rs_rank]}),
+    "tracks": dict(
+        key="track_id",
+        groups={"album": lambda track: [track.album_id], "artist": lambda track: track.artist_ids},
+    ),
+    "albums": dict(key="album_id", groups={"artist": lambda album: album.artist_ids}),
+    "artists": dict(key="artist_id", groups=None),
+}
 
 
 # Dataclass to store Master Data.
@@ -446,3 +549,46 @@ class RollingStonesMasterData(MainDataProcessor):
     tracks: list[Tracks] = field(default_factory=list)
     albums: list[Albums] = field(default_factory=list)
     artists: list[Artists] = field(default_factory=list)
+
+    # Assigned lists become IndexedTables, so the index views below stay in sync. Generators
+    # are left alone for the streaming writers, they only become a table once an index
+    # view is used.
+    def __setattr__(self, name, value):
+        if name in TABLE_INDEXES and type(value) is list:
+            value = IndexedTable(value, **TABLE_INDEXES[name])
+        super().__setattr__(name, value)
+
+    def indexed(self, name) -> IndexedTable:
+        table = getattr(self, name)
+        if not isinstance(table, IndexedTable):
+            table = IndexedTable(table, **TABLE_INDEXES[name])
+            super().__setattr__(name, table)
+        return table
+
+    @property
+    def track_by_id(self) -> dict:
+        return self.indexed("tracks").by_key
+
+    @property
+    def album_by_id(self) -> dict:
+        return self.indexed("albums").by_key
+
+    @property
+    def artist_by_id(self) -> dict:
+        return self.indexed("artists").by_key
+
+    @property
+    def albums_by_artist(self) -> dict:
+        return self.indexed("albums").groups["artist"]
+
+    @property
+    def tracks_by_artist(self) -> dict:
+        return self.indexed("tracks").groups["artist"]
+
+    @property
+    def tracks_by_album(self) -> dict:
+        return self.indexed("tracks").groups["album"]
+
+    @property
+    def items_by_rank(self) -> dict:
+        return self.indexed("rs_master_data").groups["rank"]
@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import pathlib
+import time
+
+import numpy as np
+from metrics import log
+from scipy import sparse
+
+# Placeholder parse_artist stores for artists with one or no genre.
+NO_GENRE = "NONE"
+
+
+def standardize(columns: np.ndarray) -> tuple:
+    """
+    Column wise z-scores; missing values (NaN) become the column mean, i.e. 0.
+    Returns (scaled, mean, std) so the scaling is stored with the index.
+    """
+    mean = np.nanmean(columns, axis=0) if len(columns) else np.zeros(columns.shape[1])
+    std = np.nanstd(columns, axis=0) if len(columns) else np.ones(columns.shape[1])
+    mean, std = np.nan_to_num(mean), np.where(np.nan_to_num(std) > 0, std, 1.0)
+    return (np.nan_to_num((columns - mean) / std), mean, std)
+
+
+def multi_hot(genre_lists, vocabulary=None) -> tuple:
+    if vocabulary is None:
+        vocabulary = sorted(
+            {genre for genres in genre_lists for genre in genres if genre != NO_GENRE}
+        )
+    columns = {genre: i for i, genre in enumerate(vocabulary)}
+
+    indptr, indices = [0], []
+    for genres in genre_lists:
+        indices.extend(sorted({columns[genre] for genre in genres if genre in columns}))
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), np.array(indices, dtype=np.int32), indptr),
+        shape=(len(genre_lists), len(vocabulary)),
+    )
+    return (matrix, vocabulary)
+
+
+class SimilarityIndex:
+    """
+    Cosine similarity over [genre multi-hot | scaled numeric features]. The genre block is a
+    CSR matrix, the numeric block a dense float32 array; both are pre-divided by the row norm,
+    so a query is one sparse and one dense matrix-vector product plus an argpartition.
+    """
+
+    def __init__(self, kind, ids, genres, numeric, vocabulary, numeric_features, scaling):
+        self.kind = kind
+        self.ids = ids
+        self.genres = genres
+        self.numeric = numeric
+        self.vocabulary = vocabulary
+        self.numeric_features = numeric_features
+        self.scaling = scaling
+        self.positions = {item_id: i for i, item_id in enumerate(ids.tolist())}
+
+    @classmethod
+    def build(
+        cls,
+        kind,
+        ids,
+        genre_lists,
+        numeric_columns,
+        numeric_features,
+        genre_weight=1.0,
+        numeric_weight=0.5,
+    ):
+        genres, vocabulary = multi_hot(genre_lists)
+        numeric, mean, std = standardize(np.asarray(numeric_columns, dtype=np.float64))
+
+        # Each block gets unit length first, the weights then decide how much it counts.
+        genre_norms = np.sqrt(np.asarray(genres.multiply(genres).sum(axis=1)).ravel())
+        genre_scale = genre_weight / np.where(genre_norms > 0, genre_norms, 1.0)
+        genres = sparse.diags(genre_scale) @ genres
+        numeric_norms = np.linalg.norm(numeric, axis=1)
+        numeric_scale = numeric_weight / np.where(numeric_norms > 0, numeric_norms, 1.0)
+        numeric = numeric * numeric_scale[:, None]
+
+        row_norms = np.sqrt(
+            np.asarray(genres.multiply(genres).sum(axis=1)).ravel()
+            + np.einsum("ij,ij->i", numeric, numeric)
+        )
+        row_scale = 1.0 / np.where(row_norms > 0, row_norms, 1.0)
+        genres = sparse.csr_matrix(sparse.diags(row_scale) @ genres, dtype=np.float32)
+        numeric = (numeric * row_scale[:, None]).astype(np.float32)
+
+        scaling = {
+            "mean": mean.tolist(),
+            "std": std.tolist(),
+            "genre_weight": genre_weight,
+            "numeric_weight": numeric_weight,
+        }
+        return cls(kind, np.array(ids), genres, numeric, vocabulary, numeric_features, scaling)
+
+    @classmethod
+    def from_artists(cls, master_data, **weights):
+        """
+        Genres, log followers, popularity and the mean release year of the artist's albums.
+        """
+        artists = list(master_data.artists)
+        numeric = list()
+        for artist in artists:
+            years = [
+                album.released_year
+                for album in master_data.albums_by_artist.get(artist.artist_id, [])
+                if album.released_year
+            ]
+            numeric.append(
+                (
+                    np.log1p(artist.total_followers or 0),
+                    artist.popularity,
+                    np.mean(years) if years else np.nan,
+                )
+            )
+        return cls.build(
+            kind="artist",
+            ids=[artist.artist_id for artist in artists],
+            genre_lists=[artist.genres for artist in artists],
+            numeric_columns=np.array(numeric, dtype=np.float64).reshape(len(artists), 3),
+            numeric_features=["log_followers", "popularity", "mean_album_year"],
+            **weights,
+        )
+
+    @classmethod
+    def from_tracks(cls, master_data, **weights):
+        """
+        Genres of the track's artists, popularity, release year, duration, explicit flag
+        and the popularity of its album.
+        """
+        tracks = list(master_data.tracks)
+        genre_lists, numeric = list(), list()
+        for track in tracks:
+            genre_lists.append(
+                [
+                    genre
+                    for artist_id in track.artist_ids
+                    for genre in getattr(master_data.artist_by_id.get(artist_id), "genres", [])
+                ]
+            )
+            album = master_data.album_by_id.get(track.album_id)
+            numeric.append(
+                (
+                    track.popularity,
+                    track.released_year or np.nan,
+                    track.duration_ms / 1000,
+                    float(track.is_explicit),
+                    album.popularity if album else np.nan,
+                )
+            )
+        return cls.build(
+            kind="track",
+            ids=[track.track_id for track in tracks],
+            genre_lists=genre_lists,
+            numeric_columns=np.array(numeric, dtype=np.float64).reshape(len(tracks), 5),
+            numeric_features=[
+                "popularity",
+                "released_year",
+                "duration_seconds",
+                "is_explicit",
+                "album_popularity",
+            ],
+            **weights,
+        )
+
+    def __contains__(self, item_id):
+        return item_id in self.positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def scores(self, position) -> np.ndarray:
+        genre_scores = self.genres @ self.genres[position].toarray().ravel()
+        return genre_scores + self.numeric @ self.numeric[position]
+
+    def recommend(self, item_id, k=10) -> list:
+        """
+        Top k (id, cosine similarity) neighbours, the item itself excluded.
+        """
+        position = self.positions[item_id]
+        scores = self.scores(position)
+        scores[position] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i].item(), float(scores[i])) for i in top]
+
+    def save(self, folder_path):
+        """
+        One .npy file per array, so load() can memory map them instead of reading them in.
+        """
+        os.makedirs(folder_path, exist_ok=True)
+        arrays = {
+            "ids": self.ids,
+            "genre_data": self.genres.data,
+            "genre_indices": self.genres.indices,
+            "genre_indptr": self.genres.indptr,
+            "numeric": self.numeric,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(folder_path, f"{name}.npy"), array)
+
+        meta = {
+            "kind": self.kind,
+            "shape": list(self.genres.shape),
+            "vocabulary": self.vocabulary,
+            "numeric_features": self.numeric_features,
+            "scaling": self.scaling,
+        }
+        with open(os.path.join(folder_path, "meta.json"), "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file, indent=4)
+
+    @classmethod
+    def load(cls, folder_path, mmap=True):
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(folder_path, "meta.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        arrays = {
+            name: np.load(os.path.join(folder_path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ("ids", "genre_data", "genre_indices", "genre_indptr", "numeric")
+        }
+        genres = sparse.csr_matrix(
+            (arrays["genre_data"], arrays["genre_indices"], arrays["genre_indptr"]),
+            shape=tuple(meta["shape"]),
+            copy=False,
+        )
+        return cls(
+            meta["kind"],
+            arrays["ids"],
+            genres,
+            arrays["numeric"],
+            meta["vocabulary"],
+            meta["numeric_features"],
+            meta["scaling"],
+        )
+
+
+class Recommender:
+    """
+    Artist and track similarity indexes, recommend() answers with neighbours of the same kind.
+    """
+
+    def __init__(self, artists: SimilarityIndex, tracks: SimilarityIndex):
+        self.indexes = {"artists": artists, "tracks": tracks}
+
+    @classmethod
+    def build(cls, master_data, **weights):
+        return cls(
+            artists=SimilarityIndex.from_artists(master_data, **weights),
+            tracks=SimilarityIndex.from_tracks(master_data, **weights),
+        )
+
+    def recommend(self, item_id, k=10) -> list:
+        for index in self.indexes.values():
+            if item_id in index:
+                return index.recommend(item_id, k=k)
+        raise KeyError(f"Unknown artist or track ID: {item_id}")
+
+    def save(self, folder_path):
+        for name, index in self.indexes.items():
+            index.save(os.path.join(folder_path, name))
+
+    @classmethod
+    def load(cls, folder_path, mmap=True):
+        return cls(
+            **{
+                name: SimilarityIndex.load(os.path.join(folder_path, name), mmap=mmap)
+                for name in ("artists", "tracks")
+            }
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Similar artists or tracks from the index fetch_data.py --recommender builds."
+    )
+    parser.add_argument("item_id", help="Spotify artist or track ID.")
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    root_dir_path = pathlib.Path(__file__).parent.parent.resolve()
+    folder_path = os.path.join(root_dir_path, "data", "recommender")
+    recommender = Recommender.load(folder_path)
+    start = time.perf_counter()
+    neighbours = recommender.recommend(args.item_id, k=args.k)
+    elapsed = time.perf_counter() - start
+    for neighbour_id, score in neighbours:
+        log(f"{neighbour_id}  {score:.4f}")
+    log(f"Answered in {elapsed * 1000:.2f}ms")
@@ -0,0 +1,163 @@
+import asyncio
+import os
+from array import array
+
+import numpy as np
+from exporters import stream_jsonl
+from metrics import log
+from processors import SearchResults
+
+
+class ArtistGraph:
+    """
+    Related artists graph in CSR form: the neighbours of node i are
+    indices[indptr[i]:indptr[i + 1]]. Nodes are integers, "ids" maps them back to
+    Spotify IDs. Saved as .npy files that load() memory maps.
+    """
+
+    def __init__(self, ids, indptr, indices):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.positions = {artist_id: i for i, artist_id in enumerate(ids.tolist())}
+
+    @classmethod
+    def from_edges(cls, ids, sources, targets):
+        sources = np.frombuffer(sources, dtype=np.int32)
+        targets = np.frombuffer(targets, dtype=np.int32)
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(ids)), out=indptr[1:])
+        return cls(np.array(ids), indptr, targets[order])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.indices)
+
+    def neighbour_indexes(self, position) -> np.ndarray:
+        return self.indices[self.indptr[position] : self.indptr[position + 1]]
+
+    def neighbours(self, artist_id) -> list:
+        position = self.positions.get(artist_id)
+        if position is None:
+            return []
+        return self.ids[self.neighbour_indexes(position)].tolist()
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def save(self, folder_path):
+        os.makedirs(folder_path, exist_ok=True)
+        for name in ("ids", "indptr", "indices"):
+            np.save(os.path.join(folder_path, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, folder_path, mmap=True):
+        mmap_mode = "r" if mmap else None
+        return cls(
+            *(
+                np.load(os.path.join(folder_path, f"{name}.npy"), mmap_mode=mmap_mode)
+                for name in ("ids", "indptr", "indices")
+            )
+        )
+
+
+class RelatedArtistsCrawler:
+    """
+    Breadth first crawl over /artists/{id}/related-artists up to "max_depth" hops from the seeds.
+    Every level is requested concurrently through the AsyncSpotifyClient (which takes care of
+    the rate limit and retries), every artist is visited once.
+    """
+
+    def __init__(self, client, max_depth=2, max_artists=None):
+        self.client = client
+        self.max_depth = max_depth
+        self.max_artists = max_artists
+        self.ids = list()
+        self.positions = dict()
+        self.details = dict()  # key: artist_id, value: raw api artist
+        # Edge lists as int32 arrays, a tuple per edge would cost ~10x the memory.
+        self.sources = array("i")
+        self.targets = array("i")
+
+    def node(self, artist_id) -> tuple:
+        """
+        (index, is_new) of the artist, new artists get the next index.
+        """
+        position = self.positions.get(artist_id)
+        if position is not None:
+            return (position, False)
+        position = self.positions[artist_id] = len(self.ids)
+        self.ids.append(artist_id)
+        return (position, True)
+
+    def full(self) -> bool:
+        return self.max_artists is not None and len(self.ids) >= self.max_artists
+
+    async def fetch_related(self, artist_id) -> list:
+        response = await self.client.get_json(f"artists/{artist_id}/related-artists")
+        return [item for item in (response or {}).get("artists", []) if item]
+
+    async def fetch_missing_details(self):
+        """
+        Artists known only by ID (the seeds) go through the /artists?ids= batches.
+        """
+        url_template, max_length = SearchResults.batch_endpoints["artists"]
+        missing = [artist_id for artist_id in self.ids if artist_id not in self.details]
+        batches = [missing[i : i + max_length] for i in range(0, len(missing), max_length)]
+        responses = await asyncio.gather(
+            *(self.client.get_json(url_template.format(",".join(batch))) for batch in batches)
+        )
+        for response in responses:
+            for item in (response or {}).get("artists", []):
+                if item:
+                    self.details[item["id"]] = item
+
+    async def crawl(self, seed_ids) -> ArtistGraph:
+        frontier = [artist_id for artist_id in dict.fromkeys(seed_ids) if self.node(artist_id)[1]]
+
+        for depth in range(self.max_depth):
+            if not frontier:
+                break
+            log(f"Depth {depth + 1}: fetching related artists of {len(frontier)} artists...")
+            responses = await asyncio.gather(
+                *(self.fetch_related(artist_id) for artist_id in frontier)
+            )
+
+            next_frontier = list()
+            for artist_id, related in zip(frontier, responses):
+                source = self.positions[artist_id]
+                for item in related:
+                    if item["id"] not in self.positions and self.full():
+                        continue
+                    target, is_new = self.node(item["id"])
+                    self.sources.append(source)
+                    self.targets.append(target)
+                    if is_new:
+                        self.details[item["id"]] = item
+                        next_frontier.append(item["id"])
+            frontier = next_frontier
+            log(f"{len(self.ids)} artists, {len(self.sources)} edges.")
+
+        await self.fetch_missing_details()
+        return ArtistGraph.from_edges(self.ids, self.sources, self.targets)
+
+    def artists(self, albums_by_artist) -> list:
+        """
+        Every crawled artist as Artists rows, albums (artist_id: album IDs) are only known
+        for the artists of the Rolling Stones lists.
+        """
+        parser = SearchResults(client=None)
+        parser.artists = {
+            artist_id: albums_by_artist.get(artist_id, []) for artist_id in self.details
+        }
+        # In graph order, so row i of artists.jsonl is node i unless its details are missing.
+        return parser.parse_batch_items("artists", map(self.details.get, self.ids))
+
+
+def save_related_artists(graph, artists, folder_path):
+    graph.save(folder_path)
+    stream_jsonl(rows=artists, file_name=os.path.join(folder_path, "artists.jsonl"))
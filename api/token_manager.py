@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+
+import requests
+from metrics import METRICS, log
+
+TOKEN_URL = "https://accounts.spotify.com/api/token"
+# Refresh this many seconds before the expiry, so no request is sent with a dying token.
+REFRESH_MARGIN = 120
+
+
+class TokenManager:
+    """
+    Spotify access token shared by every client and worker. The token and its expiry are
+    cached on disk, so a new run only asks for a token once the cached one is about to expire.
+    Refreshes are single-flight: whichever thread or task finds the token expired refreshes it,
+    everybody else waits for that refresh instead of sending their own.
+
+    Client credentials by default; with a refresh token the user's token is refreshed instead
+    (needed for the playlist endpoints).
+    """
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        refresh_token=None,
+        cache_path=None,
+        token_url=TOKEN_URL,
+        margin=REFRESH_MARGIN,
+        timeout=(5, 30),
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_token = refresh_token
+        self.cache_path = cache_path
+        self.token_url = token_url
+        self.margin = margin
+        self.timeout = timeout
+        self.grant_type = "refresh_token" if refresh_token else "client_credentials"
+        self.access_token = None
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self.lock = threading.Lock()
+        # asyncio.Lock belongs to one event loop, every asyncio.run gets its own.
+        self.async_locks = weakref.WeakKeyDictionary()
+        self.load()
+
+    @classmethod
+    def from_env(cls, prefix="SPOTIFY", **kwargs):
+        """
+        Credentials from <prefix>_CLIENT_ID, <prefix>_CLIENT_SECRET and, for user scoped
+        requests, <prefix>_REFRESH_TOKEN.
+        """
+        try:
+            client_id = os.environ[f"{prefix}_CLIENT_ID"]
+            client_secret = os.environ[f"{prefix}_CLIENT_SECRET"]
+        except KeyError as e:
+            raise RuntimeError(f"Missing Spotify credentials: set {e.args[0]}") from None
+        return cls(
+            client_id=client_id,
+            client_secret=client_secret,
+            refresh_token=os.environ.get(f"{prefix}_REFRESH_TOKEN"),
+            **kwargs,
+        )
+
+    def load(self):
+        if not (self.cache_path and os.path.exists(self.cache_path)):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+        # A token of other credentials or another grant type is no use.
+        if (cached.get("client_id"), cached.get("grant_type")) != (
+            self.client_id,
+            self.grant_type,
+        ):
+            return
+        self.access_token = cached["access_token"]
+        self.expires_at = cached["expires_at"]
+        self.refresh_token = cached.get("refresh_token") or self.refresh_token
+
+    def save(self):
+        if not self.cache_path:
+            return
+        cached = {
+            "client_id": self.client_id,
+            "grant_type": self.grant_type,
+            "access_token": self.access_token,
+            "expires_at": self.expires_at,
+            "refresh_token": self.refresh_token,
+        }
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        # Renamed into place and only readable by the owner, it is a credential.
+        temp_path = f"{self.cache_path}.tmp"
+        file_descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as cache_file:
+            json.dump(cached, cache_file)
+        os.replace(temp_path, self.cache_path)
+
+    def expired(self) -> bool:
+        return self.access_token is None or time.time() >= self.expires_at - self.margin
+
+    def request_token(self) -> dict:
+        data = {"grant_type": self.grant_type}
+        if self.refresh_token:
+            data["refresh_token"] = self.refresh_token
+        start = time.perf_counter()
+        r = requests.post(
+            self.token_url,
+            data=data,
+            auth=(self.client_id, self.client_secret),
+            timeout=self.timeout,
+        )
+        METRICS.record_request("token", r.status_code, time.perf_counter() - start)
+        if r.status_code != 200:
+            raise RuntimeError(f"Token refresh failed with status {r.status_code}: {r.text}")
+        return r.json()
+
+    def refresh(self, stale_token=None) -> str:
+        """
+        Refreshes under the lock unless another caller already replaced "stale_token"
+        (or, without one, already refreshed the expired token) while this one waited.
+        """
+        with self.lock:
+            if stale_token is not None and self.access_token != stale_token:
+                return self.access_token
+            if stale_token is None and not self.expired():
+                return self.access_token
+
+            issued_at = time.time()
+            response = self.request_token()
+            self.access_token = response["access_token"]
+            self.expires_at = issued_at + response["expires_in"]
+            # Spotify may rotate the refresh token.
+            self.refresh_token = response.get("refresh_token") or self.refresh_token
+            self.refreshes += 1
+            self.save()
+            log(f"Spotify access token refreshed, valid for {response['expires_in']}s.")
+            return self.access_token
+
+    def token(self) -> str:
+        if self.expired():
+            return self.refresh()
+        return self.access_token
+
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token()}"}
+
+    def async_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop not in self.async_locks:
+            self.async_locks[loop] = asyncio.Lock()
+        return self.async_locks[loop]
+
+    async def refresh_async(self, stale_token=None) -> str:
+        # Tasks queue on the asyncio lock, so only one of them occupies a thread for the refresh.
+        async with self.async_lock():
+            if stale_token is not None and self.access_token != stale_token:
+                return self.access_token
+            if stale_token is None and not self.expired():
+                return self.access_token
+            return await asyncio.to_thread(self.refresh, stale_token)
+
+    async def token_async(self) -> str:
+        if self.expired():
+            return await self.refresh_async()
+        return self.access_token
+
+    async def headers_async(self) -> dict:
+        return {"Authorization": f"Bearer {await self.token_async()}"}
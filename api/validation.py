@@ -0,0 +1,173 @@
+import asyncio
+from collections import Counter, defaultdict
+
+from matcher import normalize
+from metrics import log
+from processors import MATCH_FIELDS, MATCH_THRESHOLD
+
+# Release years further apart than this disagree. Spotify often dates an album by its
+# remaster or reissue, so only the year filtered re-query can settle those.
+YEAR_TOLERANCE = 2
+# match_confidence = match_score * the penalty of every flag.
+PENALTIES = {"low_score": 0.8, "artist_collision": 0.5, "year_mismatch": 0.75}
+# Alternative queries for flagged items, best confidence wins.
+REQUERY_TIERS = (("fielded_year", 10), ("title", 20), ("free_text", 50))
+
+
+class MatchValidator:
+    """
+    In memory version of sql/analysis/scuffed_ids.sql plus two more checks. Flags matches
+    with a score under the threshold, Spotify artist IDs shared by different raw artists
+    and release years that disagree with the Rolling Stones year. Only the flagged items
+    are searched again.
+    """
+
+    def __init__(self, threshold=MATCH_THRESHOLD, year_tolerance=YEAR_TOLERANCE):
+        self.threshold = threshold
+        self.year_tolerance = year_tolerance
+
+    @staticmethod
+    def raw_artists_by_id(rs_items) -> dict:
+        """
+        key: Spotify artist ID, value: Counter of the normalized raw artists matched to it.
+        """
+        raw_artists = defaultdict(Counter)
+        for rs_item in rs_items:
+            for artist_id in rs_item.artist_ids:
+                raw_artists[artist_id][normalize(rs_item.raw_artist)] += 1
+        return raw_artists
+
+    @staticmethod
+    def collides(raw_artist, raw_artists: Counter) -> bool:
+        """
+        True when the ID mostly belongs to another artist. Both names are normalized, so
+        whole tokens are compared: "Jay-Z & Kanye West" next to "Jay-Z" is a collaboration,
+        "X" next to "The xx" is not.
+        """
+        main_artist, _ = raw_artists.most_common(1)[0]
+        tokens, main_tokens = set(raw_artist.split()), set(main_artist.split())
+        return not (tokens <= main_tokens or main_tokens <= tokens)
+
+    def flags(self, rs_item, raw_artists_by_id) -> list:
+        if not rs_item.album_id:
+            return ["low_score"]
+
+        flags = list()
+        if rs_item.match_score < self.threshold:
+            flags.append("low_score")
+        raw_artist = normalize(rs_item.raw_artist)
+        if any(
+            self.collides(raw_artist, raw_artists_by_id[artist_id])
+            for artist_id in rs_item.artist_ids
+            if artist_id in raw_artists_by_id
+        ):
+            flags.append("artist_collision")
+        if (
+            rs_item.released_year
+            and rs_item.spotify_year
+            and abs(int(rs_item.released_year) - rs_item.spotify_year) > self.year_tolerance
+        ):
+            flags.append("year_mismatch")
+        return flags
+
+    @staticmethod
+    def confidence(match_score, flags) -> float:
+        confidence = match_score
+        for flag in flags:
+            confidence *= PENALTIES[flag]
+        return round(confidence, 4)
+
+    def validate(self, rs_items) -> list:
+        """
+        Sets match_confidence and match_flags on every item, returns the flagged ones.
+        """
+        raw_artists_by_id = self.raw_artists_by_id(rs_items)
+        flagged = list()
+        for rs_item in rs_items:
+            rs_item.match_flags = self.flags(rs_item, raw_artists_by_id)
+            rs_item.match_confidence = self.confidence(rs_item.match_score, rs_item.match_flags)
+            if rs_item.match_flags:
+                flagged.append(rs_item)
+
+        counts = Counter(flag for rs_item in flagged for flag in rs_item.match_flags)
+        log(f"{len(flagged)} of {len(rs_items)} matches flagged: {dict(counts)}")
+        return flagged
+
+    def flags_for(self, rs_item, result, raw_artists_by_id) -> list:
+        """
+        Flags the item would get with "result" as its match. The item is left as it was:
+        set_search_results keeps the old IDs for empty ones, so it can't restore an unmatched
+        item and the fields are put back directly.
+        """
+        current = {name: getattr(rs_item, name) for name in MATCH_FIELDS}
+        rs_item.set_search_results(*result)
+        try:
+            return self.flags(rs_item, raw_artists_by_id)
+        finally:
+            for name, value in current.items():
+                setattr(rs_item, name, value)
+
+    async def requery_item(self, rs_item, client, raw_artists_by_id) -> bool:
+        """
+        Tries the alternative queries until one gives an unflagged match and keeps the most
+        confident one, if it beats the current match.
+        """
+        best_result, best_confidence = None, rs_item.match_confidence
+        for tier, limit in REQUERY_TIERS:
+            result = await rs_item.fetch_search_api_async(
+                search_term=rs_item.search_term,
+                search_type=rs_item.data_type,
+                client=client,
+                tiers=[(tier, limit)],
+            )
+            if not result[1]:
+                continue
+            flags = self.flags_for(rs_item, result, raw_artists_by_id)
+            confidence = self.confidence(result[4], flags)
+            if confidence > best_confidence:
+                best_result, best_confidence = result, confidence
+            if not flags:
+                break
+
+        if best_result is None:
+            return False
+        rs_item.set_search_results(*best_result)
+        return True
+
+    @staticmethod
+    def pending(flagged, journal=None) -> list:
+        """
+        The flagged items not searched again yet, by this run or (incremental) a previous
+        run for the same record.
+        """
+        if journal is None:
+            return list(flagged)
+        return [rs_item for rs_item in flagged if not journal.was_requeried(rs_item)]
+
+    async def requery(self, rs_items, flagged, client, journal=None) -> list:
+        """
+        Searches the pending flagged items again, concurrently, and validates the full list
+        once more. Collisions are judged against the unflagged items, the flagged ones are the
+        suspects. Returns the items whose match changed.
+        """
+        suspects = set(flagged)
+        raw_artists_by_id = self.raw_artists_by_id(
+            [rs_item for rs_item in rs_items if rs_item not in suspects]
+        )
+        pending = self.pending(flagged, journal)
+        changed = await asyncio.gather(
+            *(self.requery_item(rs_item, client, raw_artists_by_id) for rs_item in pending)
+        )
+        changed = [rs_item for rs_item, is_changed in zip(pending, changed) if is_changed]
+        if journal:
+            for rs_item in changed:
+                journal.record_item(rs_item)
+            for rs_item in pending:
+                journal.record_requery(rs_item)
+
+        log(
+            f"Re-queried {len(pending)} flagged matches ({len(flagged) - len(pending)} "
+            f"already re-queried before), {len(changed)} changed."
+        )
+        self.validate(rs_items)
+        return changed
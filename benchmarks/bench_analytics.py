@@ -0,0 +1,209 @@
+import argparse
+import os
+import pathlib
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+from analytics import REPORTS, GenreIndex  # noqa: E402
+from processors import (  # noqa: E402
+    Albums,
+    Artists,
+    RollingStonesItem,
+    RollingStonesMasterData,
+    Tracks,
+)
+
+SQL_FOLDER_PATH = os.path.join(ROOT_DIR_PATH, "sql", "analysis")
+
+
+def synthetic_master_data(number_of_artists, seed=42):
+    """
+    Artists with a mix of the report genres and 2000 others; 500 ranked albums and 500
+    ranked tracks (the rs_master_data items), the rest unranked.
+    """
+    rng = random.Random(seed)
+    genres = [genre for _, report_genres in REPORTS.values() for genre in report_genres]
+    genres = sorted(set(genres)) + [f"genre {i}" for i in range(2000)]
+    number_of_albums, number_of_tracks = number_of_artists * 3, number_of_artists * 10
+
+    artists = [
+        Artists(
+            artist_id=f"artist{i:016d}",
+            artist_name=f"Artist {rng.randint(0, number_of_artists)}",
+            albums=[f"album{(i + j * number_of_artists):017d}" for j in range(3)],
+            genres=rng.sample(genres[:9], rng.randint(0, 2)) + rng.sample(genres[9:], 3),
+            total_followers=rng.randint(0, 10**7),
+            popularity=rng.randint(0, 100),
+            external_url="",
+            uri=f"spotify:artist:{i}",
+        )
+        for i in range(number_of_artists)
+    ]
+    ranked_albums = set(rng.sample(range(number_of_albums), 500))
+    albums = [
+        Albums(
+            album_id=f"album{i:017d}",
+            album_name=f"Album {i}",
+            rs_rank=rng.randint(1, 500) if i in ranked_albums else 0,
+            popularity=rng.randint(0, 100),
+            total_tracks=10,
+            label=f"Label {i % 300}",
+            released_year=rng.randint(1950, 2024),
+            album_image="",
+            external_url="",
+            uri=f"spotify:album:{i}",
+            artist_ids=[artists[i % number_of_artists].artist_id],
+        )
+        for i in range(number_of_albums)
+    ]
+    ranked_tracks = set(rng.sample(range(number_of_tracks), 500))
+    tracks = [
+        Tracks(
+            track_id=f"{i:022d}",
+            track_name=f"Track {i}",
+            artist_ids=[artists[i % number_of_artists].artist_id]
+            + ([artists[(i * 7) % number_of_artists].artist_id] if i % 5 == 0 else []),
+            rs_rank=rng.randint(1, 500) if i in ranked_tracks else 0,
+            is_explicit=bool(i % 2),
+            popularity=rng.randint(0, 100),
+            duration_ms=rng.randint(120000, 420000),
+            track_number_on_album=1,
+            external_url="",
+            uri=f"spotify:track:{i}",
+            released_year=rng.randint(1950, 2024),
+            album_id=albums[i % number_of_albums].album_id,
+        )
+        for i in range(number_of_tracks)
+    ]
+    rs_items = list()
+    for track in tracks:
+        if track.rs_rank:
+            rs_item = RollingStonesItem(
+                raw_artist="",
+                description=f"Description of {track.track_name}",
+                rs_rank=track.rs_rank,
+                released_year=track.released_year,
+                raw_title=track.track_name,
+                data_type="track",
+                writers="",
+            )
+            rs_item.set_search_results(track.track_id, track.album_id, track.artist_ids)
+            rs_items.append(rs_item)
+    return RollingStonesMasterData(
+        rs_master_data=rs_items, tracks=tracks, albums=albums, artists=artists
+    )
+
+
+def frames_of(master_data) -> dict:
+    return {
+        name: pd.DataFrame([row.write_as_dict() for row in getattr(master_data, name)])
+        for name in ("rs_master_data", "tracks", "albums", "artists")
+    }
+
+
+def pandas_report(frames, name) -> pd.DataFrame:
+    """
+    The plan of the SQL as a full scan in pandas: explode the genre and album/artist lists
+    of every row, filter on the genres, join.
+    """
+    kind, genres = REPORTS[name]
+    artists = frames["artists"].assign(number_of_albums=frames["artists"]["albums"].str.len())
+    artist_genres = artists.explode("genres")
+    artist_genres = artist_genres[artist_genres["genres"].isin(genres)]
+    filter_genres = artist_genres.groupby("artist_id")["genres"].agg(list).rename("filter_genres")
+    artists = artists[
+        ["artist_id", "artist_name", "albums", "number_of_albums", "total_followers", "popularity"]
+    ]
+    matched = artists.join(filter_genres, on="artist_id", how="inner")
+
+    if kind == "albums":
+        albums = frames["albums"].rename(columns={"rs_rank": "album_ranking"})
+        albums = albums[albums["album_ranking"] > 0]
+        result = matched.explode("albums").merge(
+            albums, left_on="albums", right_on="album_id", suffixes=("", "_album")
+        )
+        return result.sort_values("album_ranking", ascending=False, kind="stable")
+
+    tracks = frames["tracks"].rename(columns={"rs_rank": "track_ranking"})
+    tracks = tracks.merge(frames["rs_master_data"][["track_id", "description"]], on="track_id")
+    tracks = tracks.explode("artist_ids").merge(
+        frames["albums"][["album_id", "album_name", "rs_rank"]].rename(
+            columns={"rs_rank": "album_ranking"}
+        ),
+        on="album_id",
+    )
+    result = matched.merge(
+        tracks, left_on="artist_id", right_on="artist_ids", suffixes=("", "_track")
+    )
+    return result.sort_values(["artist_name", "track_ranking"], ascending=[True, False])
+
+
+def sql_report(dsn, name):
+    import psycopg
+
+    with open(os.path.join(SQL_FOLDER_PATH, f"{name}.sql"), encoding="utf-8") as sql_file:
+        query = sql_file.read()
+    with psycopg.connect(dsn) as connection:
+        start = time.perf_counter()
+        rows = connection.execute(query).fetchall()
+        return (time.perf_counter() - start, len(rows))
+
+
+def timed(function, *args, repeat=5):
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return (float(np.median(timings)), result)
+
+
+def main(number_of_artists, dsn):
+    master_data = synthetic_master_data(number_of_artists)
+    print(
+        f"{len(master_data.artists):,} artists, {len(master_data.albums):,} albums, "
+        f"{len(master_data.tracks):,} tracks"
+    )
+
+    start = time.perf_counter()
+    index = GenreIndex.from_master_data(master_data)
+    print(f"build genre index  {time.perf_counter() - start:8.2f}s")
+    frames = frames_of(master_data)
+
+    if dsn:
+        from loader import load_master_data
+
+        load_master_data(master_data=master_data, dsn=dsn, mode="replace")
+
+    for name in REPORTS:
+        index_time, index_result = timed(index.report, name)
+        pandas_time, pandas_result = timed(pandas_report, frames, name, repeat=1)
+        assert len(index_result) == len(pandas_result), name
+        line = (
+            f"{name:<18} index {index_time * 1000:8.2f}ms ({len(index_result)} rows)"
+            f"  pandas scan {pandas_time * 1000:8.1f}ms ({len(pandas_result)} rows)"
+        )
+        if dsn:
+            sql_time, sql_rows = sql_report(dsn, name)
+            line += f"  postgres {sql_time * 1000:8.1f}ms ({sql_rows} rows)"
+        print(line)
+
+    start = time.perf_counter()
+    index.best_tracks(["genre 1", "genre 2", "genre 3", "pop"])
+    print(f"any genre set      index {(time.perf_counter() - start) * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artists", type=int, default=20_000)
+    parser.add_argument(
+        "--dsn", help="Also load the data into Postgres and time the sql/analysis queries."
+    )
+    args = parser.parse_args()
+    main(number_of_artists=args.artists, dsn=args.dsn)
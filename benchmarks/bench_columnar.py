@@ -0,0 +1,66 @@
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+import pyarrow as pa
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "benchmarks"))
+from bench_exporters import synthetic_tracks  # noqa: E402
+from columnar import read_table, to_pandas, write_arrow, write_parquet  # noqa: E402
+from exporters import stream_csv  # noqa: E402
+
+
+def measure(loader, file_name):
+    """
+    Load time, peak Python memory (tracemalloc) and Arrow memory (buffers allocated by Arrow,
+    a memory mapped file shows up as neither).
+    """
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame = loader(file_name)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_bytes = pa.total_allocated_bytes() - arrow_before
+    assert len(frame)
+    return (elapsed, peak, arrow_bytes)
+
+
+def main(sizes):
+    loaders = {
+        "csv (pd.read_csv)": ("csv", pd.read_csv),
+        "parquet": ("parquet", lambda file_name: to_pandas(read_table(file_name))),
+        "arrow ipc (mmap)": ("arrow", lambda file_name: to_pandas(read_table(file_name))),
+    }
+    writers = {"csv": stream_csv, "parquet": write_parquet, "arrow": write_arrow}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for number_of_rows in sizes:
+            print(f"\n{number_of_rows:,} rows")
+            for extension, writer in writers.items():
+                file_name = os.path.join(temp_dir, f"tracks.{extension}")
+                writer(synthetic_tracks(number_of_rows), file_name)
+
+            for label, (extension, loader) in loaders.items():
+                file_name = os.path.join(temp_dir, f"tracks.{extension}")
+                elapsed, peak, arrow_bytes = measure(loader, file_name)
+                size = os.path.getsize(file_name) / 2**20
+                print(
+                    f"{label:<18} {elapsed:8.3f}s  peak memory: {peak / 2**20:8.1f}MB"
+                    f"  arrow: {arrow_bytes / 2**20:8.1f}MB  file: {size:8.1f}MB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 100_000, 1_000_000])
+    args = parser.parse_args()
+    main(sizes=args.sizes)
@@ -0,0 +1,114 @@
+import argparse
+import os
+import pathlib
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+from processors import RollingStonesMasterData, Tracks  # noqa: E402
+
+
+# Tracks as it was before: no slots, __eq__ against ID strings and therefore no __hash__.
+@dataclass
+class LegacyTracks:
+    track_id: str
+    track_name: str
+    artist_ids: list
+    rs_rank: int
+    is_explicit: bool
+    popularity: int
+    duration_ms: int
+    track_number_on_album: int
+    external_url: str
+    uri: str
+    released_year: int
+    album_id: str
+
+    def __eq__(self, other):
+        if isinstance(other, LegacyTracks):
+            return other.track_id == self.track_id
+        elif isinstance(other, str):
+            return other == self.track_id
+        return False
+
+
+def build_rows(cls, number_of_rows):
+    return [
+        cls(
+            track_id=f"{i:022d}",
+            track_name=f"Track name {i}",
+            artist_ids=[f"artist{i % 5000:016d}"],
+            rs_rank=i % 500,
+            is_explicit=bool(i % 2),
+            popularity=i % 100,
+            duration_ms=180000 + i % 60000,
+            track_number_on_album=i % 12 + 1,
+            external_url=f"https://open.spotify.com/track/{i:022d}",
+            uri=f"spotify:track:{i:022d}",
+            released_year=1950 + i % 75,
+            album_id=f"album{i % 20000:017d}",
+        )
+        for i in range(number_of_rows)
+    ]
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (result, current)
+
+
+def time_lookups(lookup, ids):
+    start = time.perf_counter()
+    for spotify_id in ids:
+        lookup(spotify_id)
+    return (time.perf_counter() - start) / len(ids)
+
+
+def main(sizes, linear_lookups, index_lookups):
+    for number_of_rows in sizes:
+        print(f"\n{number_of_rows:,} rows")
+        legacy_rows, legacy_memory = measure_memory(
+            lambda: build_rows(LegacyTracks, number_of_rows)
+        )
+        _, rows_memory = measure_memory(lambda: build_rows(Tracks, number_of_rows))
+        master_data, slotted_memory = measure_memory(
+            lambda: RollingStonesMasterData(tracks=build_rows(Tracks, number_of_rows))
+        )
+        print(f"legacy list (no slots)      memory: {legacy_memory / 2**20:9.1f}MB")
+        print(f"slotted list                memory: {rows_memory / 2**20:9.1f}MB")
+        print(f"slotted + indexed table     memory: {slotted_memory / 2**20:9.1f}MB")
+
+        rng = random.Random(42)
+        ids = [f"{rng.randrange(number_of_rows):022d}" for _ in range(index_lookups)]
+        linear = time_lookups(
+            lambda spotify_id: legacy_rows[legacy_rows.index(spotify_id)],
+            ids[:linear_lookups],
+        )
+        indexed = time_lookups(master_data.track_by_id.__getitem__, ids)
+        by_album = time_lookups(
+            lambda spotify_id: master_data.tracks_by_album.get(f"album{int(spotify_id) % 20000:017d}"),
+            ids,
+        )
+        print(f"linear scan lookup          {linear * 1e6:12.2f}us")
+        print(f"track_by_id lookup          {indexed * 1e6:12.2f}us")
+        print(f"tracks_by_album lookup      {by_album * 1e6:12.2f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1_000_000])
+    parser.add_argument("--linear-lookups", type=int, default=20)
+    parser.add_argument("--index-lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    main(
+        sizes=args.sizes,
+        linear_lookups=args.linear_lookups,
+        index_lookups=args.index_lookups,
+    )
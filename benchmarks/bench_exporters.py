@@ -0,0 +1,89 @@
+import argparse
+import csv
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+from exporters import stream_csv, stream_json, stream_jsonl  # noqa: E402
+from processors import Tracks  # noqa: E402
+
+
+def synthetic_tracks(number_of_rows):
+    for i in range(number_of_rows):
+        yield Tracks(
+            track_id=f"{i:022d}",
+            track_name=f"Track name {i}",
+            artist_ids=[f"artist{i % 5000:016d}", f"artist{i % 777:016d}"],
+            rs_rank=i % 500,
+            is_explicit=bool(i % 2),
+            popularity=i % 100,
+            duration_ms=180000 + i % 60000,
+            track_number_on_album=i % 12 + 1,
+            external_url=f"https://open.spotify.com/track/{i:022d}",
+            uri=f"spotify:track:{i:022d}",
+            released_year=1950 + i % 75,
+            album_id=f"album{i % 20000:017d}",
+        )
+
+
+# The exporters as they were before streaming: full list of rows first, then one write.
+def legacy_csv(rows, file_name):
+    rows = list(rows)
+    csv_data = [item.write_to_csv() for item in rows]
+    with open(file_name, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=rows[0].get_field_names())
+        writer.writeheader()
+        writer.writerows(csv_data)
+
+
+def legacy_json(rows, file_name):
+    json_data = [item.write_as_dict() for item in rows]
+    with open(file_name, "w", encoding="utf-8") as jsonFile:
+        json.dump(json_data, jsonFile, indent=4, sort_keys=True)
+
+
+def measure(writer, number_of_rows, file_name):
+    start = time.perf_counter()
+    writer(synthetic_tracks(number_of_rows), file_name)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    writer(synthetic_tracks(number_of_rows), file_name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (elapsed, peak)
+
+
+def main(sizes):
+    writers = {
+        "legacy csv": (legacy_csv, "csv"),
+        "stream csv": (stream_csv, "csv"),
+        "legacy json": (legacy_json, "json"),
+        "stream json (orjson)": (stream_json, "json"),
+        "stream jsonl": (stream_jsonl, "jsonl"),
+        "stream jsonl.gz": (stream_jsonl, "jsonl.gz"),
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for number_of_rows in sizes:
+            print(f"\n{number_of_rows:,} rows")
+            for label, (writer, extension) in writers.items():
+                file_name = os.path.join(temp_dir, f"tracks.{extension}")
+                elapsed, peak = measure(writer, number_of_rows, file_name)
+                size = os.path.getsize(file_name) / 2**20
+                print(
+                    f"{label:<22} {elapsed:8.2f}s  peak memory: {peak / 2**20:9.1f}MB  file: {size:8.1f}MB"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1_000_000])
+    args = parser.parse_args()
+    main(sizes=args.sizes)
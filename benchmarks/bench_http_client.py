@@ -0,0 +1,60 @@
+import argparse
+import os
+import pathlib
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(pathlib.Path(__file__).parent.parent.resolve(), "api"))
+from client import SpotifyClient  # noqa: E402
+
+
+def time_requests(fetch, url, number_of_requests):
+    timings = list()
+    for _ in range(number_of_requests):
+        start = time.perf_counter()
+        fetch(url)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    total = sum(timings)
+    first = timings[0] * 1000
+    rest = sum(timings[1:]) / max(len(timings) - 1, 1) * 1000
+    print(
+        f"{label:<24} total: {total:6.2f}s  first: {first:7.1f}ms  avg after first: {rest:7.1f}ms"
+    )
+
+
+def main(url, number_of_requests):
+    """
+    Before/after timing of the module level requests.get (new TCP+TLS handshake per call)
+    against the pooled SpotifyClient session (one handshake, then keep-alive).
+    No token is needed, a 401 response still pays the full connection cost.
+    """
+    before = time_requests(
+        fetch=lambda u: requests.get(url=u, timeout=30),
+        url=url,
+        number_of_requests=number_of_requests,
+    )
+    client = SpotifyClient(auth_headers={})
+    after = time_requests(
+        fetch=lambda u: client.session.get(url=u, timeout=client.timeout),
+        url=url,
+        number_of_requests=number_of_requests,
+    )
+    client.close()
+
+    report("requests.get", before)
+    report("SpotifyClient (pooled)", after)
+    print(f"Speed up: {sum(before) / sum(after):.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="https://api.spotify.com/v1/markets")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    main(url=args.url, number_of_requests=args.requests)
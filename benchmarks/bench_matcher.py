@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import pathlib
+import random
+import sys
+import time
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+from matcher import SCORERS, normalize  # noqa: E402
+
+DECORATIONS = [
+    "{}",
+    "{} (Remastered)",
+    "{} - Remastered 2009",
+    "{} [Deluxe Edition]",
+    "{} (50th Anniversary Edition)",
+    "{} - Mono Version",
+]
+
+
+def build_cases(records, distractors=4, seed=42):
+    """
+    One case per scraped record: the search term as fetch_search_api sends it, the true
+    "<artist> <title>" decorated like Spotify names re-releases, plus other records as distractors.
+    Same artist titles are preferred as distractors, they are the hard ones.
+    """
+    rng = random.Random(seed)
+    by_artist = dict()
+    for record in records:
+        by_artist.setdefault(record["artist"], []).append(record)
+
+    cases = list()
+    for record in records:
+        query = f"{record['artist']} {record['title']}".replace("’", "")
+        truth = rng.choice(DECORATIONS).format(f"{record['artist']} {record['title']}")
+        same_artist = [r for r in by_artist[record["artist"]] if r is not record]
+        others = same_artist[:distractors] + rng.sample(records, distractors)
+        candidates = [f"{r['artist']} {r['title']}" for r in others[:distractors]]
+        candidates = [c for c in candidates if c != f"{record['artist']} {record['title']}"]
+        candidates.insert(rng.randrange(len(candidates) + 1), truth)
+        cases.append((query, candidates, candidates.index(truth)))
+    return cases
+
+
+def run_scorer(scorer, cases, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        # Cold caches, every repeat pays the normalization cost again.
+        normalize.cache_clear()
+        if hasattr(scorer, "ngram_buckets"):
+            scorer.ngram_buckets.cache_clear()
+        start = time.perf_counter()
+        predictions = list()
+        for query, candidates, _ in cases:
+            scores = scorer(query, candidates)
+            predictions.append(max(range(len(scores)), key=scores.__getitem__))
+        best = min(best, time.perf_counter() - start)
+
+    correct = sum(p == truth for p, (_, _, truth) in zip(predictions, cases))
+    return (best, correct / len(cases))
+
+
+def main(data_path, accuracy_target, repeat):
+    records = json.load(open(data_path, encoding="utf-8"))
+    cases = build_cases(records=records)
+    print(f"{len(cases)} queries from {data_path}\n")
+
+    results = dict()
+    for name, scorer in SCORERS.items():
+        elapsed, accuracy = run_scorer(scorer=scorer, cases=cases, repeat=repeat)
+        results[name] = (elapsed, accuracy)
+        print(
+            f"{name:<14} {elapsed * 1000:9.1f}ms  {elapsed / len(cases) * 1e6:8.1f}us/query  accuracy: {accuracy:.3f}"
+        )
+
+    passing = [name for name, (_, accuracy) in results.items() if accuracy >= accuracy_target]
+    if passing:
+        fastest = min(passing, key=lambda name: results[name][0])
+        print(f"\nFastest scorer with accuracy >= {accuracy_target}: {fastest}")
+    else:
+        print(f"\nNo scorer reached accuracy {accuracy_target}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--data",
+        default=os.path.join(ROOT_DIR_PATH, "data", "rolling_stones_master_data.json"),
+    )
+    parser.add_argument("--accuracy-target", type=float, default=0.95)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(data_path=args.data, accuracy_target=args.accuracy_target, repeat=args.repeat)
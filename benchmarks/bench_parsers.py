@@ -0,0 +1,113 @@
+import argparse
+import glob
+import os
+import pathlib
+import resource
+import subprocess
+import sys
+import time
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "webscrapers"))
+from parsers import BACKENDS, extract_slides  # noqa: E402
+
+
+def load_pages(pages_dir):
+    pages = list()
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        with open(path, encoding="utf-8") as page_file:
+            pages.append(page_file.read())
+    return pages
+
+
+def time_backend(backend, pages, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            extract_slides(page, backend=backend)
+    return (time.perf_counter() - start) / (rounds * len(pages))
+
+
+def max_rss() -> int:
+    """
+    Peak resident memory in bytes. On Linux ru_maxrss survives exec, the child would start
+    with the peak of this (already parsing) process, so VmHWM of the own address space is used.
+    """
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status", encoding="utf-8") as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    # Bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_rss(backend, pages_dir):
+    """
+    Runs in the subprocess of peak_memory: prints the peak resident memory before and after
+    parsing every page.
+    """
+    pages = load_pages(pages_dir)
+    before = max_rss()
+    for page in pages:
+        extract_slides(page, backend=backend)
+    print(before, max_rss())
+
+
+def peak_memory(backend, pages_dir) -> int:
+    """
+    Growth of the peak resident memory while parsing, each backend in a fresh process.
+    tracemalloc only sees Python's allocator, not the libxml2 or lexbor trees.
+    """
+    output = subprocess.run(
+        [sys.executable, __file__, pages_dir, "--measure-rss", backend],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    before, after = map(int, output.split())
+    return after - before
+
+
+def main(pages_dir, rounds, backends):
+    pages = load_pages(pages_dir)
+    if not pages:
+        print(f"No saved page sources (*.html) found in {pages_dir}")
+        return
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / 2**20:.1f}MB of HTML")
+
+    # Every backend has to find the same slides as the full html.parser run.
+    expected = [extract_slides(page, backend="html.parser") for page in pages]
+    for backend in backends:
+        slides = [extract_slides(page, backend=backend) for page in pages]
+        stripped = [
+            [{k: v.strip() if v else v for k, v in slide.items()} for slide in page]
+            for page in slides
+        ]
+        matches = stripped == [
+            [{k: v.strip() if v else v for k, v in slide.items()} for slide in page]
+            for page in expected
+        ]
+        per_page = time_backend(backend, pages, rounds)
+        peak = peak_memory(backend, pages_dir)
+        print(
+            f"{backend:<12} {per_page * 1e3:9.2f}ms/page  peak RSS +{peak / 2**20:7.1f}MB  "
+            f"same output: {matches}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Parse time and memory per page of every parser backend."
+    )
+    parser.add_argument(
+        "pages_dir", help="Directory with saved page sources (*.html) of the gallery."
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--measure-rss", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure_rss:
+        measure_rss(args.measure_rss, args.pages_dir)
+        sys.exit()
+    main(pages_dir=args.pages_dir, rounds=args.rounds, backends=args.backends)
@@ -0,0 +1,137 @@
+import argparse
+import os
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+from processors import Albums, Artists, RollingStonesMasterData, Tracks  # noqa: E402
+from recommender import Recommender  # noqa: E402
+
+
+def synthetic_master_data(number_of_artists, seed=42):
+    rng = random.Random(seed)
+    genres = [f"genre {i}" for i in range(400)]
+    artists = [
+        Artists(
+            artist_id=f"artist{i:016d}",
+            artist_name=f"Artist {i}",
+            albums=[],
+            genres=rng.sample(genres, rng.randint(0, 6)) or ["NONE"],
+            total_followers=rng.randint(0, 10**7),
+            popularity=rng.randint(0, 100),
+            external_url="",
+            uri="",
+        )
+        for i in range(number_of_artists)
+    ]
+    albums = [
+        Albums(
+            album_id=f"album{i:017d}",
+            album_name=f"Album {i}",
+            rs_rank=0,
+            popularity=rng.randint(0, 100),
+            total_tracks=10,
+            label="",
+            released_year=rng.randint(1950, 2024),
+            album_image="",
+            external_url="",
+            uri="",
+            artist_ids=[artists[i % number_of_artists].artist_id],
+        )
+        for i in range(number_of_artists * 2)
+    ]
+    tracks = [
+        Tracks(
+            track_id=f"{i:022d}",
+            track_name=f"Track {i}",
+            artist_ids=[artists[i % number_of_artists].artist_id],
+            rs_rank=0,
+            is_explicit=bool(i % 2),
+            popularity=rng.randint(0, 100),
+            duration_ms=rng.randint(120000, 420000),
+            track_number_on_album=1,
+            external_url="",
+            uri="",
+            released_year=rng.randint(1950, 2024),
+            album_id=albums[i % len(albums)].album_id,
+        )
+        for i in range(number_of_artists * 5)
+    ]
+    return RollingStonesMasterData(artists=artists, albums=albums, tracks=tracks)
+
+
+def python_loop_recommend(index, item_id, k):
+    # Per pair cosine in Python, what the vectorized scoring replaces.
+    position = index.positions[item_id]
+    vectors = np.hstack([index.genres.toarray(), index.numeric]).tolist()
+    query = vectors[position]
+    scores = [
+        (sum(a * b for a, b in zip(query, vector)), i)
+        for i, vector in enumerate(vectors)
+        if i != position
+    ]
+    return sorted(scores, reverse=True)[:k]
+
+
+def time_queries(recommender, ids, k):
+    timings = list()
+    for item_id in ids:
+        start = time.perf_counter()
+        recommender.recommend(item_id, k=k)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(np.array(timings) * 1000, [50, 99])
+
+
+def main(number_of_artists, queries, k):
+    master_data = synthetic_master_data(number_of_artists)
+    print(
+        f"{len(master_data.artists):,} artists, {len(master_data.tracks):,} tracks, "
+        f"{len(master_data.albums):,} albums"
+    )
+
+    start = time.perf_counter()
+    recommender = Recommender.build(master_data)
+    print(f"build                      {time.perf_counter() - start:8.2f}s")
+
+    rng = random.Random(0)
+    artist_ids = rng.sample([artist.artist_id for artist in master_data.artists], queries)
+    track_ids = rng.sample([track.track_id for track in master_data.tracks], queries)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        recommender.save(temp_dir)
+        size = sum(
+            os.path.getsize(os.path.join(folder, name))
+            for folder, _, names in os.walk(temp_dir)
+            for name in names
+        )
+        print(f"index on disk              {size / 2**20:8.1f}MB")
+
+        start = time.perf_counter()
+        mapped = Recommender.load(temp_dir, mmap=True)
+        print(f"load (mmap)                {(time.perf_counter() - start) * 1000:8.1f}ms")
+
+        for label, ids in (("artist", artist_ids), ("track", track_ids)):
+            p50, p99 = time_queries(mapped, ids, k)
+            print(f"{label + ' query (mmap)':<27}p50 {p50:7.2f}ms  p99 {p99:7.2f}ms")
+
+        del mapped
+
+    index = recommender.indexes["artists"]
+    start = time.perf_counter()
+    python_loop_recommend(index, artist_ids[0], k)
+    print(f"artist query (python loop) {(time.perf_counter() - start) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artists", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    main(number_of_artists=args.artists, queries=args.queries, k=args.k)
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from unittest.mock import patch
+
+from mock_spotify import MockSpotify, MockSpotifyServer
+
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+RESULTS_DIR_PATH = os.path.join(ROOT_DIR_PATH, "benchmarks", "results")
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+from client import SpotifyClient  # noqa: E402
+from fetch_data import (  # noqa: E402
+    spotfiy_pipeline_results,
+    spotfiy_search_results,
+    spotfiy_search_results_async,
+)
+from matcher import SCORERS, best_match, normalize  # noqa: E402
+from metrics import METRICS  # noqa: E402
+from processors import ApiSearchProcessor  # noqa: E402
+
+# Higher is better for these metrics, lower for the rest.
+THROUGHPUT_METRICS = ("items_per_second",)
+
+
+def synthetic_records(number_of_records):
+    # One word artists: the mock splits the search term into artist and title at the first space.
+    return [
+        {
+            "artist": f"Artist{i % 211}",
+            "title": f"Title number {i}",
+            "rank": i % 500 + 1,
+            "released_year": 1950 + i % 75,
+            "type": "track" if i % 2 else "album",
+            "writers": f"Writer {i % 97}",
+            "description": "",
+        }
+        for i in range(number_of_records)
+    ]
+
+
+def load_records(input_path, number_of_records):
+    if input_path is None:
+        return synthetic_records(number_of_records)
+    with open(input_path, encoding="utf-8") as input_file:
+        return json.load(input_file)[:number_of_records]
+
+
+class StageTimer:
+    """
+    Times one stage and records the mock requests it caused.
+    """
+
+    def __init__(self, results, name, mock=None):
+        self.results = results
+        self.name = name
+        self.mock = mock
+
+    def __enter__(self):
+        self.requests = sum(self.mock.requests.values()) if self.mock else 0
+        self.throttled = sum(self.mock.throttled.values()) if self.mock else 0
+        self.bytes = sum(self.mock.response_bytes.values()) if self.mock else 0
+        self.start = time.perf_counter()
+        self.items = 0
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        result = {"seconds": round(seconds, 4), "items": self.items}
+        if self.items:
+            result["items_per_second"] = round(self.items / seconds, 2)
+        if self.mock:
+            result["requests"] = sum(self.mock.requests.values()) - self.requests
+            result["throttled"] = sum(self.mock.throttled.values()) - self.throttled
+            result["response_bytes"] = sum(self.mock.response_bytes.values()) - self.bytes
+        self.results[self.name] = result
+        print(
+            f"{self.name:<24} {seconds:8.3f}s  {self.items:>7} items  "
+            f"{result.get('requests', '-'):>5} requests  {result.get('throttled', '-'):>4} throttled"
+            + (f"  {result['response_bytes'] / 1024:9.1f}KB" if self.mock else "")
+        )
+
+
+def bench_enrichment(results, server, records, concurrency, rate_limit):
+    client = SpotifyClient(auth_headers={}, base_url=server.base_url)
+
+    with StageTimer(results, "search_sync", server.mock) as stage:
+        master_data, search_results = spotfiy_search_results(records, client=client)
+        stage.items = len(records)
+    tiers = Counter(rs_item.search_tier for rs_item in master_data.rs_master_data)
+    results["search_sync"]["search_tiers"] = dict(tiers)
+    print(f"{'':<24} resolved by tier: {dict(tiers)}")
+
+    # The planner against one blanket free text query with the widest limit.
+    blanket_tiers = ApiSearchProcessor.search_tiers[-1:]
+    with StageTimer(results, "search_blanket_limit", server.mock) as stage:
+        with patch.object(ApiSearchProcessor, "search_tiers", blanket_tiers):
+            spotfiy_search_results(records, client=client)
+        stage.items = len(records)
+
+    for endpoint in ("tracks", "albums", "artists"):
+        with StageTimer(results, f"batch_{endpoint}", server.mock) as stage:
+            rows = getattr(search_results, f"fetch_batch_{endpoint}")()
+            setattr(master_data, endpoint, rows)
+            stage.items = len(rows)
+
+    with StageTimer(results, "search_async", server.mock) as stage:
+        asyncio.run(
+            spotfiy_search_results_async(
+                records, client=client, concurrency=concurrency, rate_limit=rate_limit
+            )
+        )
+        stage.items = len(records)
+
+    with StageTimer(results, "pipeline", server.mock) as stage:
+        asyncio.run(
+            spotfiy_pipeline_results(
+                records, client=client, concurrency=concurrency, rate_limit=rate_limit
+            )
+        )
+        stage.items = len(records)
+
+    client.close()
+    return master_data
+
+
+def bench_matcher(results, records, repeat):
+    cases = [
+        (
+            f"{record['artist']} {record['title']}",
+            [
+                f"{record['artist']} {record['title']} - Live",
+                f"{record['artist']} {record['title']}",
+                f"Various Artists {record['title']}",
+            ],
+        )
+        for record in records
+    ]
+    for scorer in SCORERS:
+        with StageTimer(results, f"matcher_{scorer}") as stage:
+            for _ in range(repeat):
+                normalize.cache_clear()
+                for query, candidates in cases:
+                    best_match(query=query, candidates=candidates, scorer=scorer)
+            stage.items = len(cases) * repeat
+
+
+def bench_exports(results, master_data):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        exports = {
+            "export_csv": lambda: master_data.save_data_to_csv(csv_folder_path=temp_dir),
+            "export_sql": lambda: master_data.save_data_to_sql(sql_folder_path=temp_dir),
+            "export_jsonl": lambda: master_data.save_data_to_jsonl(jsonl_folder_path=temp_dir),
+        }
+        rows = sum(
+            len(getattr(master_data, name))
+            for name in ("rs_master_data", "tracks", "albums", "artists")
+        )
+        for name, export in exports.items():
+            with StageTimer(results, name) as stage:
+                export()
+                stage.items = rows
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR_PATH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance, min_seconds=0.05) -> list:
+    """
+    Stages whose throughput (or time, without items) got worse than in the baseline run by more
+    than "tolerance". Stages shorter than "min_seconds" are too noisy to compare.
+    """
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["stages"]
+
+    regressions = list()
+    print(f"\nCompared to {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline or baseline[name]["seconds"] < min_seconds:
+            continue
+        metric = "items_per_second" if "items_per_second" in result else "seconds"
+        before, after = baseline[name].get(metric), result[metric]
+        if not before:
+            continue
+        change = (after - before) / before
+        worse = -change if metric in THROUGHPUT_METRICS else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        print(f"{name:<24} {metric:<18} {before:>12} -> {after:<12} {change:+7.1%} {flag}")
+        if flag:
+            regressions.append((name, metric, change))
+    return regressions
+
+
+def main(args):
+    # The per item output would dominate the timings.
+    METRICS.quiet = True
+    records = load_records(args.input, args.items)
+    mock = MockSpotify(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        fielded_miss=args.fielded_miss,
+    )
+    results = dict()
+
+    with MockSpotifyServer(mock) as server:
+        master_data = bench_enrichment(
+            results, server, records, args.concurrency, args.rate_limit
+        )
+    bench_matcher(results, records, args.matcher_repeat)
+    bench_exports(results, master_data)
+
+    report = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "items": len(records),
+            "input": args.input,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "rate_429": args.rate_429,
+            "retry_after": args.retry_after,
+            "fielded_miss": args.fielded_miss,
+            "concurrency": args.concurrency,
+            "rate_limit": args.rate_limit,
+            "matcher_repeat": args.matcher_repeat,
+        },
+        "stages": results,
+    }
+    output_path = args.output or os.path.join(
+        RESULTS_DIR_PATH, f"{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=4, sort_keys=True)
+    print(f"Results saved to {output_path}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="End to end benchmarks against a local mock of the Spotify API."
+    )
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument(
+        "--input", help="Scraped records JSON to use instead of synthetic records."
+    )
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--rate-429", type=float, default=0.02)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument(
+        "--fielded-miss",
+        type=float,
+        default=0.1,
+        help="Share of items the fielded search misses, they need the free text tier.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=100.0)
+    parser.add_argument("--matcher-repeat", type=int, default=5)
+    parser.add_argument("--output", help="Results JSON path, default benchmarks/results/.")
+    parser.add_argument("--compare", help="Earlier results JSON to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    main(parser.parse_args())
@@ -0,0 +1,238 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+import random
+import re
+import threading
+from collections import Counter
+
+from aiohttp import web
+
+FIXTURES_PATH = os.path.join(
+    pathlib.Path(__file__).parent.resolve(), "fixtures", "spotify_responses.json"
+)
+BATCH_ENDPOINTS = {"tracks": "track", "albums": "album", "artists": "artist"}
+
+
+def spotify_id(kind, text) -> str:
+    # Deterministic stand-in for the 22 character base62 IDs.
+    return hashlib.sha1(f"{kind}:{text}".encode()).hexdigest()[:22]
+
+
+class MockSpotify:
+    """
+    Local stand-in for /v1/search, /v1/tracks, /v1/albums, /v1/artists and
+    /v1/artists/{id}/related-artists. Responses are
+    the recorded fixtures with IDs and names filled in, so searches are stable between runs.
+    Every request waits "latency" +/- "jitter" seconds and "rate_429" of them are answered
+    with a 429 and a Retry-After header. Fielded searches ("artist:<a> track:<t>") put the
+    item first, except for the "fielded_miss" share of items, which only free text finds.
+    """
+
+    def __init__(
+        self,
+        fixtures_path=FIXTURES_PATH,
+        latency=0.02,
+        jitter=0.01,
+        rate_429=0.0,
+        retry_after=0,
+        seed=42,
+        related_pool=2000,
+        fielded_miss=0.1,
+    ):
+        with open(fixtures_path, encoding="utf-8") as fixtures_file:
+            self.templates = {
+                kind: json.dumps(template)
+                for kind, template in json.load(fixtures_file).items()
+            }
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        # Related artists are drawn from a fixed pool, so crawls revisit artists.
+        self.related_pool = related_pool
+        self.fielded_miss = fielded_miss
+        self.response_bytes = Counter()
+        self.requests = Counter()
+        self.throttled = Counter()
+
+    def render(self, kind, **values) -> dict:
+        body = self.templates[kind]
+        for name, value in values.items():
+            body = body.replace(f"{{{name}}}", json.dumps(value)[1:-1])
+        return json.loads(body)
+
+    def render_item(self, kind, item_id=None, artist="", name="") -> dict:
+        artist_name = artist or f"Artist {item_id}"
+        item_name = name or f"{kind.title()} {item_id}"
+        track_id = item_id if kind == "track" else spotify_id("track", item_id)
+        album_id = item_id if kind == "album" else spotify_id("album", track_id)
+        return self.render(
+            kind,
+            track_id=track_id,
+            track_name=item_name,
+            album_id=album_id,
+            album_name=item_name,
+            artist_id=item_id if kind == "artist" else spotify_id("artist", artist_name),
+            artist_name=artist_name,
+        )
+
+    async def delay(self, endpoint):
+        self.requests[endpoint] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        if self.random.random() < self.rate_429:
+            self.throttled[endpoint] += 1
+            return web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+        return None
+
+    def json_response(self, endpoint, body) -> web.Response:
+        response = web.json_response(body)
+        self.response_bytes[endpoint] += len(response.body)
+        return response
+
+    async def search(self, request):
+        throttled = await self.delay("search")
+        if throttled:
+            return throttled
+
+        kind = request.query["type"]
+        query = request.query["q"]
+        limit = int(request.query.get("limit", 3))
+        fielded = re.fullmatch(rf"artist:(.+) {kind}:(.+?)(?: year:(\d{{4}})-(\d{{4}}))?", query)
+        if fielded:
+            artist, name, first_year, last_year = fielded.groups()
+        else:
+            artist, _, name = query.partition(" ")
+        term = f"{artist} {name}"
+
+        # The exact match sits between a live version and a cover, like real search results.
+        exact = self.render_item(kind, spotify_id(kind, term), artist=artist, name=name)
+        live = self.render_item(kind, spotify_id(kind, f"{term} live"), artist, f"{name} - Live")
+        cover = self.render_item(
+            kind, spotify_id(kind, f"{term} cover"), "Various Artists", name
+        )
+        if not fielded:
+            candidates = [live, exact, cover]
+        elif random.Random(term).random() < self.fielded_miss:
+            candidates = [live, cover]
+        else:
+            candidates = [exact, live, cover]
+        # Unmatched filler results, the price of a larger limit.
+        candidates += [
+            self.render_item(kind, spotify_id(kind, f"{term} {i}"), f"Other {i}", f"Song {i}")
+            for i in range(max(0, limit - len(candidates)))
+        ]
+        if fielded and first_year:
+            # A year filter only returns releases from those years.
+            release_date = f"{(int(first_year) + int(last_year)) // 2}-01-01"
+            for item in candidates:
+                (item["album"] if kind == "track" else item)["release_date"] = release_date
+        return self.json_response(
+            "search",
+            {
+                f"{kind}s": {
+                    "href": str(request.url),
+                    "items": candidates[:limit],
+                    "limit": limit,
+                    "offset": 0,
+                    "total": len(candidates),
+                }
+            },
+        )
+
+    async def batch(self, request):
+        endpoint = request.match_info["endpoint"]
+        if endpoint not in BATCH_ENDPOINTS:
+            return web.Response(status=404)
+        throttled = await self.delay(endpoint)
+        if throttled:
+            return throttled
+
+        ids = request.query["ids"].split(",")
+        kind = BATCH_ENDPOINTS[endpoint]
+        return self.json_response(
+            endpoint, {endpoint: [self.render_item(kind, item_id) for item_id in ids]}
+        )
+
+    async def related_artists(self, request):
+        throttled = await self.delay("related-artists")
+        if throttled:
+            return throttled
+
+        artist_id = request.match_info["artist_id"]
+        related = random.Random(artist_id).sample(range(self.related_pool), 20)
+        return self.json_response(
+            "related-artists",
+            {
+                "artists": [
+                    self.render_item("artist", spotify_id("artist", f"pool {i}"))
+                    for i in related
+                ]
+            },
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/search", self.search)
+        app.router.add_get("/v1/artists/{artist_id}/related-artists", self.related_artists)
+        app.router.add_get("/v1/{endpoint}", self.batch)
+        return app
+
+
+class MockSpotifyServer:
+    """
+    Runs a MockSpotify app on its own event loop thread, so the sync SpotifyClient and the
+    async clients can both talk to it. Port 0 picks a free port.
+    """
+
+    def __init__(self, mock, host="127.0.0.1", port=0):
+        self.mock = mock
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start_app(self):
+        self.runner = web.AppRunner(self.mock.app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.start_app(), self.loop).result()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the Spotify Web API.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--fielded-miss", type=float, default=0.1)
+    args = parser.parse_args()
+    mock = MockSpotify(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        fielded_miss=args.fielded_miss,
+    )
+    web.run_app(mock.app(), host="127.0.0.1", port=args.port)
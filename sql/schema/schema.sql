@@ -19,7 +19,12 @@ CREATE TABLE
         writers VARCHAR,
         track_id VARCHAR,
         album_id VARCHAR,
-        artist_ids VARCHAR ARRAY
+        artist_ids VARCHAR ARRAY,
+        search_tier VARCHAR,
+        match_score REAL,
+        spotify_year INTEGER,
+        match_confidence REAL,
+        match_flags VARCHAR ARRAY
     );
 
 CREATE TABLE
@@ -81,7 +86,12 @@ CREATE TABLE
         writers VARCHAR,
         track_id VARCHAR,
         album_id VARCHAR,
-        artist_ids VARCHAR ARRAY
+        artist_ids VARCHAR ARRAY,
+        search_tier VARCHAR,
+        match_score REAL,
+        spotify_year INTEGER,
+        match_confidence REAL,
+        match_flags VARCHAR ARRAY
     );
 
 CREATE TABLE
@@ -132,5 +142,27 @@ ALTER TABLE stageing.tracks ADD album_id VARCHAR REFERENCES stageing.albums;
 
 ALTER TABLE stageing.albums ADD track_id VARCHAR REFERENCES stageing.tracks;
 
+-- Databases created before the search query planner.
+ALTER TABLE rstop500.rs_master_data ADD COLUMN IF NOT EXISTS search_tier VARCHAR;
+
+ALTER TABLE rstop500.rs_master_data ADD COLUMN IF NOT EXISTS match_score REAL;
+
+ALTER TABLE stageing.rs_master_data ADD COLUMN IF NOT EXISTS search_tier VARCHAR;
+
+ALTER TABLE stageing.rs_master_data ADD COLUMN IF NOT EXISTS match_score REAL;
+
+-- Databases created before the match validation.
+ALTER TABLE rstop500.rs_master_data ADD COLUMN IF NOT EXISTS spotify_year INTEGER;
+
+ALTER TABLE rstop500.rs_master_data ADD COLUMN IF NOT EXISTS match_confidence REAL;
+
+ALTER TABLE rstop500.rs_master_data ADD COLUMN IF NOT EXISTS match_flags VARCHAR ARRAY;
+
+ALTER TABLE stageing.rs_master_data ADD COLUMN IF NOT EXISTS spotify_year INTEGER;
+
+ALTER TABLE stageing.rs_master_data ADD COLUMN IF NOT EXISTS match_confidence REAL;
+
+ALTER TABLE stageing.rs_master_data ADD COLUMN IF NOT EXISTS match_flags VARCHAR ARRAY;
+
 -- \q
 -- exit
\ No newline at end of file
@@ -0,0 +1,8 @@
+import os
+import pathlib
+import sys
+
+# The modules import each other as siblings, like the scripts in api/ and webscrapers/.
+ROOT_DIR_PATH = pathlib.Path(__file__).parent.parent.resolve()
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "api"))
+sys.path.insert(0, os.path.join(ROOT_DIR_PATH, "webscrapers"))
@@ -0,0 +1,50 @@
+from cache import ResponseCache
+
+SEARCH_URL = "https://api.spotify.com/v1/search"
+PARAMS = {"q": "artist:Prince track:Purple Rain", "type": "track"}
+
+
+def age_entries(cache, seconds):
+    cache.connection.execute(
+        "UPDATE responses SET fetched_at = fetched_at - ?, last_access = last_access - ?",
+        (seconds, seconds),
+    )
+    cache.connection.commit()
+
+
+def test_stale_entry_is_refetched_under_refresh_stale(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttls={"search": 60})
+    cache.set(SEARCH_URL, {"tracks": {"items": []}}, params=PARAMS)
+    assert cache.get(SEARCH_URL, params=PARAMS) == {"tracks": {"items": []}}
+
+    age_entries(cache, 61)
+    assert cache.get(SEARCH_URL, params=PARAMS) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.mode = "use"
+    assert cache.get(SEARCH_URL, params=PARAMS) == {"tracks": {"items": []}}
+    cache.close()
+
+
+def test_equivalent_requests_share_an_entry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.set(SEARCH_URL, {"hit": True}, params=PARAMS)
+
+    url = "HTTPS://API.SPOTIFY.COM/v1/search/?type=track"
+    assert cache.get(url, params={"q": "artist:Prince  track:Purple Rain"}) == {"hit": True}
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    for i in range(2):
+        cache.set(SEARCH_URL, {"i": i}, params={"q": str(i)})
+        age_entries(cache, 10)
+    # Reading entry 0 makes entry 1 the least recently used one.
+    assert cache.get(SEARCH_URL, params={"q": "0"}) == {"i": 0}
+    cache.set(SEARCH_URL, {"i": 2}, params={"q": "2"})
+
+    assert cache.get(SEARCH_URL, params={"q": "1"}) is None
+    assert cache.get(SEARCH_URL, params={"q": "0"}) == {"i": 0}
+    assert cache.get(SEARCH_URL, params={"q": "2"}) == {"i": 2}
+    cache.close()
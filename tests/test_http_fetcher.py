@@ -0,0 +1,34 @@
+import asyncio
+
+import http_fetcher
+from http_fetcher import scrape_http
+
+
+def test_completeness_is_checked_after_pending_parses(monkeypatch):
+    fetched = list()
+
+    async def fetch(self, url):
+        fetched.append(url)
+        page_index = int(url.rsplit("/", 1)[1])
+        return f'<html><link rel="next" href="/list/{page_index + 1}"></html>'
+
+    monkeypatch.setattr(http_fetcher.HttpPageFetcher, "fetch", fetch)
+    parsed = set()
+
+    async def parse_page(page, page_index, url):
+        # Slower than a fetch: the list is complete once page 0 is parsed.
+        await asyncio.sleep(0.05)
+        parsed.add(page_index)
+        return [{"rank": page_index}]
+
+    pages = asyncio.run(
+        scrape_http(
+            "https://example.com/list/0",
+            parse_page=parse_page,
+            max_pages=10,
+            is_complete=lambda: 0 in parsed,
+        )
+    )
+
+    assert list(pages) == [0]
+    assert len(fetched) <= 2
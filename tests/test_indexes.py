@@ -0,0 +1,68 @@
+from indexes import IndexedTable
+from processors import Albums
+
+
+def album(album_id, artist_ids):
+    return Albums(
+        album_id=album_id,
+        album_name=f"Album {album_id}",
+        rs_rank=0,
+        popularity=0,
+        total_tracks=10,
+        label="",
+        released_year=1984,
+        album_image="",
+        external_url="",
+        uri=f"spotify:album:{album_id}",
+        artist_ids=artist_ids,
+    )
+
+
+def albums_table(*rows):
+    return IndexedTable(rows, key="album_id", groups={"artist": lambda row: row.artist_ids})
+
+
+def test_by_key_follows_append_and_remove():
+    table = albums_table(album("a1", ["x"]))
+    added = album("a2", ["x", "y"])
+    table.append(added)
+    assert table.by_key == {"a1": table[0], "a2": added}
+    assert "a2" in table
+    assert table.group("artist", "y") == [added]
+
+    table.remove("a1")
+    assert table.by_key == {"a2": added}
+    assert "a1" not in table
+    assert table.group("artist", "x") == [added]
+
+    table.remove(added)
+    assert table.by_key == {}
+    assert table.groups["artist"] == {}
+
+
+def test_by_key_follows_item_assignment_pop_and_delete():
+    table = albums_table(album("a1", ["x"]), album("a2", ["y"]), album("a3", ["y"]))
+
+    replacement = album("b1", ["z"])
+    table[0] = replacement
+    assert set(table.by_key) == {"b1", "a2", "a3"}
+    assert table.group("artist", "x") == []
+    assert table.group("artist", "z") == [replacement]
+
+    assert table.pop().album_id == "a3"
+    del table[1:]
+    assert table.by_key == {"b1": replacement}
+    assert table.group("artist", "y") == []
+
+    table += [album("c1", ["z"])]
+    assert [row.album_id for row in table.group("artist", "z")] == ["b1", "c1"]
+
+
+def test_duplicate_key_keeps_the_latest_row_indexed():
+    first, second = album("a1", ["x"]), album("a1", ["x"])
+    table = albums_table(first, second)
+    assert table.get("a1") is second
+
+    # Removing the older duplicate leaves the index pointing at the remaining row.
+    table.pop(0)
+    assert table.get("a1") is second
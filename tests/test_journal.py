@@ -0,0 +1,63 @@
+import json
+
+from journal import EnrichmentJournal
+from processors import RollingStonesItem
+
+
+def rs_item(rs_rank):
+    return RollingStonesItem(
+        raw_artist="Prince",
+        description="",
+        rs_rank=rs_rank,
+        released_year=1984,
+        raw_title="Purple Rain",
+        data_type="track",
+        writers="",
+    )
+
+
+def journaled_item(journal, rs_rank):
+    item = rs_item(rs_rank)
+    item.set_search_results(f"track{rs_rank}", f"album{rs_rank}", ["artist1"], "fielded", 0.9)
+    journal.record_item(item)
+
+
+def test_torn_line_is_truncated_on_resume(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = EnrichmentJournal(path)
+    journaled_item(journal, 1)
+    journal.record_batch("tracks", [{"id": "track1"}, None])
+    journal.close()
+    # The previous run died halfway through writing the next record.
+    with open(path, "a", encoding="utf-8") as journal_file:
+        journal_file.write('{"kind": "item", "rank": 2, "ty')
+
+    journal = EnrichmentJournal(path, resume=True)
+    assert set(journal.items) == {("track", 1)}
+    assert journal.fetched_item("tracks", "track1") == {"id": "track1"}
+    journaled_item(journal, 3)
+    journal.close()
+
+    with open(path, encoding="utf-8") as journal_file:
+        records = [json.loads(line) for line in journal_file]
+    assert [record.get("rank") for record in records] == [1, None, 3]
+
+
+def test_resumed_items_are_restored_and_others_searched(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = EnrichmentJournal(path)
+    journaled_item(journal, 1)
+    journal.record_item(rs_item(2))  # A failed search, not journaled.
+    journal.close()
+
+    journal = EnrichmentJournal(path, resume=True)
+    restored, missing = rs_item(1), rs_item(2)
+    assert journal.restore_item(restored)
+    assert (restored.track_id, restored.search_tier) == ("track1", "fielded")
+    assert not journal.restore_item(missing)
+    journal.close()
+
+    # Without resume the journal starts over.
+    journal = EnrichmentJournal(path)
+    assert journal.items == {}
+    journal.close()
@@ -0,0 +1,32 @@
+import pytest
+from parsers import BACKENDS, SLIDE_CLASS
+
+PAGE = f"""
+<html><body>
+<div class="header">Not a slide</div>
+<div class="{SLIDE_CLASS}">
+    <h2>Purple Rain</h2>
+    <span class="c-gallery-vertical-album__number">1</span>
+    <div class="c-gallery-vertical-album__subtitle">Warner, 1984</div>
+    <p>First slide.</p>
+</div>
+<div class="{SLIDE_CLASS} is-active">
+    <h2>Blue</h2>
+    <span class="c-gallery-vertical-album__number">2</span>
+    <div class="rs-list-item--year">1971</div>
+    <p>Slide with an extra class.</p>
+</div>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_multi_class_slides(backend):
+    slides = BACKENDS[backend](PAGE)
+    assert [slide["title"].strip() for slide in slides] == ["Purple Rain", "Blue"]
+    assert slides[1]["year"] == "1971"
+
+
+def test_backends_agree():
+    outputs = [BACKENDS[backend](PAGE) for backend in sorted(BACKENDS)]
+    assert all(output == outputs[0] for output in outputs)
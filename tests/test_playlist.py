@@ -0,0 +1,118 @@
+import random
+
+import playlist
+from client import SpotifyClient
+from playlist import apply_edits, plan_delta, plan_sync, sync_playlist
+
+
+class FakePlaylistClient:
+    """
+    In memory playlist behind the send_json calls apply_edits makes. "fail_on" makes that
+    request kind fail after it was applied, like a timeout after Spotify committed it.
+    """
+
+    tokens = None
+    headers = {}
+    base_url = "http://localhost"
+
+    def __init__(self, uris, fail_on=None):
+        self.uris = list(uris)
+        self.snapshot = 0
+        self.sent_snapshots = list()
+        self.fail_on = fail_on
+
+    def send_json(self, method, path, body, params=None):
+        self.sent_snapshots.append(body.get("snapshot_id"))
+        if method == "DELETE":
+            removed = {track["uri"] for track in body["tracks"]}
+            self.uris = [uri for uri in self.uris if uri not in removed]
+            kind = "remove"
+        elif method == "PUT" and "range_start" in body:
+            start, length = body["range_start"], body["range_length"]
+            insert_before = body["insert_before"]
+            block = self.uris[start : start + length]
+            rest = self.uris[:start] + self.uris[start + length :]
+            if insert_before > start:
+                insert_before -= length
+            self.uris = rest[:insert_before] + block + rest[insert_before:]
+            kind = "move"
+        elif method == "PUT":
+            self.uris = list(body["uris"])
+            kind = "replace"
+        else:
+            position = body.get("position", len(self.uris))
+            self.uris[position:position] = body["uris"]
+            kind = "add"
+
+        self.snapshot += 1
+        if kind == self.fail_on:
+            self.fail_on = None
+            return None
+        return {"snapshot_id": f"snapshot{self.snapshot}"}
+
+
+def scrambled(target, seed):
+    rng = random.Random(seed)
+    current = [uri for uri in target if rng.random() > 0.1]
+    current += [f"spotify:track:gone{i}" for i in range(rng.randint(0, 5))]
+    current += rng.sample(current, min(3, len(current)))
+    rng.shuffle(current)
+    return current
+
+
+def test_scrambled_playlist_ends_in_target_order():
+    target = [f"spotify:track:{i}" for i in range(250)]
+    for seed in range(50):
+        client = FakePlaylistClient(scrambled(target, seed))
+        apply_edits(client, "playlist", "snapshot0", plan_delta(client.uris, target))
+        assert client.uris == target, seed
+
+        client = FakePlaylistClient(scrambled(target, seed))
+        apply_edits(client, "playlist", "snapshot0", plan_sync(client.uris, target))
+        assert client.uris == target, seed
+
+
+def test_in_sync_playlist_needs_no_edits():
+    target = [f"spotify:track:{i}" for i in range(10)]
+    assert plan_delta(list(target), target) == []
+
+
+def test_apply_edits_threads_snapshot_ids():
+    target = [f"spotify:track:{i}" for i in range(20)]
+    current = list(reversed(target)) + ["spotify:track:gone"]
+    client = FakePlaylistClient(current)
+    edits = plan_delta(current, target)
+
+    last_snapshot = apply_edits(client, "playlist", "snapshot0", edits)
+
+    # Every remove and move names the snapshot the previous request returned.
+    expected = ["snapshot0"] + [f"snapshot{i}" for i in range(1, len(edits))]
+    for edit, sent, snapshot in zip(edits, client.sent_snapshots, expected):
+        if edit.kind in ("remove", "move"):
+            assert sent == snapshot
+    assert last_snapshot == f"snapshot{len(edits)}"
+
+
+def test_sync_playlist_reads_again_after_a_failed_write(monkeypatch):
+    target = [f"spotify:track:{i}" for i in range(30)]
+    client = FakePlaylistClient(list(reversed(target)), fail_on="move")
+
+    async def fetch_playlist(async_client, playlist_id):
+        return (f"snapshot{client.snapshot}", list(client.uris))
+
+    monkeypatch.setattr(playlist, "fetch_playlist", fetch_playlist)
+    sync_playlist(client, "playlist", target)
+
+    assert client.uris == target
+
+
+def test_writes_are_not_retried_after_they_may_have_been_applied():
+    client = SpotifyClient()
+    read_retry = client.session.get_adapter("https://").max_retries
+    write_retry = client.write_session.get_adapter("https://").max_retries
+    client.close()
+
+    assert "PUT" not in read_retry.allowed_methods
+    assert write_retry.read == 0
+    assert write_retry.other == 0
+    assert tuple(write_retry.status_forcelist) == (429,)
@@ -0,0 +1,73 @@
+import csv
+
+from exporters import stream_csv, stream_sql
+from indexes import IndexedTable
+from processors import RollingStonesItem, RollingStonesMasterData, Tracks
+
+
+def rs_item(**kwargs):
+    return RollingStonesItem(
+        raw_artist="Prince",
+        description="",
+        rs_rank=1,
+        released_year=1984,
+        raw_title="Purple Rain",
+        data_type="album",
+        writers="",
+        **kwargs,
+    )
+
+
+def test_empty_lists_export_as_empty_array_literals(tmp_path):
+    rows = [rs_item(), rs_item(artist_ids=["a1", "a2"], match_flags=["low_score"])]
+
+    stream_sql(rows, str(tmp_path / "rs_master_data.sql"), table="rs_master_data")
+    sql = (tmp_path / "rs_master_data.sql").read_text(encoding="utf-8")
+    assert "ARRAY[]" not in sql
+    assert "'{}'" in sql
+    assert "ARRAY['a1', 'a2']" in sql
+    assert "ARRAY['low_score']" in sql
+
+    stream_csv(rows, str(tmp_path / "rs_master_data.csv"))
+    with open(tmp_path / "rs_master_data.csv", encoding="utf-8") as csv_file:
+        exported = list(csv.DictReader(csv_file))
+    assert exported[0]["artist_ids"] == "{}"
+    assert exported[0]["match_flags"] == "{}"
+    assert "set()" not in (tmp_path / "rs_master_data.csv").read_text(encoding="utf-8")
+
+
+def track(i, album_id="album1"):
+    return Tracks(
+        track_id=f"track{i}",
+        track_name=f"Track {i}",
+        artist_ids=["artist1"],
+        rs_rank=i,
+        is_explicit=False,
+        popularity=50,
+        duration_ms=200000,
+        track_number_on_album=i,
+        external_url="",
+        uri=f"spotify:track:{i}",
+        released_year=1984,
+        album_id=album_id,
+    )
+
+
+def test_generator_tables_stream_until_an_index_is_used(tmp_path):
+    consumed = list()
+
+    def tracks():
+        for i in range(3):
+            consumed.append(i)
+            yield track(i)
+
+    master_data = RollingStonesMasterData(tracks=tracks())
+    assert consumed == []
+    assert not isinstance(master_data.tracks, IndexedTable)
+    assert isinstance(master_data.albums, IndexedTable)
+
+    assert stream_csv(master_data.tracks, str(tmp_path / "tracks.csv")) == 3
+
+    master_data.tracks = tracks()
+    assert sorted(master_data.track_by_id) == ["track0", "track1", "track2"]
+    assert len(master_data.tracks_by_album["album1"]) == 3
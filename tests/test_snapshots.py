@@ -0,0 +1,24 @@
+from snapshots import SnapshotArchive
+
+
+def test_store_after_a_torn_manifest_line(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.store("<html>page 0</html>", page_index=0, url="https://example.com/0")
+    with open(archive.manifest_path, "a", encoding="utf-8") as manifest_file:
+        manifest_file.write('{"sha256": "abc", "url": "https://exa')
+
+    # The next run opens the archive again and keeps storing pages.
+    archive = SnapshotArchive(str(tmp_path))
+    archive.store("<html>page 1</html>", page_index=1, url="https://example.com/1")
+
+    assert [record["page_index"] for record in archive.latest()] == [0, 1]
+
+
+def test_manifest_skips_a_bad_line_in_the_middle(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.store("<html>page 0</html>", page_index=0, url="https://example.com/0")
+    with open(archive.manifest_path, "a", encoding="utf-8") as manifest_file:
+        manifest_file.write("not json\n")
+    archive.store("<html>page 1</html>", page_index=1, url="https://example.com/1")
+
+    assert [record["page_index"] for record in archive.manifest()] == [0, 1]
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+import time
+
+from token_manager import TokenManager
+
+
+def token_manager(tmp_path, monkeypatch, expires_in=3600, **kwargs):
+    requests = list()
+
+    def request_token(self):
+        requests.append(self.grant_type)
+        # Slow enough for the other threads to queue up behind the refresh.
+        time.sleep(0.05)
+        return {"access_token": f"token{len(requests)}", "expires_in": expires_in}
+
+    monkeypatch.setattr(TokenManager, "request_token", request_token)
+    manager = TokenManager(
+        "client", "secret", cache_path=str(tmp_path / "token.json"), **kwargs
+    )
+    return manager, requests
+
+
+def test_concurrent_callers_share_one_refresh(tmp_path, monkeypatch):
+    manager, requests = token_manager(tmp_path, monkeypatch)
+    tokens = list()
+    threads = [
+        threading.Thread(target=lambda: tokens.append(manager.token())) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    async def workers():
+        return await asyncio.gather(*(manager.token_async() for _ in range(8)))
+
+    assert tokens == ["token1"] * 8
+    assert asyncio.run(workers()) == ["token1"] * 8
+    assert requests == ["client_credentials"]
+
+
+def test_cached_token_is_reused_by_the_next_run(tmp_path, monkeypatch):
+    manager, requests = token_manager(tmp_path, monkeypatch)
+    assert manager.token() == "token1"
+
+    next_run, next_requests = token_manager(tmp_path, monkeypatch)
+    assert next_run.token() == "token1"
+    assert next_requests == []
+
+    # A token of another grant type is not reused.
+    user_run, user_requests = token_manager(tmp_path, monkeypatch, refresh_token="refresh")
+    assert user_run.token() == "token1"
+    assert user_requests == ["refresh_token"]
+
+
+def test_token_is_refreshed_ahead_of_expiry(tmp_path, monkeypatch):
+    manager, requests = token_manager(tmp_path, monkeypatch, expires_in=60, margin=120)
+    assert manager.token() == "token1"
+    assert manager.token() == "token2"
+    with open(tmp_path / "token.json", encoding="utf-8") as cache_file:
+        assert json.load(cache_file)["access_token"] == "token2"
+
+
+def test_rejected_token_is_only_replaced_once(tmp_path, monkeypatch):
+    manager, requests = token_manager(tmp_path, monkeypatch)
+    stale = manager.token()
+
+    # Two requests answered with 401: the second finds the token already replaced.
+    assert manager.refresh(stale_token=stale) == "token2"
+    assert manager.refresh(stale_token=stale) == "token2"
+    assert len(requests) == 2
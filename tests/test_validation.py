@@ -0,0 +1,105 @@
+import asyncio
+
+from processors import MATCH_FIELDS, RollingStonesItem
+from validation import MatchValidator
+
+
+def rs_item(**kwargs):
+    fields = dict(
+        raw_artist="Prince",
+        description="",
+        rs_rank=1,
+        released_year=1984,
+        raw_title="Purple Rain",
+        data_type="track",
+        writers="",
+    )
+    return RollingStonesItem(**{**fields, **kwargs})
+
+
+def match_state(item):
+    return {name: getattr(item, name) for name in MATCH_FIELDS}
+
+
+def test_flags_for_leaves_an_unmatched_item_unmatched():
+    item = rs_item()
+    before = match_state(item)
+    candidate = ("track1", "album1", ["artist1"], "title", 0.4, 1984)
+
+    flags = MatchValidator().flags_for(item, candidate, raw_artists_by_id={})
+
+    assert flags == ["low_score"]
+    assert match_state(item) == before
+
+
+def test_rejected_candidate_is_not_applied(monkeypatch):
+    item = rs_item()
+    item.match_confidence = 0.0
+    before = match_state(item)
+
+    async def fetch_search_api_async(self, search_term, search_type, client, tiers=None):
+        # A candidate with no score: never more confident than no match.
+        return ("track1", "album1", ["artist1"], tiers[0][0], 0.0, 1984)
+
+    monkeypatch.setattr(RollingStonesItem, "fetch_search_api_async", fetch_search_api_async)
+    changed = asyncio.run(MatchValidator().requery_item(item, client=None, raw_artists_by_id={}))
+
+    assert changed is False
+    assert match_state(item) == before
+
+
+def test_incremental_runs_skip_items_already_requeried(tmp_path, monkeypatch):
+    from incremental import IncrementalJournal
+
+    searches = list()
+
+    async def fetch_search_api_async(self, search_term, search_type, client, tiers=None):
+        searches.append(self.rs_rank)
+        return ("track1", "album1", ["artist1"], tiers[0][0], 0.5, 1984)
+
+    monkeypatch.setattr(RollingStonesItem, "fetch_search_api_async", fetch_search_api_async)
+
+    def run(raw_title="Purple Rain"):
+        journal = IncrementalJournal(
+            path=str(tmp_path / "journal.jsonl"), state_path=str(tmp_path / "state.json")
+        )
+        item = rs_item()
+        item.raw_title = raw_title
+        if not journal.restore_item(item):
+            item.set_search_results("track1", "album1", ["artist1"], "fielded", 0.5, 1984)
+            journal.record_item(item)
+        validator = MatchValidator()
+        flagged = validator.validate([item])
+        asyncio.run(validator.requery([item], flagged, client=None, journal=journal))
+        journal.save_state()
+        journal.close()
+        return flagged
+
+    assert run() and len(searches) == 3
+    # Same record, still flagged, but not searched again.
+    assert run() and len(searches) == 3
+    # A changed record is part of the delta and searched again.
+    assert run(raw_title="Purple Rain (Deluxe)") and len(searches) == 6
+
+
+def test_short_names_are_compared_as_whole_tokens():
+    from collections import Counter
+
+    collides = MatchValidator.collides
+    assert not collides("low", Counter({"low": 4}))
+    assert not collides("yes", Counter({"yes": 2, "yes and friends": 1}))
+    assert not collides("jay z", Counter({"jay z and kanye west": 2}))
+    assert collides("x", Counter({"the xx": 3}))
+    assert collides("low", Counter({"lowell fulson": 3}))
+
+
+def test_short_artist_sharing_an_id_with_a_longer_name_is_flagged():
+    low = [rs_item(raw_artist="Low", rs_rank=rank) for rank in (10, 20)]
+    lowell = rs_item(raw_artist="Lowell Fulson", rs_rank=30)
+    for item in (*low, lowell):
+        item.set_search_results("track1", "album1", ["artist_low"], "fielded", 0.95, 1984)
+
+    flagged = MatchValidator().validate([*low, lowell])
+
+    assert flagged == [lowell]
+    assert lowell.match_flags == ["artist_collision"]
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+from metrics import log
+from selenium_driverless.types.by import By
+
+SLIDE_SELECTOR = ".c-gallery-vertical__slide-wrapper"
+POP_UP_XPATH = "/html/body/div[5]/div/div/button"
+
+
+async def wait_for_slides(target, timeout=20, poll_interval=0.25, stable_polls=3) -> int:
+    """
+    Waits until the number of gallery slides is non zero and stopped changing,
+    instead of sleeping a fixed amount of time. Returns the final slide count.
+    """
+    deadline = time.monotonic() + timeout
+    last_count, stable = -1, 0
+    while time.monotonic() < deadline:
+        count = await target.execute_script(
+            f"return document.querySelectorAll('{SLIDE_SELECTOR}').length"
+        )
+        if count and count == last_count:
+            stable += 1
+            if stable >= stable_polls:
+                return count
+        else:
+            stable = 0
+        last_count = count
+        await asyncio.sleep(poll_interval)
+    return max(last_count, 0)
+
+
+async def close_pop_up(target, timeout=1):
+    try:
+        elem = await target.find_element(By.XPATH, POP_UP_XPATH, timeout=timeout)
+        await elem.click()
+        log("Pop Up Window button found and clicked!")
+    except Exception:
+        pass
+
+
+async def next_page_url(target, xpath, timeout=10, poll_interval=0.1) -> str | None:
+    """
+    Reads the href of the "Next" button as soon as it is in the DOM, no click and no page render needed.
+    """
+    script = (
+        f"const node = document.evaluate('{xpath}', document, null, "
+        "XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;"
+        "return node ? node.href : null;"
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        href = await target.execute_script(script)
+        if href:
+            return href
+        await asyncio.sleep(poll_interval)
+    return None
+
+
+async def load_page_source(target, url) -> str:
+    await target.get(url, wait_load=True)
+    await close_pop_up(target)
+    await target.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    await wait_for_slides(target)
+    return await target.page_source
+
+
+async def discover_pages(
+    driver, base_url, next_button_xpaths, max_pages, page_queue, is_complete=None
+):
+    """
+    Follows the "Next" links in the main tab and queues every page URL as soon as it is known.
+    Stops early once "is_complete" returns True.
+    """
+    url = base_url
+    for page_index in range(max_pages):
+        if is_complete and is_complete():
+            break
+        await page_queue.put((page_index, url))
+        if page_index == max_pages - 1:
+            break
+
+        await driver.get(url, wait_load=False)
+        xpath = next_button_xpaths[1] if page_index >= 1 else next_button_xpaths[0]
+        url = await next_page_url(driver, xpath)
+        if url is None:
+            log(f"No Next button found after page {page_index}.")
+            break
+
+
+async def scrape_concurrently(
+    driver, base_url, next_button_xpaths, parse_page, tabs=4, max_pages=10, is_complete=None
+) -> list:
+    """
+    Scrapes the gallery pages with "tabs" browser tabs in parallel. The main tab only
+    discovers the page URLs, the worker tabs load and wait for one page each.
+    "parse_page(page, page_index, url)" is awaited in the background so a tab moves on to its
+    next page right away.
+    """
+    page_queue = asyncio.Queue()
+    pages = dict()
+
+    async def worker():
+        target = await driver.new_window("tab", activate=False)
+        try:
+            while True:
+                page_index, url = await page_queue.get()
+                if url is None:
+                    break
+                if is_complete and is_complete():
+                    continue
+                page = await load_page_source(target, url)
+                pages[page_index] = asyncio.create_task(parse_page(page, page_index, url))
+                log(f"Page {page_index} loaded.")
+        finally:
+            await target.close()
+
+    workers = [asyncio.create_task(worker()) for _ in range(tabs)]
+    await discover_pages(
+        driver, base_url, next_button_xpaths, max_pages, page_queue, is_complete=is_complete
+    )
+    for _ in workers:
+        await page_queue.put((None, None))
+    await asyncio.gather(*workers)
+
+    data = list()
+    for page_index in sorted(pages):
+        items = await pages[page_index]
+        log(f"Page {page_index} scraped: {len(items)} items")
+        data.extend(items)
+    return data
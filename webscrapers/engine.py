@@ -0,0 +1,394 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import pathlib
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+# The run metrics live with the API code, scraping reports into the same format.
+sys.path.insert(0, os.path.join(pathlib.Path(__file__).parent.parent.resolve(), "api"))
+from browser import close_pop_up, load_page_source, scrape_concurrently, wait_for_slides  # noqa: E402
+from bs4 import UnicodeDammit  # noqa: E402
+from http_fetcher import pages_needing_browser, scrape_http  # noqa: E402
+from metrics import METRICS, log  # noqa: E402
+from parsers import BACKENDS, DEFAULT_BACKEND, ParserPool, extract_slides  # noqa: E402
+from selenium_driverless import webdriver  # noqa: E402
+from selenium_driverless.types.by import By  # noqa: E402
+from snapshots import SnapshotArchive, read_snapshot  # noqa: E402
+
+DATA_DIR_PATH = os.path.join(pathlib.Path(__file__).parent.parent.resolve(), "data")
+SNAPSHOTS_DIR_PATH = os.path.join(DATA_DIR_PATH, "snapshots")
+METRICS_DIR_PATH = os.path.join(DATA_DIR_PATH, "metrics")
+
+
+@dataclass
+class ArticleData:
+    rank: int
+    artist: str
+    title: str
+    released_year: int
+    writers: str
+    description: str
+
+
+def album_details(item) -> tuple:
+    credited = item["subtitle"]
+
+    try:
+        released_year = int(credited.split(",")[1].strip())
+    except IndexError:
+        released_year = 2005
+        writers = "EMI Manhattan"
+    except ValueError:
+        released_year = int(credited.split(",")[2].strip())
+        writers = "EMI Manhattan"
+
+    writers = credited.split(",")[0].strip()
+    return (released_year, writers)
+
+
+def song_details(item) -> tuple:
+    rld_year = item["year"]
+    released_year = int(rld_year[:4])
+    credited = item["credits"]
+    writers = credited.split(":")[1].strip()
+    return (released_year, writers)
+
+
+@dataclass(frozen=True)
+class ListConfig:
+    """
+    Everything that differs between the Rolling Stone lists. "details" turns the raw slide
+    fields into (released_year, writers).
+    """
+
+    name: str
+    base_url: str
+    next_button_xpaths: tuple
+    details: Callable[[dict], tuple]
+    file_name: str
+    total_ranks: int = 500
+    max_pages: int = 10
+
+
+LISTS = {
+    "albums": ListConfig(
+        name="albums",
+        base_url="https://www.rollingstone.com/music/music-lists/best-albums-of-all-time-1062063/",
+        next_button_xpaths=(
+            "/html/body/div[4]/main/div[3]/article/div/div[1]/div[1]/div/div/div[2]/a",
+            "/html/body/div[4]/main/div[3]/article/div/div[1]/div[1]/div/div/div[3]/a",
+        ),
+        details=album_details,
+        file_name="rolling_stones_top_500_albums.jsonl",
+    ),
+    "songs": ListConfig(
+        name="songs",
+        base_url="https://www.rollingstone.com/music/music-lists/best-songs-of-all-time-1224767/",
+        next_button_xpaths=(
+            "/html/body/div[4]/main/div[3]/article/div/div[1]/div[1]/div/div[3]/div[2]/a",
+            "/html/body/div[4]/main/div[3]/article/div/div[1]/div[1]/div/div[3]/div[3]/a",
+        ),
+        details=song_details,
+        file_name="rolling_stones_top_500_songs.jsonl",
+    ),
+}
+
+
+def parse_page_content(page_content, backend=DEFAULT_BACKEND, list_name="albums"):
+    details = LISTS[list_name].details
+    data = list()
+
+    for item in extract_slides(page_content, backend=backend):
+        title = item["title"]
+        artist = title.split(",")[0].strip()
+        title = re.sub(r"[^a-zA-Z0-9]+", " ", title.split(",")[1]).strip()
+        # title = UnicodeDammit(title.split(",")[1], ["windows-1252"]).unicode_markup
+        rank = int(item["number"])
+
+        desc = item["description"]
+        if desc is not None:
+            # description = re.sub(r"[^a-zA-Z0-9]+", " ", desc.strip())
+            description = UnicodeDammit(desc.strip(), ["windows-1252"]).unicode_markup
+        else:
+            description = ""
+
+        released_year, writers = details(item)
+
+        article = ArticleData(
+            rank=rank,
+            artist=artist,
+            title=title,
+            released_year=released_year,
+            writers=writers,
+            description=description,
+        )
+        data.append(asdict(article))
+
+    return data
+
+
+def parse_snapshot(path, backend=DEFAULT_BACKEND, list_name="albums"):
+    return parse_page_content(read_snapshot(path), backend=backend, list_name=list_name)
+
+
+class JsonlSink:
+    """
+    Writes the scraped items to JSON Lines as soon as their page is parsed, one fsync per page,
+    so a crash loses at most the page in flight. Ranks already written are skipped, a revisited
+    page adds nothing.
+    """
+
+    def __init__(self, path, total_ranks=500, resume=False):
+        self.path = path
+        self.total_ranks = total_ranks
+        self.ranks = set()
+
+        if resume and os.path.exists(path):
+            self.replay()
+            log(f"Resuming from {path}: {len(self.ranks)} ranks done.")
+            self.file = open(path, "a", encoding="utf-8")
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+
+    def replay(self):
+        complete_bytes = 0
+        with open(self.path, "rb") as jsonl_file:
+            for line in jsonl_file:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise json.JSONDecodeError("Torn line", line.decode(), 0)
+                    self.ranks.add(json.loads(line)["rank"])
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                complete_bytes += len(line)
+
+        # Drop the torn line, new items must not be appended onto it.
+        os.truncate(self.path, complete_bytes)
+
+    @property
+    def complete(self) -> bool:
+        return len(self.ranks) >= self.total_ranks
+
+    def write_page(self, items) -> int:
+        new_items = list()
+        for item in items:
+            if item["rank"] not in self.ranks:
+                self.ranks.add(item["rank"])
+                new_items.append(item)
+
+        if new_items:
+            self.file.write(
+                "".join(
+                    json.dumps(item, sort_keys=True, ensure_ascii=False) + "\n"
+                    for item in new_items
+                )
+            )
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        return len(new_items)
+
+    def close(self):
+        self.file.close()
+
+
+async def scrape_list(config, sink, pool, archive, tabs=1, http=False):
+    async def parse_page(page, page_index, url) -> list:
+        parse_task = asyncio.create_task(pool.parse(page))
+        await asyncio.to_thread(archive.store, page, page_index, url)
+        items = await parse_task
+        new_items = sink.write_page(items)
+        log(f"{new_items} new items stored, {len(sink.ranks)}/{config.total_ranks} ranks.")
+        return items
+
+    options = webdriver.ChromeOptions()
+
+    # Browserless fast path, Chrome is only started for the pages it could not handle.
+    if http:
+        pages = await scrape_http(
+            base_url=config.base_url,
+            parse_page=parse_page,
+            max_pages=config.max_pages,
+            is_complete=lambda: sink.complete,
+        )
+        if sink.complete:
+            return
+        fallback_pages = pages_needing_browser(pages, max_pages=config.max_pages)
+        if fallback_pages is not None:
+            if fallback_pages:
+                log(f"Falling back to Chrome for {len(fallback_pages)} pages...")
+                async with webdriver.Chrome(options=options) as driver:
+                    for page_index, url in fallback_pages:
+                        page = await load_page_source(driver, url)
+                        await parse_page(page, page_index, url)
+            return
+        log("HTTP fast path could not follow the pages, falling back to Chrome.")
+
+    async with webdriver.Chrome(options=options) as driver:
+        # Concurrent mode: several tabs scrape the pages in parallel.
+        if tabs > 1:
+            await scrape_concurrently(
+                driver=driver,
+                base_url=config.base_url,
+                next_button_xpaths=config.next_button_xpaths,
+                parse_page=parse_page,
+                tabs=tabs,
+                max_pages=config.max_pages,
+                is_complete=lambda: sink.complete,
+            )
+            return
+
+        # Start Chrome
+        await driver.get(config.base_url, wait_load=True)
+
+        # Parse trough the pages, page N is parsed and stored while page N+1 loads.
+        parse_tasks = list()
+        page_counter = 0
+        while page_counter < config.max_pages and not sink.complete:
+            log(f"Pages scraped: {page_counter}")
+            # Deal with Pop Up window:
+            await close_pop_up(driver)
+
+            await driver.execute_script(
+                "window.scrollTo(0, document.body.scrollHeight);"
+            )
+            await wait_for_slides(driver)
+
+            # Get page HTML to parse
+            page = await driver.page_source
+            url = await driver.current_url
+            parse_tasks.append(asyncio.create_task(parse_page(page, page_counter, url)))
+
+            # Go to Next Page and start over the process.
+            if page_counter >= 1:
+                next_button_xpath = config.next_button_xpaths[1]
+            else:
+                next_button_xpath = config.next_button_xpaths[0]
+
+            try:
+                next_button = await driver.find_element(
+                    By.XPATH, next_button_xpath, timeout=5
+                )
+                await next_button.click()
+                log("Next Page button found and clicked!.")
+            except Exception:
+                pass
+
+            page_counter += 1
+
+        await asyncio.gather(*parse_tasks)
+
+
+async def main(config, tabs=1, http=False, parser=DEFAULT_BACKEND, resume=False):
+    file_path = os.path.join(DATA_DIR_PATH, config.file_name)
+    sink = JsonlSink(file_path, total_ranks=config.total_ranks, resume=resume)
+    try:
+        if sink.complete:
+            log(f"All {config.total_ranks} ranks already in {file_path}.")
+            return
+
+        # Pages are parsed in worker processes while the next page is loading.
+        # Every page source is archived, "reparse" re-derives the list from it offline.
+        archive = SnapshotArchive(os.path.join(SNAPSHOTS_DIR_PATH, config.name))
+        parse_list_page = functools.partial(parse_page_content, list_name=config.name)
+        with ParserPool(parse_list_page, backend=parser) as pool, METRICS.stage("scrape"):
+            await scrape_list(config, sink, pool, archive, tabs=tabs, http=http)
+    finally:
+        sink.close()
+        METRICS.write(folder_path=METRICS_DIR_PATH, name=f"scrape_{config.name}")
+
+    log(f"{len(sink.ranks)}/{config.total_ranks} ranks saved to {file_path}.")
+
+
+def reparse(config, parser=DEFAULT_BACKEND, workers=None):
+    """
+    Rebuilds the JSONL file from the latest snapshot of every page, parsed in a process pool.
+    No browser and no network, e.g. after a fix in parse_page_content.
+    """
+    archive = SnapshotArchive(os.path.join(SNAPSHOTS_DIR_PATH, config.name))
+    records = archive.latest()
+    if not records:
+        log(f"No snapshots found in {archive.root_dir}.")
+        return
+
+    start = time.perf_counter()
+    file_path = os.path.join(DATA_DIR_PATH, config.file_name)
+    sink = JsonlSink(file_path, total_ranks=config.total_ranks)
+    parse = functools.partial(parse_snapshot, backend=parser, list_name=config.name)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor, METRICS.stage("reparse"):
+            paths = [archive.object_path(record["sha256"]) for record in records]
+            for items in executor.map(parse, paths):
+                sink.write_page(items)
+    finally:
+        sink.close()
+        METRICS.write(folder_path=METRICS_DIR_PATH, name=f"reparse_{config.name}")
+
+    log(
+        f"Re-parsed {len(records)} snapshots in {time.perf_counter() - start:.2f}s: "
+        f"{len(sink.ranks)}/{config.total_ranks} ranks saved to {file_path}."
+    )
+
+
+def build_arg_parser(description) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--tabs", type=int, default=1, help="Number of browser tabs scraping in parallel."
+    )
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        help="Fetch the pages without a browser, Chrome is only the fallback.",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=BACKENDS,
+        default=DEFAULT_BACKEND,
+        help="HTML parser backend for the gallery slides.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep the ranks already in the JSONL file and only scrape the missing ones.",
+    )
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Rebuild the JSONL file from the archived page snapshots, no browser or network.",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="No per page output, the run report in data/metrics still has every count.",
+    )
+    return parser
+
+
+def run(config, args):
+    METRICS.quiet = args.quiet
+    if args.reparse:
+        reparse(config=config, parser=args.parser)
+        return
+
+    asyncio.run(
+        main(
+            config=config,
+            tabs=args.tabs,
+            http=args.http,
+            parser=args.parser,
+            resume=args.resume,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = build_arg_parser("Scrape one of the Rolling Stones Top 500 lists.")
+    parser.add_argument("list_name", choices=LISTS)
+    args = parser.parse_args()
+    run(LISTS[args.list_name], args)
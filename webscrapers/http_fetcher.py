@@ -0,0 +1,119 @@
+import asyncio
+import re
+import time
+from urllib.parse import urljoin
+
+import aiohttp
+from bs4 import BeautifulSoup, SoupStrainer
+from metrics import METRICS, log
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/130.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-GB,en;q=0.9",
+}
+NEXT_TEXT_PATTERN = re.compile(r"next|load more", re.IGNORECASE)
+
+
+def find_next_page_url(page_content, page_url) -> str | None:
+    """
+    Next gallery page from the raw HTML: <link rel="next">, an <a rel="next">,
+    or as a last resort an anchor labelled "Next"/"Load more".
+    """
+    soup = BeautifulSoup(page_content, "html.parser", parse_only=SoupStrainer(["link", "a"]))
+    for tag in soup.find_all(["link", "a"], rel="next", href=True):
+        return urljoin(page_url, tag["href"])
+    for tag in soup.find_all("a", href=True, string=NEXT_TEXT_PATTERN):
+        if not tag["href"].startswith("#"):
+            return urljoin(page_url, tag["href"])
+    return None
+
+
+class HttpPageFetcher:
+    """
+    Browserless fetcher: one pooled aiohttp session, no Chrome start up, no rendering.
+    """
+
+    def __init__(self, concurrency=4, timeout=30):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def fetch(self, url) -> str | None:
+        start, status = time.perf_counter(), None
+        try:
+            async with self.session.get(url) as r:
+                status = r.status
+                if r.status == 200:
+                    return await r.text()
+                log(f"HTTP {r.status} for {url}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log(f"Request error: {e!r} for {url}")
+        finally:
+            METRICS.record_request("page", status, time.perf_counter() - start)
+        return None
+
+
+async def scrape_http(base_url, parse_page, max_pages=10, is_complete=None) -> dict:
+    """
+    Walks the gallery pages over plain HTTP. Returns {page_index: (url, items)}; pages that
+    could not be fetched have no items and the dict stops where the "Next" link could not be found.
+    "parse_page(page, page_index, url)" runs in the background while the next page is fetched,
+    fetching stops early once "is_complete" returns True.
+    """
+    parse_tasks = dict()
+    url = base_url
+    async with HttpPageFetcher() as fetcher:
+        for page_index in range(max_pages):
+            fetch_task = asyncio.create_task(fetcher.fetch(url))
+            # Completeness is only known once the pages fetched so far are parsed, the next
+            # page is already being fetched meanwhile.
+            await asyncio.gather(*(task for _, task in parse_tasks.values() if task))
+            if is_complete and is_complete():
+                fetch_task.cancel()
+                await asyncio.gather(fetch_task, return_exceptions=True)
+                break
+            page = await fetch_task
+            if page is None:
+                parse_tasks[page_index] = (url, None)
+                break
+
+            parse_task = asyncio.create_task(parse_page(page, page_index, url))
+            parse_tasks[page_index] = (url, parse_task)
+            url = find_next_page_url(page, url)
+            if url is None:
+                break
+
+    pages = dict()
+    for page_index, (url, task) in parse_tasks.items():
+        pages[page_index] = (url, await task if task else [])
+        log(f"Page {page_index} fetched over HTTP: {len(pages[page_index][1])} items")
+    return pages
+
+
+def pages_needing_browser(pages, max_pages=10, items_per_page=50) -> list | None:
+    """
+    Pages where the fast path found fewer items than expected, for the Chrome fallback.
+    None when the page chain itself broke and the whole list needs the browser.
+    """
+    if len(pages) < max_pages:
+        return None
+    return [
+        (page_index, url)
+        for page_index, (url, items) in sorted(pages.items())
+        if len(items) < items_per_page
+    ]
@@ -0,0 +1,115 @@
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+from selectolax.lexbor import LexborHTMLParser
+
+SLIDE_CLASS = "c-gallery-vertical__slide-wrapper"
+
+# Raw fields of a gallery slide: name: (tag, class). The list scrapers turn these into ArticleData.
+SLIDE_FIELDS = {
+    "title": ("h2", None),
+    "number": ("span", "c-gallery-vertical-album__number"),
+    "description": ("p", None),
+    "subtitle": ("div", "c-gallery-vertical-album__subtitle"),
+    "year": ("div", "rs-list-item--year"),
+    "credits": ("div", "rs-list-item--credits"),
+}
+
+
+def soup_slides(soup) -> list:
+    slides = list()
+    for item in soup.find_all("div", {"class": SLIDE_CLASS}):
+        slide = dict()
+        for name, (tag, css_class) in SLIDE_FIELDS.items():
+            node = item.find(tag, {"class": css_class}) if css_class else item.find(tag)
+            slide[name] = node.get_text() if node else None
+        slides.append(slide)
+    return slides
+
+
+def parse_full_soup(page_content) -> list:
+    """
+    The original approach: the whole page DOM through html.parser.
+    """
+    return soup_slides(BeautifulSoup(page_content, "html.parser"))
+
+
+def parse_strained_soup(page_content) -> list:
+    """
+    Only the gallery slides are turned into a tree, the rest of the page is skipped while parsing.
+    """
+    # One class token, like the other backends: slides may carry extra classes.
+    strainer = SoupStrainer(
+        "div", class_=lambda classes: classes and SLIDE_CLASS in classes.split()
+    )
+    return soup_slides(BeautifulSoup(page_content, "html.parser", parse_only=strainer))
+
+
+def parse_lxml(page_content) -> list:
+    tree = lxml.html.fromstring(page_content)
+    slides = list()
+    for item in tree.xpath(
+        f"//div[contains(concat(' ', normalize-space(@class), ' '), ' {SLIDE_CLASS} ')]"
+    ):
+        slide = dict()
+        for name, (tag, css_class) in SLIDE_FIELDS.items():
+            xpath = f".//{tag}"
+            if css_class:
+                xpath += f"[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+            nodes = item.xpath(xpath)
+            slide[name] = nodes[0].text_content() if nodes else None
+        slides.append(slide)
+    return slides
+
+
+def parse_selectolax(page_content) -> list:
+    slides = list()
+    for item in LexborHTMLParser(page_content).css(f"div.{SLIDE_CLASS}"):
+        slide = dict()
+        for name, (tag, css_class) in SLIDE_FIELDS.items():
+            node = item.css_first(f"{tag}.{css_class}" if css_class else tag)
+            slide[name] = node.text() if node else None
+        slides.append(slide)
+    return slides
+
+
+BACKENDS = {
+    "html.parser": parse_full_soup,
+    "strainer": parse_strained_soup,
+    "lxml": parse_lxml,
+    "selectolax": parse_selectolax,
+}
+DEFAULT_BACKEND = "selectolax"
+
+
+def extract_slides(page_content, backend=DEFAULT_BACKEND) -> list:
+    return BACKENDS[backend](page_content)
+
+
+class ParserPool:
+    """
+    Parses pages in worker processes, the event loop keeps driving the browser
+    (or the HTTP client) while page N is parsed and page N+1 is loading.
+    """
+
+    def __init__(self, parse_page_content, backend=DEFAULT_BACKEND, workers=None):
+        self.parse_page_content = parse_page_content
+        self.backend = backend
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.executor.shutdown()
+
+    async def parse(self, page_content) -> list:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            functools.partial(
+                self.parse_page_content, page_content=page_content, backend=self.backend
+            ),
+        )
@@ -0,0 +1,87 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+
+
+class SnapshotArchive:
+    """
+    Content addressed archive of the raw page sources: every page is stored once as
+    objects/<sha256[:2]>/<sha256>.html.gz and manifest.jsonl records which URL and page
+    index it was fetched for, and when. Re-parsing the archive needs no browser and no network.
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.manifest_path = os.path.join(root_dir, "manifest.jsonl")
+        os.makedirs(os.path.join(root_dir, "objects"), exist_ok=True)
+        self.repair()
+
+    def repair(self):
+        """
+        Cuts a torn last line (the run died mid-write) off the manifest, new records must
+        not be appended onto it.
+        """
+        if not os.path.exists(self.manifest_path):
+            return
+        complete_bytes = 0
+        with open(self.manifest_path, "rb") as manifest_file:
+            for line in manifest_file:
+                if not line.endswith(b"\n"):
+                    break
+                complete_bytes += len(line)
+        os.truncate(self.manifest_path, complete_bytes)
+
+    def object_path(self, digest) -> str:
+        return os.path.join(self.root_dir, "objects", digest[:2], f"{digest}.html.gz")
+
+    def store(self, page_content, page_index, url) -> str:
+        data = page_content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+
+        # Unchanged pages are only added to the manifest, the object is already there.
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with gzip.open(tmp_path, "wb", compresslevel=6) as snapshot_file:
+                snapshot_file.write(data)
+            os.replace(tmp_path, path)
+
+        record = {
+            "sha256": digest,
+            "url": url,
+            "page_index": page_index,
+            "fetched_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        with open(self.manifest_path, "a", encoding="utf-8") as manifest_file:
+            manifest_file.write(json.dumps(record) + "\n")
+        return digest
+
+    def manifest(self) -> list:
+        records = list()
+        if not os.path.exists(self.manifest_path):
+            return records
+        with open(self.manifest_path, encoding="utf-8") as manifest_file:
+            for line in manifest_file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn line glued onto by an older version, the records after it count.
+                    continue
+        return records
+
+    def latest(self) -> list:
+        """
+        The most recent snapshot of every page index, ordered by page index.
+        """
+        pages = dict()
+        for record in self.manifest():
+            pages[record["page_index"]] = record
+        return [pages[page_index] for page_index in sorted(pages)]
+
+
+def read_snapshot(path) -> str:
+    with gzip.open(path, "rb") as snapshot_file:
+        return snapshot_file.read().decode("utf-8")